@@ -0,0 +1,60 @@
+"""Compare the cost of late pages between SKIP/LIMIT and keyset pagination.
+
+Requires kuzu (``pip install kuzu``). Usage::
+
+    python benchmarks/keyset_pagination.py --nodes 1000000 --page-size 1000
+"""
+import argparse
+import tempfile
+import time
+
+import kuzu
+
+from cymple import QueryBuilder
+from cymple.execution import run
+from cymple.pagination import keyset_queries
+
+
+def _populate(connection, nodes: int):
+    connection.execute('CREATE NODE TABLE Item(id INT64, name STRING, PRIMARY KEY (id))')
+    connection.execute('UNWIND range(0, $count - 1) AS i CREATE (:Item {id: i, name: "item-" + CAST(i AS STRING)})',
+                       {'count': nodes})
+
+
+def _timed(connection, query: str, parameters: dict, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run(connection, query, parameters)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--nodes', type=int, default=1_000_000)
+    parser.add_argument('--page-size', type=int, default=1_000)
+    parser.add_argument('--pages', type=int, default=8, help='Number of page offsets to sample')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        connection = kuzu.Connection(kuzu.Database(f'{directory}/db'))
+        _populate(connection, args.nodes)
+
+        query = QueryBuilder().match().node('Item', 'n').return_mapping([('n.id', 'id'), ('n.name', 'name')])
+        skip_query = f'{query} ORDER BY n.id SKIP $skip LIMIT $size'
+        _, keyset_query = keyset_queries(query, 'n.id')
+
+        print(f'{"page":>10} {"SKIP (ms)":>12} {"keyset (ms)":>12} {"speedup":>9}')
+        last_page = args.nodes // args.page_size - 1
+        for sample in range(args.pages):
+            page = last_page * sample // max(args.pages - 1, 1)
+            offset = page * args.page_size
+            skip_time = _timed(connection, skip_query, {'skip': offset, 'size': args.page_size}, args.repeat)
+            keyset_time = _timed(connection, keyset_query, {'last': offset - 1, 'size': args.page_size}, args.repeat)
+            print(f'{page:>10} {skip_time * 1000:>12.2f} {keyset_time * 1000:>12.2f} {skip_time / keyset_time:>8.1f}x')
+
+
+if __name__ == '__main__':
+    main()
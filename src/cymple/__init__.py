@@ -6,3 +6,5 @@ from .version import __version__
 from .builder import QueryBuilder
 from .typedefs import Mapping
 from .table_model import TableModel
+from .execution import ConnectionPool
+from .session import Session
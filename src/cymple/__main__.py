@@ -1,6 +1,50 @@
 """Package entrypoint when the package is run with -m option"""
+import argparse
+import sys
 
 from .version import __version__
 
+
+def _lint(arguments) -> int:
+    from .lint import main  # pylint: disable=C0415
+    return main(arguments)
+
+
+def _replay(arguments) -> int:
+    from .workload import main  # pylint: disable=C0415
+    return main(arguments)
+
+
+def main(argv=None) -> int:
+    """Parse the command line and run the requested command, returning the exit status."""
+    parser = argparse.ArgumentParser(prog='python -m cymple', description=f'Cymple version {__version__}')
+    commands = parser.add_subparsers(dest='command')
+
+    lint = commands.add_parser('lint', help='Report the performance anti-patterns of the queries built by modules')
+    lint.add_argument('targets', nargs='+', help='Dotted module names or paths to Python files')
+    lint.add_argument('--min-severity', choices=['info', 'warning', 'error'], default='info',
+                      help='The least severe findings reported (default: info)')
+    lint.add_argument('--fail-on', choices=['info', 'warning', 'error'], default='error',
+                      help='The least severe findings making the command fail (default: error)')
+    lint.add_argument('--max-skip', type=int, default=1000, help='The SKIP count reported as deep paging')
+    lint.add_argument('--max-list-items', type=int, default=100, help='The size of the inline lists reported')
+    lint.set_defaults(handler=_lint)
+
+    replay = commands.add_parser('replay', help='Replay a recorded workload against a Kuzu database')
+    replay.add_argument('workload', help='The path of the workload log')
+    replay.add_argument('--database', required=True, help='The path of the Kuzu database')
+    replay.add_argument('--concurrency', type=int, default=4, help='The maximal number of queries in flight')
+    replay.add_argument('--speedup', type=float, default=1.0,
+                        help='The factor the recorded inter-arrival times are divided by, 0 for no pacing')
+    replay.add_argument('--json', action='store_true', help='Print the report as JSON')
+    replay.set_defaults(handler=_replay)
+
+    arguments = parser.parse_args(argv)
+    if arguments.command is None:
+        print('Welcome to Cymple version ' + __version__)
+        return 0
+    return arguments.handler(arguments)
+
+
 if __name__ == '__main__':
-    print('Welcome to Cymple version ' + __version__)
+    sys.exit(main())
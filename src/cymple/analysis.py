@@ -0,0 +1,406 @@
+"""Static analysis helpers over rendered Cypher queries.
+
+Queries built with Cymple are plain strings, so any rewrite applied after a query has been built
+(pagination, partitioning, projections...) works on the rendered text. This module splits a query
+into its top-level clauses, ignoring anything nested in string literals, parentheses, brackets or braces.
+"""
+import re
+from collections import namedtuple
+from typing import List
+
+Clause = namedtuple('Clause', ['keyword', 'body'])
+
+CLAUSE_KEYWORDS = [
+    'OPTIONAL MATCH', 'DETACH DELETE', 'ORDER BY', 'UNION ALL', 'ON CREATE', 'ON MATCH',
+    'MATCH', 'UNWIND', 'WITH', 'WHERE', 'RETURN', 'SKIP', 'LIMIT', 'CREATE', 'MERGE', 'SET',
+    'DELETE', 'REMOVE', 'CALL', 'YIELD', 'UNION', 'ALTER', 'COPY', 'DROP', 'EXPLAIN', 'PROFILE'
+]
+
+_OPENING = '([{'
+_CLOSING = ')]}'
+_QUOTES = '"\'`'
+_PREDICATE_PREFIXES = ('STARTS', 'ENDS')
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == '_'
+
+
+def _keyword_at(query: str, index: int) -> str:
+    if index > 0 and (_is_word_char(query[index - 1]) or query[index - 1] in '.$:'):
+        return None
+
+    upper = query[index:index + 16].upper()
+    for keyword in CLAUSE_KEYWORDS:
+        if not upper.startswith(keyword):
+            continue
+        end = index + len(keyword)
+        if end < len(query) and _is_word_char(query[end]):
+            continue
+        if keyword == 'WITH' and query[:index].rstrip().upper().endswith(_PREDICATE_PREFIXES):
+            # "STARTS WITH" / "ENDS WITH" are string predicates, not a WITH clause
+            continue
+        return keyword
+
+    return None
+
+
+def split_clauses(query: str) -> List[Clause]:
+    """Split a query into its top-level clauses.
+
+    :param query: The rendered query
+    :type query: str
+
+    :return: The list of clauses, in order of appearance
+    :rtype: List[Clause]
+    """
+    query = str(query)
+    clauses = []
+    keyword = None
+    body_start = 0
+    depth = 0
+    quote = None
+    index = 0
+
+    while index < len(query):
+        char = query[index]
+        if quote:
+            if char == '\\':
+                index += 1
+            elif char == quote:
+                quote = None
+        elif char in _QUOTES:
+            quote = char
+        elif char in _OPENING:
+            depth += 1
+        elif char in _CLOSING:
+            depth -= 1
+        elif depth == 0 and char.isalpha():
+            found = _keyword_at(query, index)
+            if found:
+                if keyword is not None or query[body_start:index].strip():
+                    clauses.append(Clause(keyword, query[body_start:index].strip()))
+                keyword = found
+                index += len(found)
+                body_start = index
+                continue
+        index += 1
+
+    if keyword is not None or query[body_start:].strip():
+        clauses.append(Clause(keyword, query[body_start:].strip()))
+
+    return clauses
+
+
+def join_clauses(clauses: List[Clause]) -> str:
+    """Render a list of clauses back to a query string."""
+    parts = []
+    for keyword, body in clauses:
+        parts.append(' '.join(part for part in (keyword, body) if part))
+    return ' '.join(parts)
+
+
+def split_top_level(text: str, separator: str = ',') -> List[str]:
+    """Split a text on a separator, ignoring separators nested in literals or brackets."""
+    parts = []
+    depth = 0
+    quote = None
+    start = 0
+    index = 0
+
+    while index < len(text):
+        char = text[index]
+        if quote:
+            if char == '\\':
+                index += 1
+            elif char == quote:
+                quote = None
+        elif char in _QUOTES:
+            quote = char
+        elif char in _OPENING:
+            depth += 1
+        elif char in _CLOSING:
+            depth -= 1
+        elif depth == 0 and text.startswith(separator, index):
+            parts.append(text[start:index].strip())
+            index += len(separator)
+            start = index
+            continue
+        index += 1
+
+    parts.append(text[start:].strip())
+    return [part for part in parts if part]
+
+
+def projection_items(body: str) -> List[tuple]:
+    """Parse the body of a RETURN/WITH clause into (expression, column name) pairs."""
+    items = []
+    for item in split_top_level(body):
+        if item.upper().startswith('DISTINCT '):
+            item = item[len('DISTINCT '):].strip()
+        parts = split_top_level(item, ' AS ')
+        if len(parts) == 1:
+            parts = split_top_level(item, ' as ')
+        expression = parts[0]
+        items.append((expression, parts[-1] if len(parts) > 1 else expression))
+    return items
+
+
+def final_return_index(clauses: List[Clause]) -> int:
+    """Find the index of the RETURN clause which ends a single (non UNION) query."""
+    keywords = [clause.keyword for clause in clauses]
+    if 'UNION' in keywords or 'UNION ALL' in keywords:
+        raise ValueError('Rewriting UNION queries is not supported')
+    for index in range(len(clauses) - 1, -1, -1):
+        if clauses[index].keyword == 'RETURN':
+            return index
+    raise ValueError('The query has no RETURN clause')
+
+
+def _inject_predicate(clauses: List[Clause], index: int, predicate: str) -> str:
+    previous = clauses[index - 1] if index > 0 else None
+    if previous is None or previous.keyword not in ('MATCH', 'WITH', 'YIELD', 'WHERE'):
+        following = clauses[index].keyword if index < len(clauses) else 'the end'
+        raise ValueError(f'Cannot inject a predicate before {following} in: {join_clauses(clauses)}')
+
+    if previous.keyword == 'WHERE':
+        clauses[index - 1] = Clause('WHERE', f'({previous.body}) AND ({predicate})')
+    else:
+        clauses.insert(index, Clause('WHERE', predicate))
+
+    return join_clauses(clauses)
+
+
+def add_predicate(query: str, predicate: str) -> str:
+    """Inject a predicate to the WHERE clause filtering the rows which reach the final RETURN clause.
+
+    :param query: The rendered query
+    :type query: str
+    :param predicate: A Cypher boolean expression
+    :type predicate: str
+
+    :return: The rewritten query
+    :rtype: str
+    """
+    clauses = split_clauses(query)
+    return _inject_predicate(clauses, final_return_index(clauses), predicate)
+
+
+def append_predicate(query: str, predicate: str) -> str:
+    """Inject a predicate to the WHERE clause filtering the rows at the end of a query part, e.g. "MATCH ... WHERE ..."
+
+    :param query: The rendered query part, ending with a MATCH, WITH, YIELD or WHERE clause
+    :type query: str
+    :param predicate: A Cypher boolean expression
+    :type predicate: str
+
+    :return: The rewritten query
+    :rtype: str
+    """
+    clauses = split_clauses(query)
+    return _inject_predicate(clauses, len(clauses), predicate)
+
+
+def replace_tail(query: str, order_by: str = None, skip: str = None, limit: str = None,
+                 replace_window: bool = False) -> str:
+    """Replace the ORDER BY / SKIP / LIMIT modifiers of the final RETURN clause.
+
+    A SKIP or a LIMIT of the query is only dropped with ``replace_window=True``, otherwise a ValueError is
+    raised rather than silently returning other rows than the query.
+    """
+    clauses = split_clauses(query)
+    index = final_return_index(clauses)
+    window = [clause.keyword for clause in clauses[index + 1:] if clause.keyword in ('SKIP', 'LIMIT')]
+    if window and not replace_window:
+        raise ValueError(f'The query already has its own {" and ".join(window)}, which would be dropped')
+    clauses = clauses[:index + 1]
+
+    for keyword, value in (('ORDER BY', order_by), ('SKIP', skip), ('LIMIT', limit)):
+        if value is not None:
+            clauses.append(Clause(keyword, str(value)))
+
+    return join_clauses(clauses)
+
+
+COUNT_COLUMN = 'count'
+FOUND_COLUMN = 'found'
+_AGGREGATE = re.compile(r'\b(?:count|sum|avg|min|max|collect|stddev_samp|stddev_pop)\s*\(', re.IGNORECASE)
+_VARIABLE = re.compile(r'[A-Za-z_]\w*|\*')
+
+
+def has_aggregate(expression: str) -> bool:
+    """Check whether an expression (or the body of a RETURN/WITH clause) calls an aggregate function."""
+    return bool(_AGGREGATE.search(_STRING_LITERAL.sub('""', expression)))
+
+
+def _returned_rows(query: str) -> List[Clause]:
+    """Get the clauses of a query producing the rows of its final RETURN, without the RETURN projection.
+
+    A RETURN which only projects the rows is dropped (with its ORDER BY). A RETURN which changes the rows
+    (DISTINCT, aggregation, SKIP or LIMIT) becomes a WITH clause, every expression being aliased as Kuzu requires.
+    A query without RETURN clause is kept as is.
+    """
+    clauses = split_clauses(query)
+    if not any(clause.keyword == 'RETURN' for clause in clauses):
+        if any(clause.keyword in ('UNION', 'UNION ALL') for clause in clauses):
+            raise ValueError('Rewriting UNION queries is not supported')
+        return clauses
+
+    index = final_return_index(clauses)
+    body = clauses[index].body
+    tail = clauses[index + 1:]
+    distinct = body.upper().startswith('DISTINCT ')
+    if not (distinct or _AGGREGATE.search(_STRING_LITERAL.sub('""', body)) or
+            any(clause.keyword in ('SKIP', 'LIMIT') for clause in tail)):
+        return clauses[:index]
+
+    items = []
+    for position, (expression, column) in enumerate(projection_items(body)):
+        if expression != column:
+            items.append(f'{expression} AS {column}')
+        elif _VARIABLE.fullmatch(expression):
+            items.append(expression)
+        else:
+            items.append(f'{expression} AS _c{position}')
+    projection = ('DISTINCT ' if distinct else '') + ', '.join(items)
+    if not any(clause.keyword in ('SKIP', 'LIMIT') for clause in tail):
+        # Kuzu only accepts an ORDER BY in a WITH clause followed by SKIP or LIMIT, where it matters
+        tail = []
+    return clauses[:index] + [Clause('WITH', projection)] + tail
+
+
+def count_query(query: str) -> str:
+    """Rewrite a query to return the number of rows it returns, as a single "count" column."""
+    return join_clauses(_returned_rows(query) + [Clause('RETURN', f'count(*) AS {COUNT_COLUMN}')])
+
+
+def exists_query(query: str) -> str:
+    """Rewrite a query to return a single row when it returns any row, and no row otherwise."""
+    return join_clauses(_returned_rows(query) + [Clause('RETURN', f'true AS {FOUND_COLUMN}'), Clause('LIMIT', '1')])
+
+
+def first_query(query: str) -> str:
+    """Rewrite a query to return only its first row, keeping its ORDER BY and SKIP."""
+    clauses = split_clauses(query)
+    index = final_return_index(clauses)
+    tail = [clause for clause in clauses[index + 1:] if clause.keyword != 'LIMIT']
+    return join_clauses(clauses[:index + 1] + tail + [Clause('LIMIT', '1')])
+
+
+QueryLabels = namedtuple('QueryLabels', ['read', 'written'])
+QueryLabels.__doc__ = """The labels read and written by a query, None standing for "unknown, possibly any label"."""
+
+WRITE_KEYWORDS = frozenset(['CREATE', 'MERGE', 'SET', 'DELETE', 'DETACH DELETE', 'REMOVE', 'ALTER', 'DROP', 'COPY'])
+PATTERN_KEYWORDS = frozenset(['MATCH', 'OPTIONAL MATCH', 'MERGE', 'CREATE'])
+_DDL_KEYWORDS = frozenset(['ALTER', 'DROP', 'COPY'])
+_WRITE_PROCEDURES = ('CREATE_', 'DROP_')
+_DDL_CREATE = ('NODE TABLE', 'REL TABLE')
+_TRANSACTION_CONTROL = re.compile(r'\s*(?:BEGIN\s+TRANSACTION|COMMIT|ROLLBACK)\b', re.IGNORECASE)
+
+_STRING_LITERAL = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'')
+_NODE_PATTERN = re.compile(r'\(\s*([A-Za-z_]\w*)?\s*(:[^(){}]*?)?\s*(?:\{[^{}]*\})?\s*\)')
+_RELATION_PATTERN = re.compile(r'\[\s*([A-Za-z_]\w*)?\s*(:[^*\[\](){}]*)?')
+_BRACKETLESS_RELATION = re.compile(r'\)\s*<?-\s*-|-\s*->?\s*\(')
+_LABEL_NAME = re.compile(r'`[^`]+`|[A-Za-z_]\w*')
+_IDENTIFIER = re.compile(r'\s*([A-Za-z_]\w*)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_whitespace(query: str) -> str:
+    """Collapse any run of whitespace outside of string literals into a single space."""
+    query = str(query).strip()
+    parts = []
+    last = 0
+    for match in _STRING_LITERAL.finditer(query):
+        parts.append(_WHITESPACE.sub(' ', query[last:match.start()]))
+        parts.append(match.group())
+        last = match.end()
+    parts.append(_WHITESPACE.sub(' ', query[last:]))
+    return ''.join(parts)
+
+
+def _label_names(labels: str) -> set:
+    return {name.strip('`') for name in _LABEL_NAME.findall(labels or '')}
+
+
+def is_read_only(query) -> bool:
+    """Check whether a query only reads from the database."""
+    for clause in split_clauses(query):
+        if clause.keyword in WRITE_KEYWORDS:
+            return False
+        if clause.keyword == 'CALL' and (clause.body.upper().startswith(_WRITE_PROCEDURES) or
+                                         '=' in clause.body.split('(')[0]):
+            return False
+    return True
+
+
+def is_ddl(query) -> bool:
+    """Check whether a query alters the database schema (CREATE/ALTER/DROP TABLE, COPY, index procedures...)."""
+    for clause in split_clauses(query):
+        if clause.keyword in _DDL_KEYWORDS:
+            return True
+        if clause.keyword == 'CREATE' and clause.body.upper().startswith(_DDL_CREATE):
+            return True
+        if clause.keyword == 'CALL' and not is_read_only(f'CALL {clause.body}'):
+            return True
+    return False
+
+
+def is_transaction_control(query) -> bool:
+    """Check whether a query begins, commits or rolls back an explicit transaction."""
+    return _TRANSACTION_CONTROL.match(str(query)) is not None
+
+
+def query_labels(query) -> QueryLabels:
+    """Find the node and relationship labels (table names) read and written by a query.
+
+    Labels are collected from the patterns of MATCH/MERGE/CREATE clauses, the labels written by SET, REMOVE
+    and DELETE clauses are resolved through the variables bound by those patterns.
+
+    :param query: The rendered query
+    :type query: str
+
+    :return: The read and written labels, each being None when it cannot be determined
+    :rtype: QueryLabels
+    """
+    clauses = split_clauses(query)
+    bindings = {}
+    read, written = set(), set()
+    read_known, written_known = True, True
+
+    for keyword, body in clauses:
+        if keyword not in PATTERN_KEYWORDS:
+            continue
+        body = _STRING_LITERAL.sub('""', body)
+        if keyword == 'CREATE' and body.upper().startswith(_DDL_CREATE):
+            written_known = False
+            continue
+        if _BRACKETLESS_RELATION.search(body):
+            read_known = False
+        for pattern in (_NODE_PATTERN, _RELATION_PATTERN):
+            for variable, labels in pattern.findall(body):
+                names = _label_names(labels)
+                if variable and names:
+                    bindings.setdefault(variable, set()).update(names)
+                elif not names and variable not in bindings:
+                    read_known = False
+                read.update(names)
+                if keyword in ('MERGE', 'CREATE'):
+                    written.update(names or bindings.get(variable, set()))
+
+    for keyword, body in clauses:
+        if keyword == 'CALL':
+            read_known = False
+            written_known = written_known and is_read_only(f'CALL {body}')
+        elif keyword in _DDL_KEYWORDS or keyword == 'DETACH DELETE':
+            # DETACH DELETE also drops the relationships of the deleted nodes, whatever their tables are
+            written_known = False
+        elif keyword in ('SET', 'REMOVE', 'DELETE'):
+            for item in split_top_level(body):
+                variable = _IDENTIFIER.match(item)
+                if variable is None or variable.group(1) not in bindings:
+                    written_known = False
+                else:
+                    written.update(bindings[variable.group(1)])
+
+    return QueryLabels(read if read_known else None, written if written_known else None)
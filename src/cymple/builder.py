@@ -3,7 +3,9 @@
 # pylint: disable=R0901
 # pylint: disable=R0903
 # pylint: disable=W0102
+import time
 from typing import List, Union, Dict, Any
+from .hooks import hooks
 from .typedefs import Mapping, Properties
 
 class Query():
@@ -12,10 +14,22 @@ class Query():
     def __init__(self, query):
         """Initialize the query object."""
         self.query = query
+        if hooks:
+            hooks.emit('clause_appended', clause=type(self).__name__.replace('Available', ''), size=len(query))
 
     def __str__(self) -> str:
         """Implement the str() operator for the query builder."""
-        return self.query.strip()
+        if not hooks:
+            return self.query.strip()
+
+        start = time.perf_counter()
+        query = self.query.strip()
+        duration = time.perf_counter() - start
+        # The query text is built clause by clause, observers are notified once per rendered text
+        if self.__dict__.get('_rendered') is not self.query:
+            self._rendered = self.query
+            hooks.emit('query_rendered', query=query, size=len(query), duration=duration)
+        return query
 
     def __add__(self, other):
         """Implement the + operator for the query builder."""
@@ -34,6 +48,171 @@ class Query():
         """Concatenate a cypher query string"""
         return AnyAvailable(self.query.strip() + ' ' + cypher_query_str.strip())
 
+    def explain(self):
+        """Prefix the query with EXPLAIN, to get the plan Kuzu would execute.
+
+        Executed through cymple (``execution.run``, a ``Session``, a ``ConnectionPool``...), the query returns
+        a ``Plan`` instead of rows.
+
+        :return: The EXPLAIN query
+        :rtype: Query
+        """
+        return self._with_plan('explain')
+
+    def profile(self):
+        """Prefix the query with PROFILE, to execute it and get its plan with per-operator measurements.
+
+        Executed through cymple (``execution.run``, a ``Session``, a ``ConnectionPool``...), the query returns
+        a ``Plan`` instead of rows.
+
+        :return: The PROFILE query
+        :rtype: Query
+        """
+        return self._with_plan('profile')
+
+    def _with_plan(self, keyword: str):
+        query = Query(keyword.upper() + ' ' + self.query.strip())
+        query.result_shape = keyword
+        return query
+
+    def count(self):
+        """Rewrite the query to count the rows it returns (``RETURN count(*)``) instead of fetching them.
+
+        The WHERE and WITH clauses are kept; a RETURN with DISTINCT, aggregations, SKIP or LIMIT becomes a WITH
+        so that the same rows are counted. Executed through cymple, the query returns an int.
+
+        :return: The counting query
+        :rtype: Query
+        """
+        from .analysis import count_query
+        return self._with_shape(count_query(self.query), 'count')
+
+    def exists(self):
+        """Rewrite the query to check whether it returns any row (``RETURN true LIMIT 1``).
+
+        Executed through cymple, the query returns a bool.
+
+        :return: The existence query
+        :rtype: Query
+        """
+        from .analysis import exists_query
+        return self._with_shape(exists_query(self.query), 'exists')
+
+    def first(self):
+        """Limit the query to its first row (``LIMIT 1``), keeping its ORDER BY and SKIP.
+
+        Executed through cymple, the query returns the first row as a dict, or None when there is no row.
+
+        :return: The limited query
+        :rtype: Query
+        """
+        from .analysis import first_query
+        from .hydration import TypedText, column_types
+        query = first_query(self.query)
+        types = column_types(self)
+        return self._with_shape(TypedText(query, types) if types else query, 'first')
+
+    def _with_shape(self, query: str, shape: str):
+        query = Query(query)
+        query.result_shape = shape
+        return query
+
+    @staticmethod
+    def _index_procedure(procedure: str, arguments: list, expressions: list = None, options: dict = None):
+        rendered = [str(Properties._format_value(argument, True)) for argument in arguments]
+        rendered += [str(expression) for expression in expressions or []]
+        if options:
+            rendered.append(Properties(options).to_str(':='))
+        return f' {procedure}({", ".join(rendered)})'
+
+    def materialize(self, executor, name: str, key: str = None, parameters: dict = None, column_types: dict = None):
+        """Persist the results of this read query in a node table, created if needed and filled right away.
+
+        :param executor: A ``kuzu.Connection`` or a ``ConnectionPool``
+        :param name: The name of the node table
+        :type name: str
+        :param key: The returned column used as primary key, defaults to None (a SERIAL "row_id" column)
+        :type key: str
+        :param parameters: The query parameters, defaults to None
+        :type parameters: dict
+        :param column_types: The Kuzu type of every column, defaults to None (the types Kuzu reports)
+        :type column_types: dict
+
+        :return: The view, to refresh the table on demand (``refresh``) or on a schedule (``schedule``)
+        :rtype: MaterializedView
+        """
+        from .materialized import MaterializedView
+        view = MaterializedView(executor, name, self, key, parameters, column_types).create()
+        view.refresh()
+        return view
+
+    def paginate(self, executor, key, page_size: int, descending: bool = False, parameters: dict = None):
+        """Iterate over the query results page by page, using keyset pagination instead of SKIP/LIMIT.
+
+        The query is rewritten to "WHERE key > $last ORDER BY key LIMIT $size", with the last key of each page
+        being tracked between pages. The key must be unique, rows tying with the last row of a page would be
+        skipped: paginate on a composite key ending with a unique tiebreaker, e.g. ['n.score', 'n.id']. Duplicate
+        keys, within a page or across a page boundary, raise a ValueError.
+
+        :param executor: An object exposing ``execute(query, parameters)``, e.g. a ``kuzu.Connection``
+        :param key: The unique expression (or list of expressions, for a composite key) to paginate on, e.g. 'n.id'
+        :type key: Union[str, List[str]]
+        :param page_size: The maximal number of rows in a page
+        :type page_size: int
+        :param descending: Iterate in descending key order, defaults to False
+        :type descending: bool
+        :param parameters: Extra parameters of the query, defaults to None
+        :type parameters: dict
+
+        :return: A generator of pages, each page being a list of rows
+        """
+        from .pagination import keyset_pages
+        return keyset_pages(executor, self, key, page_size, descending, parameters)
+
+    def execute_in_batches(self, executor, batch_size: int = 10000, key: str = None, parameters: dict = None,
+                           checkpoint: str = None, on_progress=None):
+        """Execute this MATCH ... DELETE/SET query as a loop of bounded batches, each one committed on its own.
+
+        :param executor: An object exposing ``execute(query, parameters)``, e.g. a ``kuzu.Connection``
+        :param batch_size: The maximal number of rows written per batch, or with a key of values of the key,
+            defaults to 10000
+        :type batch_size: int
+        :param key: The expression to batch on, e.g. 'n.id', required for updates, defaults to None (LIMIT batches)
+        :type key: str
+        :param parameters: The query parameters, defaults to None
+        :type parameters: dict
+        :param checkpoint: The path of the JSON file used to resume an interrupted run, defaults to None
+        :type checkpoint: str
+        :param on_progress: A callable receiving the progress after every batch, defaults to None
+
+        :return: The report: rows written, batches, last key, duration, throughput, done
+        """
+        from .bulk import execute_in_batches
+        return execute_in_batches(executor, self, batch_size, key, parameters, checkpoint, on_progress)
+
+    def execute_partitioned(self, pool, key: str, partitions: int = 4, method: str = 'hash', bounds: list = None,
+                            parameters: dict = None, preserve_order: bool = True):
+        """Execute this read query as disjoint partitions running concurrently on pooled connections.
+
+        :param pool: A ``ConnectionPool`` (or any thread-safe executor exposing ``execute(query, parameters)``)
+        :param key: The expression to partition on, e.g. 'f.id'
+        :type key: str
+        :param partitions: The number of partitions, defaults to 4
+        :type partitions: int
+        :param method: 'hash', 'modulo' or 'range', defaults to 'hash'
+        :type method: str
+        :param bounds: The split points of a 'range' partitioning, defaults to None
+        :type bounds: list
+        :param parameters: The query parameters, defaults to None
+        :type parameters: dict
+        :param preserve_order: K-way merge the partitions according to the query ORDER BY, defaults to True
+        :type preserve_order: bool
+
+        :return: The merged rows
+        """
+        from .partitioning import execute_partitioned
+        return execute_partitioned(pool, self, key, partitions, method, bounds, parameters, preserve_order)
+
 
 class QueryStart(Query):
     """A class for representing a "QUERY START" clause."""
@@ -217,6 +396,64 @@ class DropColumn(Query):
         """
         return DropColumnAvailable(self.query + f""" DROP {"IF EXISTS " if if_exists else ""}{name}""")
 
+class FtsIndex(Query):
+    """A class for representing a "FTS INDEX" clause."""
+
+    def create_fts_index(self, table: str, index_name: str, properties: Union[str, List[str]], options: dict = None):
+        """Concatenate a CREATE_FTS_INDEX procedure, building a full-text index on string properties.
+        
+        :param table: The name of the indexed node table
+        :type table: str
+        :param index_name: The name of the index
+        :type index_name: str
+        :param properties: The indexed string properties
+        :type properties: Union[str, List[str]]
+        :param options: The index options, e.g. {'stemmer': 'porter'}, defaults to None
+        :type options: dict
+        
+        :return: A Query object with a query that contains the new clause.
+        :rtype: FtsIndexAvailable
+        """
+        if not isinstance(properties, list):
+            properties = [properties]
+        property_list = f'[{", ".join(Properties._format_value(name, True) for name in properties)}]'
+        procedure = self._index_procedure('CREATE_FTS_INDEX', [table, index_name], [property_list], options)
+        return FtsIndexAvailable(self.query + procedure)
+
+    def query_fts_index(self, table: str, index_name: str, parameter: str = 'query', options: dict = None):
+        """Concatenate a QUERY_FTS_INDEX procedure, yielding the matching nodes and their score.
+        
+        :param table: The name of the indexed node table
+        :type table: str
+        :param index_name: The name of the index
+        :type index_name: str
+        :param parameter: The name of the parameter holding the searched text, passed at execution time, defaults to
+            'query'
+        :type parameter: str
+        :param options: The search options, e.g. {'conjunctive': True, 'top': 10}, defaults to None
+        :type options: dict
+        
+        :return: A Query object with a query that contains the new clause.
+        :rtype: FtsIndexAvailable
+        """
+        if not isinstance(parameter, str):
+            raise TypeError('The search terms are passed at execution time, give the name of their parameter instead')
+        procedure = self._index_procedure('QUERY_FTS_INDEX', [table, index_name], [f'${parameter.lstrip("$")}'], options)
+        return FtsIndexAvailable(self.query + procedure)
+
+    def drop_fts_index(self, table: str, index_name: str):
+        """Concatenate a DROP_FTS_INDEX procedure.
+        
+        :param table: The name of the indexed node table
+        :type table: str
+        :param index_name: The name of the index
+        :type index_name: str
+        
+        :return: A Query object with a query that contains the new clause.
+        :rtype: FtsIndexAvailable
+        """
+        return FtsIndexAvailable(self.query + self._index_procedure('DROP_FTS_INDEX', [table, index_name]))
+
 class Limit(Query):
     """A class for representing a "LIMIT" clause."""
 
@@ -475,7 +712,7 @@ class Procedure(Query):
 class Relation(Query):
     """A class for representing a "RELATION" clause."""
 
-    def related(self, labels: Union[str, List[str]] = None, ref_name: str = None, properties: dict = None, min_hops: int = 1, max_hops: int = 1, shortest: Union[bool, str] = False, **kwargs):
+    def related(self, labels: Union[str, List[str]] = None, ref_name: str = None, properties: dict = None, min_hops: int = 1, max_hops: int = 1, shortest: Union[bool, str] = False, weight: str = None, rel_filter: Any = None, node_filter: Any = None, rel_projection: list = None, node_projection: list = None, filter_variables: tuple = ('r', 'n'), **kwargs):
         """Concatenate an undirectional (i.e. --) graph Relationship, which may be filtered.
         
         :param labels: The relationship labels(type or types) in the DB, defaults to None
@@ -492,15 +729,33 @@ class Relation(Query):
         :param shortest: Whether to add the SHORTEST flag to a recursive relationship. Requires min_hops | max_hops.
             Can be True/'shortest' for SHORTEST, or 'all' for ALL SHORTEST, defaults to False
         :type shortest: Union[bool, str]
+        :param weight: The numeric relationship property to minimize for a weighted shortest path (WSHORTEST), combined
+            with shortest='all' for ALL WSHORTEST, defaults to None
+        :type weight: str
+        :param rel_filter: A predicate (a string or a TableModel Expr) every relationship of a variable-length path
+            must satisfy, evaluated during the path expansion, defaults to None
+        :type rel_filter: Any
+        :param node_filter: A predicate (a string or a TableModel Expr) every intermediate node of a variable-length
+            path must satisfy, evaluated during the path expansion, defaults to None
+        :type node_filter: Any
+        :param rel_projection: The relationship properties kept in the path (the others being dropped), defaults to
+            None
+        :type rel_projection: list
+        :param node_projection: The intermediate node properties kept in the path (the others being dropped), defaults
+            to None
+        :type node_projection: list
+        :param filter_variables: The variables naming the relationship and the intermediate node in the filters,
+            defaults to ('r', 'n')
+        :type filter_variables: tuple
         :param **kwargs: kwargs
         :type **kwargs
         
         :return: A Query object with a query that contains the new clause.
         :rtype: RelationAvailable
         """
-        return RelationAvailable(self.query + self._directed_relation('none', labels, ref_name, properties, min_hops, max_hops, shortest, **kwargs))
+        return RelationAvailable(self.query + self._directed_relation('none', labels, ref_name, properties, min_hops, max_hops, shortest, weight, rel_filter, node_filter, rel_projection, node_projection, filter_variables, **kwargs))
 
-    def related_to(self, labels: Union[str, List[str]] = None, ref_name: str = None, properties: dict = {}, min_hops: int = 1, max_hops: int = 1, shortest: Union[bool, str] = False, **kwargs):
+    def related_to(self, labels: Union[str, List[str]] = None, ref_name: str = None, properties: dict = {}, min_hops: int = 1, max_hops: int = 1, shortest: Union[bool, str] = False, weight: str = None, rel_filter: Any = None, node_filter: Any = None, rel_projection: list = None, node_projection: list = None, filter_variables: tuple = ('r', 'n'), **kwargs):
         """Concatenate a forward (i.e. -->) graph Relationship, which may be filtered.
         
         :param labels: The relationship labels(type or types) in the DB, defaults to None
@@ -517,15 +772,33 @@ class Relation(Query):
         :param shortest: Whether to add the SHORTEST flag to a recursive relationship. Requires min_hops | max_hops.
             Can be True/'shortest' for SHORTEST, or 'all' for ALL SHORTEST, defaults to False
         :type shortest: Union[bool, str]
+        :param weight: The numeric relationship property to minimize for a weighted shortest path (WSHORTEST), combined
+            with shortest='all' for ALL WSHORTEST, defaults to None
+        :type weight: str
+        :param rel_filter: A predicate (a string or a TableModel Expr) every relationship of a variable-length path
+            must satisfy, evaluated during the path expansion, defaults to None
+        :type rel_filter: Any
+        :param node_filter: A predicate (a string or a TableModel Expr) every intermediate node of a variable-length
+            path must satisfy, evaluated during the path expansion, defaults to None
+        :type node_filter: Any
+        :param rel_projection: The relationship properties kept in the path (the others being dropped), defaults to
+            None
+        :type rel_projection: list
+        :param node_projection: The intermediate node properties kept in the path (the others being dropped), defaults
+            to None
+        :type node_projection: list
+        :param filter_variables: The variables naming the relationship and the intermediate node in the filters,
+            defaults to ('r', 'n')
+        :type filter_variables: tuple
         :param **kwargs: kwargs
         :type **kwargs
         
         :return: A Query object with a query that contains the new clause.
         :rtype: RelationAvailable
         """
-        return RelationAvailable(self.query + self._directed_relation('forward', labels, ref_name, properties, min_hops, max_hops, shortest, **kwargs))
+        return RelationAvailable(self.query + self._directed_relation('forward', labels, ref_name, properties, min_hops, max_hops, shortest, weight, rel_filter, node_filter, rel_projection, node_projection, filter_variables, **kwargs))
 
-    def related_from(self, labels: Union[str, List[str]] = None, ref_name: str = None, properties: dict = {}, min_hops: int = 1, max_hops: int = 1, shortest: Union[bool, str] = False, **kwargs):
+    def related_from(self, labels: Union[str, List[str]] = None, ref_name: str = None, properties: dict = {}, min_hops: int = 1, max_hops: int = 1, shortest: Union[bool, str] = False, weight: str = None, rel_filter: Any = None, node_filter: Any = None, rel_projection: list = None, node_projection: list = None, filter_variables: tuple = ('r', 'n'), **kwargs):
         """Concatenate a backward (i.e. <--) graph Relationship, which may be filtered.
         
         :param labels: The relationship labels(type or types) in the DB, defaults to None
@@ -542,15 +815,33 @@ class Relation(Query):
         :param shortest: Whether to add the SHORTEST flag to a recursive relationship. Requires min_hops | max_hops.
             Can be True/'shortest' for SHORTEST, or 'all' for ALL SHORTEST, defaults to False
         :type shortest: Union[bool, str]
+        :param weight: The numeric relationship property to minimize for a weighted shortest path (WSHORTEST), combined
+            with shortest='all' for ALL WSHORTEST, defaults to None
+        :type weight: str
+        :param rel_filter: A predicate (a string or a TableModel Expr) every relationship of a variable-length path
+            must satisfy, evaluated during the path expansion, defaults to None
+        :type rel_filter: Any
+        :param node_filter: A predicate (a string or a TableModel Expr) every intermediate node of a variable-length
+            path must satisfy, evaluated during the path expansion, defaults to None
+        :type node_filter: Any
+        :param rel_projection: The relationship properties kept in the path (the others being dropped), defaults to
+            None
+        :type rel_projection: list
+        :param node_projection: The intermediate node properties kept in the path (the others being dropped), defaults
+            to None
+        :type node_projection: list
+        :param filter_variables: The variables naming the relationship and the intermediate node in the filters,
+            defaults to ('r', 'n')
+        :type filter_variables: tuple
         :param **kwargs: kwargs
         :type **kwargs
         
         :return: A Query object with a query that contains the new clause.
         :rtype: RelationAvailable
         """
-        return RelationAvailable(self.query + self._directed_relation('backward', labels, ref_name, properties, min_hops, max_hops, shortest, **kwargs))
+        return RelationAvailable(self.query + self._directed_relation('backward', labels, ref_name, properties, min_hops, max_hops, shortest, weight, rel_filter, node_filter, rel_projection, node_projection, filter_variables, **kwargs))
 
-    def _directed_relation(self, direction: str, labels: Union[str, List[str]], ref_name: str = None, properties: dict = {}, min_hops: int = 1, max_hops: int = 1, shortest: Union[bool, str] = False, **kwargs):
+    def _directed_relation(self, direction: str, labels: Union[str, List[str]], ref_name: str = None, properties: dict = {}, min_hops: int = 1, max_hops: int = 1, shortest: Union[bool, str] = False, weight: str = None, rel_filter: Any = None, node_filter: Any = None, rel_projection: list = None, node_projection: list = None, filter_variables: tuple = ('r', 'n'), **kwargs):
         """Concatenate a graph Relationship (private method).
         
         :param direction: The relationship direction, can one of 'forward', 'backward' - otherwise unidirectional
@@ -569,6 +860,24 @@ class Relation(Query):
         :param shortest: Whether to add the SHORTEST flag to a recursive relationship. Requires min_hops | max_hops.
             Can be True/'shortest' for SHORTEST, or 'all' for ALL SHORTEST, defaults to False
         :type shortest: Union[bool, str]
+        :param weight: The numeric relationship property to minimize for a weighted shortest path (WSHORTEST), combined
+            with shortest='all' for ALL WSHORTEST, defaults to None
+        :type weight: str
+        :param rel_filter: A predicate (a string or a TableModel Expr) every relationship of a variable-length path
+            must satisfy, evaluated during the path expansion, defaults to None
+        :type rel_filter: Any
+        :param node_filter: A predicate (a string or a TableModel Expr) every intermediate node of a variable-length
+            path must satisfy, evaluated during the path expansion, defaults to None
+        :type node_filter: Any
+        :param rel_projection: The relationship properties kept in the path (the others being dropped), defaults to
+            None
+        :type rel_projection: list
+        :param node_projection: The intermediate node properties kept in the path (the others being dropped), defaults
+            to None
+        :type node_projection: list
+        :param filter_variables: The variables naming the relationship and the intermediate node in the filters,
+            defaults to ('r', 'n')
+        :type filter_variables: tuple
         :param **kwargs: kwargs
         :type **kwargs
         
@@ -585,24 +894,50 @@ class Relation(Query):
         relation_ref_name = '' if ref_name is None else f'{ref_name}'
         relation_properties = f' {{{Properties(properties).to_str(**kwargs)}}}' if properties else ''
     
-        if min_hops == 1 and max_hops == 1:
+        if min_hops == 1 and max_hops == 1 and weight is None:
             relation_length = ''
         else:
+            if min_hops == 1 and max_hops == 1:
+                # A weighted shortest path is recursive even with the default hops, Kuzu then bounding it itself
+                relation_hops = ''
+            elif min_hops == max_hops:
+                relation_hops = min_hops_str if min_hops != -1 else ''
+            else:
+                relation_hops = f'{min_hops_str}..{max_hops_str}'
+    
             relation_length = '*'
-            if shortest and not (min_hops == 1 and max_hops == 1):
+            if weight is not None:
+                # The weight is the name of a numeric property of the relationship
+                relation_length += "ALL WSHORTEST" if shortest == 'all' else "WSHORTEST"
+                relation_length += f"({str(weight).split('.')[-1]}){' ' if relation_hops else ''}"
+            elif shortest:
                 if shortest == 'all':
                     relation_length += "ALL SHORTEST "
                 else:
                     relation_length += "SHORTEST "
+            relation_length += relation_hops
     
-            if min_hops == max_hops:
-                if min_hops != -1:
-                    relation_length += f'{min_hops_str}'
-            else:
-                relation_length += f'{min_hops_str}..{max_hops_str}'
+        relation_filter = ''
+        if rel_filter is not None or node_filter is not None or rel_projection is not None or node_projection is not None:
+            if not relation_length:
+                raise ValueError('Recursive pattern filters and projections need a variable-length relationship')
+            rel_variable, node_variable = filter_variables
+            # Predicates on every relationship and intermediate node, evaluated while expanding the paths
+            predicates = [predicate for predicate in (rel_filter, node_filter) if predicate is not None]
+            # Expressions are parenthesized when rendered, plain strings only need it when combined
+            predicates = [f'({predicate})' if isinstance(predicate, str) and len(predicates) > 1 else str(predicate)
+                          for predicate in predicates]
+            parts = [f'WHERE {" AND ".join(predicates)}'] if predicates else []
+            if rel_projection is not None or node_projection is not None:
+                projections = []
+                for variable, projection in ((rel_variable, rel_projection), (node_variable, node_projection)):
+                    names = [str(name) if '.' in str(name) else f'{variable}.{name}' for name in projection or []]
+                    projections.append(f'{{{", ".join(names)}}}')
+                parts.append(', '.join(projections))
+            relation_filter = f' ({rel_variable}, {node_variable} | {" | ".join(parts)})'
     
         if relation_ref_name or relation_type or relation_length or relation_properties:
-            relation_str = f'[{relation_ref_name}{relation_type}{relation_length}{relation_properties}]'
+            relation_str = f'[{relation_ref_name}{relation_type}{relation_length}{relation_filter}{relation_properties}]'
         else:
             relation_str = ''
     
@@ -616,7 +951,7 @@ class Relation(Query):
 class RelationAfterMerge(Query):
     """A class for representing a "RELATION AFTER MERGE" clause."""
 
-    def related(self, labels: Union[str, list[str]] = None, ref_name: str = None, properties: dict = None, min_hops: int = 1, max_hops: int = 1, shortest: Union[bool, str] = False, **kwargs):
+    def related(self, labels: Union[str, list[str]] = None, ref_name: str = None, properties: dict = None, min_hops: int = 1, max_hops: int = 1, shortest: Union[bool, str] = False, weight: str = None, rel_filter: Any = None, node_filter: Any = None, rel_projection: list = None, node_projection: list = None, filter_variables: tuple = ('r', 'n'), **kwargs):
         """Concatenate an undirectional (i.e. --) graph Relationship, which may be filtered.
         
         :param labels: The relationship labels(type or types) in the DB, defaults to None
@@ -633,15 +968,33 @@ class RelationAfterMerge(Query):
         :param shortest: Whether to add the SHORTEST flag to a recursive relationship. Requires min_hops | max_hops.
             Can be True/'shortest' for SHORTEST, or 'all' for ALL SHORTEST, defaults to False
         :type shortest: Union[bool, str]
+        :param weight: The numeric relationship property to minimize for a weighted shortest path (WSHORTEST), combined
+            with shortest='all' for ALL WSHORTEST, defaults to None
+        :type weight: str
+        :param rel_filter: A predicate (a string or a TableModel Expr) every relationship of a variable-length path
+            must satisfy, evaluated during the path expansion, defaults to None
+        :type rel_filter: Any
+        :param node_filter: A predicate (a string or a TableModel Expr) every intermediate node of a variable-length
+            path must satisfy, evaluated during the path expansion, defaults to None
+        :type node_filter: Any
+        :param rel_projection: The relationship properties kept in the path (the others being dropped), defaults to
+            None
+        :type rel_projection: list
+        :param node_projection: The intermediate node properties kept in the path (the others being dropped), defaults
+            to None
+        :type node_projection: list
+        :param filter_variables: The variables naming the relationship and the intermediate node in the filters,
+            defaults to ('r', 'n')
+        :type filter_variables: tuple
         :param **kwargs: kwargs
         :type **kwargs
         
         :return: A Query object with a query that contains the new clause.
         :rtype: RelationAfterMergeAvailable
         """
-        return RelationAvailable(self.query + self._directed_relation('none', labels, ref_name, properties, min_hops, max_hops, shortest, **kwargs))
+        return RelationAvailable(self.query + self._directed_relation('none', labels, ref_name, properties, min_hops, max_hops, shortest, weight, rel_filter, node_filter, rel_projection, node_projection, filter_variables, **kwargs))
 
-    def related_to(self, labels: Union[str, list[str]] = None, ref_name: str = None, properties: dict = {}, min_hops: int = 1, max_hops: int = 1, shortest: Union[bool, str] = False, **kwargs):
+    def related_to(self, labels: Union[str, list[str]] = None, ref_name: str = None, properties: dict = {}, min_hops: int = 1, max_hops: int = 1, shortest: Union[bool, str] = False, weight: str = None, rel_filter: Any = None, node_filter: Any = None, rel_projection: list = None, node_projection: list = None, filter_variables: tuple = ('r', 'n'), **kwargs):
         """Concatenate a forward (i.e. -->) graph Relationship, which may be filtered.
         
         :param labels: The relationship labels(type or types) in the DB, defaults to None
@@ -658,15 +1011,33 @@ class RelationAfterMerge(Query):
         :param shortest: Whether to add the SHORTEST flag to a recursive relationship. Requires min_hops | max_hops.
             Can be True/'shortest' for SHORTEST, or 'all' for ALL SHORTEST, defaults to False
         :type shortest: Union[bool, str]
+        :param weight: The numeric relationship property to minimize for a weighted shortest path (WSHORTEST), combined
+            with shortest='all' for ALL WSHORTEST, defaults to None
+        :type weight: str
+        :param rel_filter: A predicate (a string or a TableModel Expr) every relationship of a variable-length path
+            must satisfy, evaluated during the path expansion, defaults to None
+        :type rel_filter: Any
+        :param node_filter: A predicate (a string or a TableModel Expr) every intermediate node of a variable-length
+            path must satisfy, evaluated during the path expansion, defaults to None
+        :type node_filter: Any
+        :param rel_projection: The relationship properties kept in the path (the others being dropped), defaults to
+            None
+        :type rel_projection: list
+        :param node_projection: The intermediate node properties kept in the path (the others being dropped), defaults
+            to None
+        :type node_projection: list
+        :param filter_variables: The variables naming the relationship and the intermediate node in the filters,
+            defaults to ('r', 'n')
+        :type filter_variables: tuple
         :param **kwargs: kwargs
         :type **kwargs
         
         :return: A Query object with a query that contains the new clause.
         :rtype: RelationAfterMergeAvailable
         """
-        return RelationAvailable(self.query + self._directed_relation('forward', labels, ref_name, properties, min_hops, max_hops, shortest, **kwargs))
+        return RelationAvailable(self.query + self._directed_relation('forward', labels, ref_name, properties, min_hops, max_hops, shortest, weight, rel_filter, node_filter, rel_projection, node_projection, filter_variables, **kwargs))
 
-    def related_from(self, labels: Union[str, list[str]] = None, ref_name: str = None, properties: dict = {}, min_hops: int = 1, max_hops: int = 1, shortest: Union[bool, str] = False, **kwargs):
+    def related_from(self, labels: Union[str, list[str]] = None, ref_name: str = None, properties: dict = {}, min_hops: int = 1, max_hops: int = 1, shortest: Union[bool, str] = False, weight: str = None, rel_filter: Any = None, node_filter: Any = None, rel_projection: list = None, node_projection: list = None, filter_variables: tuple = ('r', 'n'), **kwargs):
         """Concatenate a backward (i.e. <--) graph Relationship, which may be filtered.
         
         :param labels: The relationship labels(type or types) in the DB, defaults to None
@@ -683,15 +1054,33 @@ class RelationAfterMerge(Query):
         :param shortest: Whether to add the SHORTEST flag to a recursive relationship. Requires min_hops | max_hops.
             Can be True/'shortest' for SHORTEST, or 'all' for ALL SHORTEST, defaults to False
         :type shortest: Union[bool, str]
+        :param weight: The numeric relationship property to minimize for a weighted shortest path (WSHORTEST), combined
+            with shortest='all' for ALL WSHORTEST, defaults to None
+        :type weight: str
+        :param rel_filter: A predicate (a string or a TableModel Expr) every relationship of a variable-length path
+            must satisfy, evaluated during the path expansion, defaults to None
+        :type rel_filter: Any
+        :param node_filter: A predicate (a string or a TableModel Expr) every intermediate node of a variable-length
+            path must satisfy, evaluated during the path expansion, defaults to None
+        :type node_filter: Any
+        :param rel_projection: The relationship properties kept in the path (the others being dropped), defaults to
+            None
+        :type rel_projection: list
+        :param node_projection: The intermediate node properties kept in the path (the others being dropped), defaults
+            to None
+        :type node_projection: list
+        :param filter_variables: The variables naming the relationship and the intermediate node in the filters,
+            defaults to ('r', 'n')
+        :type filter_variables: tuple
         :param **kwargs: kwargs
         :type **kwargs
         
         :return: A Query object with a query that contains the new clause.
         :rtype: RelationAfterMergeAvailable
         """
-        return RelationAvailable(self.query + self._directed_relation('backward', labels, ref_name, properties, min_hops, max_hops, shortest, **kwargs))
+        return RelationAvailable(self.query + self._directed_relation('backward', labels, ref_name, properties, min_hops, max_hops, shortest, weight, rel_filter, node_filter, rel_projection, node_projection, filter_variables, **kwargs))
 
-    def _directed_relation(self, direction: str, labels: Union[str, list[str]], ref_name: str = None, properties: dict = {}, min_hops: int = 1, max_hops: int = 1, shortest: Union[bool, str] = False, **kwargs):
+    def _directed_relation(self, direction: str, labels: Union[str, list[str]], ref_name: str = None, properties: dict = {}, min_hops: int = 1, max_hops: int = 1, shortest: Union[bool, str] = False, weight: str = None, rel_filter: Any = None, node_filter: Any = None, rel_projection: list = None, node_projection: list = None, filter_variables: tuple = ('r', 'n'), **kwargs):
         """Concatenate a graph Relationship (private method).
         
         :param direction: The relationship direction, can one of 'forward', 'backward' - otherwise unidirectional
@@ -710,6 +1099,24 @@ class RelationAfterMerge(Query):
         :param shortest: Whether to add the SHORTEST flag to a recursive relationship. Requires min_hops | max_hops.
             Can be True/'shortest' for SHORTEST, or 'all' for ALL SHORTEST, defaults to False
         :type shortest: Union[bool, str]
+        :param weight: The numeric relationship property to minimize for a weighted shortest path (WSHORTEST), combined
+            with shortest='all' for ALL WSHORTEST, defaults to None
+        :type weight: str
+        :param rel_filter: A predicate (a string or a TableModel Expr) every relationship of a variable-length path
+            must satisfy, evaluated during the path expansion, defaults to None
+        :type rel_filter: Any
+        :param node_filter: A predicate (a string or a TableModel Expr) every intermediate node of a variable-length
+            path must satisfy, evaluated during the path expansion, defaults to None
+        :type node_filter: Any
+        :param rel_projection: The relationship properties kept in the path (the others being dropped), defaults to
+            None
+        :type rel_projection: list
+        :param node_projection: The intermediate node properties kept in the path (the others being dropped), defaults
+            to None
+        :type node_projection: list
+        :param filter_variables: The variables naming the relationship and the intermediate node in the filters,
+            defaults to ('r', 'n')
+        :type filter_variables: tuple
         :param **kwargs: kwargs
         :type **kwargs
         
@@ -726,24 +1133,50 @@ class RelationAfterMerge(Query):
         relation_ref_name = '' if ref_name is None else f'{ref_name}'
         relation_properties = f' {{{Properties(properties).to_str(**kwargs)}}}' if properties else ''
     
-        if min_hops == 1 and max_hops == 1:
+        if min_hops == 1 and max_hops == 1 and weight is None:
             relation_length = ''
         else:
+            if min_hops == 1 and max_hops == 1:
+                # A weighted shortest path is recursive even with the default hops, Kuzu then bounding it itself
+                relation_hops = ''
+            elif min_hops == max_hops:
+                relation_hops = min_hops_str if min_hops != -1 else ''
+            else:
+                relation_hops = f'{min_hops_str}..{max_hops_str}'
+    
             relation_length = '*'
-            if shortest and not (min_hops == 1 and max_hops == 1):
+            if weight is not None:
+                # The weight is the name of a numeric property of the relationship
+                relation_length += "ALL WSHORTEST" if shortest == 'all' else "WSHORTEST"
+                relation_length += f"({str(weight).split('.')[-1]}){' ' if relation_hops else ''}"
+            elif shortest:
                 if shortest == 'all':
                     relation_length += "ALL SHORTEST "
                 else:
                     relation_length += "SHORTEST "
+            relation_length += relation_hops
     
-            if min_hops == max_hops:
-                if min_hops != -1:
-                    relation_length += f'{min_hops_str}'
-            else:
-                relation_length += f'{min_hops_str}..{max_hops_str}'
+        relation_filter = ''
+        if rel_filter is not None or node_filter is not None or rel_projection is not None or node_projection is not None:
+            if not relation_length:
+                raise ValueError('Recursive pattern filters and projections need a variable-length relationship')
+            rel_variable, node_variable = filter_variables
+            # Predicates on every relationship and intermediate node, evaluated while expanding the paths
+            predicates = [predicate for predicate in (rel_filter, node_filter) if predicate is not None]
+            # Expressions are parenthesized when rendered, plain strings only need it when combined
+            predicates = [f'({predicate})' if isinstance(predicate, str) and len(predicates) > 1 else str(predicate)
+                          for predicate in predicates]
+            parts = [f'WHERE {" AND ".join(predicates)}'] if predicates else []
+            if rel_projection is not None or node_projection is not None:
+                projections = []
+                for variable, projection in ((rel_variable, rel_projection), (node_variable, node_projection)):
+                    names = [str(name) if '.' in str(name) else f'{variable}.{name}' for name in projection or []]
+                    projections.append(f'{{{", ".join(names)}}}')
+                parts.append(', '.join(projections))
+            relation_filter = f' ({rel_variable}, {node_variable} | {" | ".join(parts)})'
     
         if relation_ref_name or relation_type or relation_length or relation_properties:
-            relation_str = f'[{relation_ref_name}{relation_type}{relation_length}{relation_properties}]'
+            relation_str = f'[{relation_ref_name}{relation_type}{relation_length}{relation_filter}{relation_properties}]'
         else:
             relation_str = ''
     
@@ -805,11 +1238,46 @@ class Return(Query):
     
         ret = ' RETURN ' + \
             ', '.join(
-                f'{mapping[0]} AS {mapping[1]}' if mapping[1] else mapping[0].replace(".", "_")
+                f'{mapping[0]} AS {mapping[1]}' if mapping[1] else str(mapping[0]).replace(".", "_")
                 for mapping in mappings)
     
         return ReturnAvailable(self.query + ret)
 
+    def return_aggregate(self, group_by: List[Any] = None, metrics: Dict[str, Any] = None):
+        """Concatenate a RETURN statement grouping rows by keys and aggregating them into metrics, e.g. RETURN n.city, sum(n.amount) AS total. Executed through cymple, the aggregated columns are converted to the types of the fields they come from.
+        
+        :param group_by: The grouping keys (fields or expressions), returned under their own name, e.g. [n.city],
+            defaults to None
+        :type group_by: List[Any]
+        :param metrics: The aggregate expressions of the table model to return, keyed by alias, e.g. {'total':
+            n.amount.sum(), 'orders': count_all()}, defaults to None
+        :type metrics: Dict[str, Any]
+        
+        :return: A Query object with a query that contains the new clause.
+        :rtype: ReturnAvailable
+        """
+        from .hydration import TypedText  # pylint: disable=C0415
+        from .table_model import contains_aggregate  # pylint: disable=C0415
+    
+        group_by = list(group_by or [])
+        metrics = dict(metrics or {})
+        if not metrics:
+            raise ValueError('An aggregation needs at least one metric')
+        for key in group_by:
+            if contains_aggregate(key):
+                raise ValueError(f'Cannot group by the aggregate {key}')
+        for alias, metric in metrics.items():
+            # The column types come from the expressions, a literal metric would return an untyped column
+            if not contains_aggregate(metric):
+                raise ValueError(f'The metric "{alias}" ({metric}) is not an aggregate expression')
+    
+        # Cypher groups by the returned expressions which are not aggregates
+        items = [str(key) for key in group_by] + [f'{metric} AS {alias}' for alias, metric in metrics.items()]
+        types = {str(key): getattr(key, '_type', None) for key in group_by}
+        types.update({alias: getattr(metric, '_type', None) for alias, metric in metrics.items()})
+    
+        return ReturnAvailable(TypedText(self.query + ' RETURN ' + ', '.join(items), types))
+
 class Set(Query):
     """A class for representing a "SET" clause."""
 
@@ -925,6 +1393,64 @@ class Unwind(Query):
         """
         return UnwindAvailable(self.query + f' UNWIND {variables}')
 
+class VectorIndex(Query):
+    """A class for representing a "VECTOR INDEX" clause."""
+
+    def create_vector_index(self, table: str, index_name: str, property_name: str, options: dict = None):
+        """Concatenate a CREATE_VECTOR_INDEX procedure, building an HNSW index on a vector property.
+        
+        :param table: The name of the indexed node table
+        :type table: str
+        :param index_name: The name of the index
+        :type index_name: str
+        :param property_name: The name of the indexed (fixed size float list) property
+        :type property_name: str
+        :param options: The index options, e.g. {'metric': 'cosine', 'efc': 200}, defaults to None
+        :type options: dict
+        
+        :return: A Query object with a query that contains the new clause.
+        :rtype: VectorIndexAvailable
+        """
+        procedure = self._index_procedure('CREATE_VECTOR_INDEX', [table, index_name, property_name], options=options)
+        return VectorIndexAvailable(self.query + procedure)
+
+    def query_vector_index(self, table: str, index_name: str, parameter: str = 'query_vector', k: int = 10, options: dict = None):
+        """Concatenate a QUERY_VECTOR_INDEX procedure, yielding the k nearest nodes and their distance.
+        
+        :param table: The name of the indexed node table
+        :type table: str
+        :param index_name: The name of the index
+        :type index_name: str
+        :param parameter: The name of the parameter holding the query vector, passed at execution time, defaults to
+            'query_vector'
+        :type parameter: str
+        :param k: The number of nearest nodes, or a parameter reference such as '$k', defaults to 10
+        :type k: int
+        :param options: The search options, e.g. {'efs': 100}, defaults to None
+        :type options: dict
+        
+        :return: A Query object with a query that contains the new clause.
+        :rtype: VectorIndexAvailable
+        """
+        if not isinstance(parameter, str):
+            raise TypeError('The query vector is passed at execution time, give the name of its parameter instead')
+        expressions = [f'${parameter.lstrip("$")}', k]
+        procedure = self._index_procedure('QUERY_VECTOR_INDEX', [table, index_name], expressions, options)
+        return VectorIndexAvailable(self.query + procedure)
+
+    def drop_vector_index(self, table: str, index_name: str):
+        """Concatenate a DROP_VECTOR_INDEX procedure.
+        
+        :param table: The name of the indexed node table
+        :type table: str
+        :param index_name: The name of the index
+        :type index_name: str
+        
+        :return: A Query object with a query that contains the new clause.
+        :rtype: VectorIndexAvailable
+        """
+        return VectorIndexAvailable(self.query + self._index_procedure('DROP_VECTOR_INDEX', [table, index_name]))
+
 class Where(Query):
     """A class for representing a "WHERE" clause."""
 
@@ -944,7 +1470,7 @@ class Where(Query):
         :return: A Query object with a query that contains the new clause.
         :rtype: WhereAvailable
         """
-        return self.where_multiple({name: value}, comparison_operator, **kwargs)
+        return self.where_multiple({str(name): value}, comparison_operator, **kwargs)
 
     def where_multiple(self, filters: dict, comparison_operator: str = "=", boolean_operator: str = ' AND ', **kwargs):
         """Concatenate a WHERE clause to the query, created from a list of given property filters.
@@ -1028,7 +1554,7 @@ class AlterAvailable(Table):
 class AndAvailable(Node, Path):
     """A class decorator declares a And is available in the current query."""
 
-class CallAvailable(Procedure):
+class CallAvailable(Procedure, VectorIndex, FtsIndex):
     """A class decorator declares a Call is available in the current query."""
 
 class CaseAvailable(QueryStartAvailable, Unwind, Where, Set, Remove, CaseWhen, Return, Limit, Skip, OrderBy, Union):
@@ -1046,6 +1572,9 @@ class DeleteAvailable(Return, CaseWhen, Union):
 class DropColumnAvailable(NewQuery):
     """A class decorator declares a DropColumn is available in the current query."""
 
+class FtsIndexAvailable(QueryStartAvailable, Yield, Where, Return, Union):
+    """A class decorator declares a FtsIndex is available in the current query."""
+
 class LimitAvailable(QueryStartAvailable, Unwind, Where, CaseWhen, Return, Set, Skip, Union):
     """A class decorator declares a Limit is available in the current query."""
 
@@ -1115,6 +1644,9 @@ class UnionAvailable(Call, Create, Delete, Match, Merge, Remove, Return, Set, Un
 class UnwindAvailable(QueryStartAvailable, Unwind, Return, Create, Remove):
     """A class decorator declares a Unwind is available in the current query."""
 
+class VectorIndexAvailable(QueryStartAvailable, Yield, Where, Return, Union):
+    """A class decorator declares a VectorIndex is available in the current query."""
+
 class WhereAvailable(Return, Delete, Where, Set, Remove, OperatorStart, QueryStartAvailable):
     """A class decorator declares a Where is available in the current query."""
 
@@ -1124,7 +1656,7 @@ class WithAvailable(QueryStartAvailable, Unwind, Where, Set, Remove, CaseWhen, R
 class YieldAvailable(QueryStartAvailable, Node, Where, Return):
     """A class decorator declares a Yield is available in the current query."""
 
-class AnyAvailable(AddColumn, Alter, And, Call, Case, CaseWhen, Create, Delete, DropColumn, Limit, Match, Merge, NewQuery, Node, NodeAfterMerge, OnCreate, OnMatch, OperatorEnd, OperatorStart, OrderBy, Path, Procedure, QueryStart, Relation, RelationAfterMerge, Remove, Return, Set, SetAfterMerge, Skip, Table, Union, Unwind, Where, With, Yield):
+class AnyAvailable(AddColumn, Alter, And, Call, Case, CaseWhen, Create, Delete, DropColumn, FtsIndex, Limit, Match, Merge, NewQuery, Node, NodeAfterMerge, OnCreate, OnMatch, OperatorEnd, OperatorStart, OrderBy, Path, Procedure, QueryStart, Relation, RelationAfterMerge, Remove, Return, Set, SetAfterMerge, Skip, Table, Union, Unwind, VectorIndex, Where, With, Yield):
     """A class decorator declares anything is available in the current query."""
 
 class QueryBuilder(QueryStartAvailable):
@@ -0,0 +1,283 @@
+"""Bulk writes: batches of rows sized adaptively from the observed latency, and large updates split in batches.
+
+A bulk write is a query unwinding a list parameter, executed once per batch of rows::
+
+    query = QueryBuilder().cypher('UNWIND $rows AS row').create().node('Person', 'p', {'id': 'row.id'},
+                                                                       escape=False)
+    BulkWriter(connection, query).write(rows)
+
+The number of rows per batch (thus per transaction) follows an AIMD (additive increase, multiplicative
+decrease) control loop: it grows by a fixed step while batches commit faster than a target latency, and is
+cut by a factor as soon as a batch is slower. The serialized size of a batch is capped as well.
+
+A large ``MATCH ... DELETE`` or ``MATCH ... SET`` is turned by ``execute_in_batches`` into a loop of bounded
+transactions, each one writing at most a batch of the matched rows, with progress reporting and checkpoints.
+"""
+import json
+import os
+import time
+from typing import Any, Callable, Dict, Iterable, List
+
+from .analysis import WRITE_KEYWORDS, append_predicate, join_clauses, split_clauses
+from .execution import run
+
+ROWS_PARAMETER = 'rows'
+KEY_COLUMN = '_batch_key'
+LAST_PARAMETER = '_cymple_last'
+SIZE_PARAMETER = '_cymple_size'
+
+
+def payload_size(row: Any) -> int:
+    """Estimate the size of a row once sent as a query parameter, in bytes."""
+    return len(json.dumps(row, default=str, separators=(',', ':')))
+
+
+class BulkWriter:
+    """Execute an UNWIND write query over an iterable of rows, in adaptively sized batches."""
+
+    def __init__(self, executor, query, initial_batch: int = 1000, min_batch: int = 1, max_batch: int = 100000,
+                 target_latency: float = 0.5, increase: int = None, decrease: float = 0.5,
+                 max_payload: int = 16 * 1024 * 1024, parameter: str = ROWS_PARAMETER,
+                 parameters: Dict[str, Any] = None):
+        """Initialize the writer.
+
+        :param executor: An object exposing ``execute(query, parameters)``, e.g. a ``kuzu.Connection``
+            or a ``WriteQueue``
+        :param query: The write query, unwinding the rows parameter (a built query or a string)
+        :param initial_batch: The number of rows of the first batch, defaults to 1000
+        :type initial_batch: int
+        :param min_batch: The lower bound of the batch size, defaults to 1
+        :type min_batch: int
+        :param max_batch: The upper bound of the batch size, defaults to 100000
+        :type max_batch: int
+        :param target_latency: The duration of a batch (in seconds) the batch size is tuned towards,
+            defaults to 0.5
+        :type target_latency: float
+        :param increase: The number of rows added to the batch size after a fast batch, defaults to None
+            (a tenth of the initial batch size)
+        :type increase: int
+        :param decrease: The factor the batch size is multiplied by after a slow batch, defaults to 0.5
+        :type decrease: float
+        :param max_payload: The maximal serialized size of the rows of a batch, in bytes, defaults to 16 MiB
+        :type max_payload: int
+        :param parameter: The name of the list parameter unwound by the query, defaults to "rows"
+        :type parameter: str
+        :param parameters: Extra parameters of the query, defaults to None
+        :type parameters: Dict[str, Any]
+        """
+        if not 0 < decrease < 1:
+            raise ValueError('The decrease factor must be between 0 and 1')
+        self.executor = executor
+        self.query = str(query)
+        self.min_batch = min_batch
+        self.max_batch = max_batch
+        self.batch_size = min(max(initial_batch, min_batch), max_batch)
+        self.target_latency = target_latency
+        self.increase = increase or max(initial_batch // 10, 1)
+        self.decrease = decrease
+        self.max_payload = max_payload
+        self.parameter = parameter
+        self.parameters = parameters or {}
+        self.batches = 0
+        self.rows = 0
+        self.payload = 0
+        self.capped_batches = 0
+        self.duration = 0.0
+        self.last_latency = None
+
+    def _adjust(self, size: int, latency: float):
+        if latency > self.target_latency:
+            self.batch_size = max(int(size * self.decrease), self.min_batch)
+        elif size >= self.batch_size:
+            # Only full batches prove that a larger batch would still be fast enough
+            self.batch_size = min(self.batch_size + self.increase, self.max_batch)
+
+    def execute_batch(self, rows: List[Any], size: int = None) -> List[Dict[str, Any]]:
+        """Execute the query on a single batch of rows and adjust the batch size to its latency.
+
+        :param rows: The rows of the batch
+        :type rows: List[Any]
+        :param size: The serialized size of the rows, defaults to None (computed)
+        :type size: int
+
+        :return: The rows returned by the query
+        :rtype: List[Dict[str, Any]]
+        """
+        start = time.perf_counter()
+        result = run(self.executor, self.query, {**self.parameters, self.parameter: rows})
+        latency = time.perf_counter() - start
+
+        self.batches += 1
+        self.rows += len(rows)
+        self.payload += sum(payload_size(row) for row in rows) if size is None else size
+        self.duration += latency
+        self.last_latency = latency
+        self._adjust(len(rows), latency)
+        return result
+
+    def batches_of(self, rows: Iterable[Any]) -> Iterable[tuple]:
+        """Split rows into batches of the current batch size, capped by the payload size.
+
+        The batch size is read again for every batch, so that it follows the adjustments made in between.
+
+        :return: A generator of (rows, serialized size) tuples
+        """
+        batch = []
+        size = 0
+        for row in rows:
+            row_size = payload_size(row)
+            if batch and size + row_size > self.max_payload:
+                self.capped_batches += 1
+                yield batch, size
+                batch, size = [], 0
+            batch.append(row)
+            size += row_size
+            if len(batch) >= self.batch_size:
+                yield batch, size
+                batch, size = [], 0
+        if batch:
+            yield batch, size
+
+    def write(self, rows: Iterable[Any]) -> Dict[str, Any]:
+        """Write every row, batch by batch.
+
+        :param rows: The rows, any iterable (consumed lazily)
+        :type rows: Iterable[Any]
+
+        :return: The metrics of the writer, see ``metrics``
+        :rtype: Dict[str, Any]
+        """
+        for batch, size in self.batches_of(rows):
+            self.execute_batch(batch, size)
+        return self.metrics
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        """The current batch size, the totals written and the throughput (rows per second spent in batches)."""
+        return {
+            'batch_size': self.batch_size,
+            'batches': self.batches,
+            'rows': self.rows,
+            'payload': self.payload,
+            'capped_batches': self.capped_batches,
+            'duration': self.duration,
+            'last_latency': self.last_latency,
+            'throughput': self.rows / self.duration if self.duration else 0.0,
+        }
+
+
+def batched_queries(query, key: str = None) -> tuple:
+    """Rewrite a MATCH ... DELETE/SET query into the queries writing a single batch of its rows.
+
+    With a key, batches are consecutive ranges of the values of the key: the next ``$_cymple_size`` distinct
+    values after ``$_cymple_last`` are selected, then every row matching one of them is written, so that rows
+    sharing a value of the key (e.g. several matched paths per node) are never split across batches::
+
+        MATCH ... WHERE ... AND key > $_cymple_last WITH DISTINCT key AS _batch_key ORDER BY _batch_key
+        LIMIT $_cymple_size MATCH ... WHERE ... AND key = _batch_key <writes>
+        WITH _batch_key, count(*) AS _batch_rows RETURN count(*) AS keys, sum(_batch_rows) AS rows,
+        max(_batch_key) AS last
+
+    Without a key, every batch writes the first ``$_cymple_size`` rows still matching, which only terminates
+    for deletes.
+
+    :param query: The write query (a built query or a string), without RETURN clause
+    :param key: The expression to batch on, e.g. 'n.id', defaults to None (LIMIT batches)
+    :type key: str
+
+    :return: The queries writing the first batch and the following ones
+    :rtype: tuple
+    """
+    clauses = split_clauses(query)
+    writes = next((index for index, clause in enumerate(clauses) if clause.keyword in WRITE_KEYWORDS), None)
+    if not writes:
+        raise ValueError('Batched writes need a query matching rows before writing them')
+    if any(clause.keyword == 'RETURN' for clause in clauses):
+        raise ValueError('Batched writes do not support queries with a RETURN clause')
+    deletes = any(clause.keyword in ('DELETE', 'DETACH DELETE') for clause in clauses[writes:])
+    if key is None and not deletes:
+        raise ValueError('Batched updates need a key, LIMIT batches would update the same rows forever')
+
+    match = join_clauses(clauses[:writes])
+    write = join_clauses(clauses[writes:])
+    if key is None:
+        batch = f'{match} WITH * LIMIT ${SIZE_PARAMETER} {write} RETURN count(*) AS rows'
+        return batch, batch
+
+    def batch(match: str) -> str:
+        return (f'{match} WITH DISTINCT {key} AS {KEY_COLUMN} ORDER BY {KEY_COLUMN} LIMIT ${SIZE_PARAMETER} '
+                f'{append_predicate(join_clauses(clauses[:writes]), f"{key} = {KEY_COLUMN}")} {write} '
+                f'WITH {KEY_COLUMN}, count(*) AS _batch_rows '
+                f'RETURN count(*) AS keys, sum(_batch_rows) AS rows, max({KEY_COLUMN}) AS last')
+
+    return batch(match), batch(append_predicate(match, f'{key} > ${LAST_PARAMETER}'))
+
+
+def _save(checkpoint: str, progress: Dict[str, Any]):
+    temporary = f'{checkpoint}.tmp'
+    with open(temporary, 'w', encoding='utf-8') as file:
+        json.dump(progress, file, default=str)
+    os.replace(temporary, checkpoint)
+
+
+def execute_in_batches(executor, query, batch_size: int = 10000, key: str = None, parameters: Dict[str, Any] = None,
+                       checkpoint: str = None, on_progress: Callable[[Dict[str, Any]], None] = None) -> Dict[str, Any]:
+    """Execute a large MATCH ... DELETE/SET query as a loop of batches, each one committed on its own.
+
+    When a checkpoint file is given, the progress is saved after every batch, and an interrupted run started
+    again with the same checkpoint resumes after the last committed batch (a batch committed right before
+    the interruption may be written twice, which is harmless for deletes and plain SETs). A checkpoint of a
+    completed run makes the call return immediately.
+
+    :param executor: An object exposing ``execute(query, parameters)``, e.g. a ``kuzu.Connection``
+    :param query: The write query (a built query or a string), without RETURN clause
+    :param batch_size: The maximal number of rows written per batch, or with a key of values of the key (all the
+        rows of a value being written in the same batch), defaults to 10000
+    :type batch_size: int
+    :param key: The expression to batch on, e.g. 'n.id', required for updates, defaults to None
+    :type key: str
+    :param parameters: The query parameters, defaults to None
+    :type parameters: Dict[str, Any]
+    :param checkpoint: The path of the JSON file the progress is saved to, defaults to None
+    :type checkpoint: str
+    :param on_progress: A callable receiving the progress after every batch, defaults to None
+    :type on_progress: Callable[[Dict[str, Any]], None]
+
+    :return: The report: rows written, batches, last key, duration, throughput (rows per second), done
+    :rtype: Dict[str, Any]
+    """
+    if batch_size <= 0:
+        raise ValueError('batch_size must be a positive integer')
+    parameters = parameters or {}
+    reserved = {LAST_PARAMETER, SIZE_PARAMETER} & set(parameters)
+    if reserved:
+        raise ValueError(f'Parameters reserved for batching: {", ".join(sorted(reserved))}')
+
+    first, following = batched_queries(query, key)
+    progress = {'rows': 0, 'batches': 0, 'last': None, 'duration': 0.0, 'done': False}
+    if checkpoint is not None and os.path.exists(checkpoint):
+        with open(checkpoint, encoding='utf-8') as file:
+            progress.update(json.load(file))
+
+    while not progress['done']:
+        batch_parameters = {**parameters, SIZE_PARAMETER: batch_size}
+        if progress['last'] is not None:
+            batch_parameters[LAST_PARAMETER] = progress['last']
+        start = time.perf_counter()
+        result = run(executor, first if progress['last'] is None else following, batch_parameters)[0]
+        progress['duration'] += time.perf_counter() - start
+
+        # Keyed batches are full when they hold batch_size values of the key, whatever their number of rows
+        progress['done'] = result.get('keys', result['rows']) < batch_size
+        if result['rows']:
+            progress['rows'] += int(result['rows'])
+            progress['batches'] += 1
+            progress['last'] = result.get('last')
+        progress['throughput'] = progress['rows'] / progress['duration'] if progress['duration'] else 0.0
+        if checkpoint is not None:
+            _save(checkpoint, progress)
+        if on_progress is not None:
+            on_progress(dict(progress))
+
+    progress['throughput'] = progress['rows'] / progress['duration'] if progress['duration'] else 0.0
+    return progress
@@ -0,0 +1,147 @@
+"""An in-process cache of query results, with LRU/TTL eviction and label-aware invalidation."""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List
+
+from .analysis import normalize_whitespace
+
+MISSING = object()
+
+
+def freeze(value: Any) -> Any:
+    """Convert a parameter value to a hashable equivalent."""
+    if isinstance(value, dict):
+        return tuple(sorted((key, freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    if isinstance(value, set):
+        return frozenset(freeze(item) for item in value)
+    try:
+        hash(value)
+    except TypeError:
+        return repr(value)
+    return value
+
+
+class ResultCache:
+    """A thread-safe cache of query results keyed by normalized query text and parameters.
+
+    Every entry records the labels its query reads, so that executing a write only evicts the entries
+    touching the labels it writes. Cached results are shared between callers and must not be mutated.
+
+    A read racing with a write could cache a result computed before the write once the write has invalidated
+    the cache. Every invalidation bumps the generation of the labels it evicts: the generation of the labels
+    of a read is taken before executing it, and its result is only cached if it did not change meanwhile.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = None, clock=time.monotonic):
+        """Initialize the cache.
+
+        :param max_entries: The maximal number of cached results, the least recently used is evicted first,
+            defaults to 1024
+        :type max_entries: int
+        :param ttl: The number of seconds a result stays valid, defaults to None (no expiration)
+        :type ttl: float
+        :param clock: A callable returning the current time in seconds, defaults to time.monotonic
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.stale = 0
+        self._invalidated = 0
+        self._invalidated_all = 0
+        self._label_generations: Dict[str, int] = {}
+
+    @staticmethod
+    def key(query, parameters: Dict[str, Any] = None) -> tuple:
+        """Compute the cache key of a query and its parameters."""
+        return normalize_whitespace(query), freeze(parameters or {})
+
+    def get(self, query, parameters: Dict[str, Any] = None) -> Any:
+        """Get the cached result of a query, or MISSING."""
+        key = self.key(query, parameters)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and self._clock() - entry[2] > self.ttl:
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def _generation(self, labels) -> tuple:
+        if labels is None:
+            # Any invalidation may concern a query reading unknown labels
+            return (self._invalidated,)
+        return (self._invalidated_all, *(self._label_generations.get(label, 0) for label in sorted(labels)))
+
+    def generation(self, labels: Iterable[str] = None) -> tuple:
+        """Get the generation of labels (None for unknown labels), to take before executing a query."""
+        labels = None if labels is None else frozenset(labels)
+        with self._lock:
+            return self._generation(labels)
+
+    def put(self, query, parameters: Dict[str, Any], result: List[Dict[str, Any]], labels: Iterable[str] = None,
+            generation: tuple = None):
+        """Cache the result of a query.
+
+        :param labels: The labels read by the query, None when unknown (any write evicts the entry)
+        :type labels: Iterable[str]
+        :param generation: The generation of the labels taken before executing the query, the result is dropped
+            if they were invalidated since, defaults to None (always cached)
+        :type generation: tuple
+        """
+        key = self.key(query, parameters)
+        labels = None if labels is None else frozenset(labels)
+        with self._lock:
+            if generation is not None and generation != self._generation(labels):
+                self.stale += 1
+                return
+            self._entries[key] = (result, labels, self._clock())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, labels: Iterable[str] = None):
+        """Evict the entries reading any of the given labels, or every entry if labels is None."""
+        with self._lock:
+            self._invalidated += 1
+            if labels is None:
+                self._invalidated_all += 1
+                keys = list(self._entries)
+            else:
+                labels = set(labels)
+                for label in labels:
+                    self._label_generations[label] = self._label_generations.get(label, 0) + 1
+                keys = [key for key, (_, read, _) in self._entries.items() if read is None or read & labels]
+            for key in keys:
+                del self._entries[key]
+            self.invalidations += len(keys)
+
+    def clear(self):
+        """Evict every entry, without counting invalidations."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """The cache counters."""
+        return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses,
+                'evictions': self.evictions, 'expirations': self.expirations, 'invalidations': self.invalidations,
+                'stale': self.stale}
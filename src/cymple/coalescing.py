@@ -0,0 +1,94 @@
+"""In-flight request coalescing ("single-flight"): concurrent identical calls share one execution."""
+import asyncio
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls sharing the same key into a single execution.
+
+    The first caller of a key executes the function, callers arriving while it is in flight wait for it
+    and receive its result (or its exception). Works both for threads (``do``) and for asyncio tasks
+    (``do_async``), each mode keeping track of its own in-flight calls.
+    """
+
+    def __init__(self):
+        """Initialize the single-flight group."""
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._tasks = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, function: Callable[[], Any]) -> Any:
+        """Call the function, unless a call with the same key is in flight, in which case wait for its result.
+
+        :param key: The key identifying identical calls
+        :type key: Hashable
+        :param function: A callable without arguments
+        :type function: Callable[[], Any]
+
+        :return: The result of the (possibly shared) call
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = function()
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result
+
+    async def do_async(self, key: Hashable, function: Callable[[], Any]) -> Any:
+        """Await the coroutine created by the function, unless a call with the same key is in flight.
+
+        :param key: The key identifying identical calls
+        :type key: Hashable
+        :param function: A callable without arguments returning an awaitable
+        :type function: Callable[[], Any]
+
+        :return: The result of the (possibly shared) call
+        """
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(function())
+            self._tasks[key] = task
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+            with self._lock:
+                self.executions += 1
+        else:
+            with self._lock:
+                self.coalesced += 1
+
+        # A cancelled waiter must not cancel the execution shared with the other waiters
+        return await asyncio.shield(task)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """The number of executions performed and of executions saved by coalescing."""
+        return {'executions': self.executions, 'coalesced': self.coalesced}
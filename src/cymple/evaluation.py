@@ -0,0 +1,337 @@
+"""Client-side evaluation of ``TableModel`` expressions over columns of values.
+
+The expression passed to ``where_literal`` can be applied to data already held locally (cached results,
+DataFrames, Arrow tables...) without a round trip::
+
+    n = Person('n')
+    adults = (n.age >= 18) & (n.name != 'Bob')
+    mask = adults.evaluate({'n.age': ages, 'n.name': names})
+    rows = adults.filter(cached_rows)
+
+An expression tree is compiled once into a function over column arrays. With NumPy (an optional dependency)
+installed the function is vectorized, otherwise it loops over plain Python lists. Columns are looked up by
+qualified field name ("n.age") first, then by bare name ("age"). Nulls follow Cypher's semantics in the
+Python backend (comparisons with null are null, null AND false is false). With NumPy, columns holding nulls
+are object arrays, evaluated element by element with the same semantics; missing values of float columns may
+also be NaN. ``$name`` parameters are taken from the parameters given along with the columns.
+"""
+import operator
+import re
+from typing import Any, Callable, Dict, List
+
+from .table_model import Expr, ExpressionMixin, Field, Function, Literal, Parameter, Unary
+
+BACKENDS = ('auto', 'numpy', 'python')
+
+
+def _numpy():
+    try:
+        import numpy  # pylint: disable=C0415
+    except ImportError:
+        return None
+    return numpy
+
+
+def _lookup(columns, names: List[str]):
+    for name in names:
+        try:
+            return columns[name]
+        except (KeyError, IndexError, TypeError):
+            continue
+    raise KeyError(f'No column named {" or ".join(repr(name) for name in names)}')
+
+
+def _literal(value: Any) -> tuple:
+    """Get whether an operand is a literal and its value: quoted strings are string literals, bare strings columns."""
+    if isinstance(value, Literal):
+        return True, value.value
+    if isinstance(value, str):
+        if len(value) >= 2 and value[0] == value[-1] == "'":
+            return True, value[1:-1]
+        return False, value
+    return True, value
+
+
+# Python backend: element-wise over lists, with Cypher's null propagation and three-valued logic
+
+def _null_safe(function: Callable) -> Callable:
+    return lambda left, right: None if left is None or right is None else function(left, right)
+
+
+def _divide(left, right):
+    if isinstance(left, int) and isinstance(right, int) and not isinstance(left, bool):
+        # Integer division truncates towards zero, as in Cypher
+        return int(left / right)
+    return left / right
+
+
+def _and(left, right):
+    if left is False or right is False:
+        return False
+    return None if left is None or right is None else bool(left and right)
+
+
+def _or(left, right):
+    if left is True or right is True:
+        return True
+    return None if left is None or right is None else bool(left or right)
+
+
+def _in(value, values):
+    if value is None:
+        return None
+    if value in values:
+        return True
+    return None if None in values else False
+
+
+def _null_propagating(function: Callable) -> Callable:
+    return lambda *arguments: None if any(argument is None for argument in arguments) else function(*arguments)
+
+
+PYTHON_OPERATORS = {
+    '+': _null_safe(operator.add),
+    '-': _null_safe(operator.sub),
+    '*': _null_safe(operator.mul),
+    '/': _null_safe(_divide),
+    '<': _null_safe(operator.lt),
+    '<=': _null_safe(operator.le),
+    '>': _null_safe(operator.gt),
+    '>=': _null_safe(operator.ge),
+    '=': _null_safe(operator.eq),
+    '<>': _null_safe(operator.ne),
+    'AND': _and,
+    'OR': _or,
+    'IN': _in,
+    'STARTS WITH': _null_safe(str.startswith),
+    'ENDS WITH': _null_safe(str.endswith),
+    'CONTAINS': _null_safe(lambda string, substring: substring in string),
+    '=~': _null_safe(lambda string, pattern: re.fullmatch(pattern, string) is not None),
+    'NOT': lambda value: None if value is None else not value,
+    'IS NULL': lambda value: value is None,
+    'IS NOT NULL': lambda value: value is not None,
+}
+
+PYTHON_FUNCTIONS = {
+    'lower': _null_propagating(str.lower),
+    'upper': _null_propagating(str.upper),
+    'trim': _null_propagating(str.strip),
+    'ltrim': _null_propagating(str.lstrip),
+    'rtrim': _null_propagating(str.rstrip),
+    'abs': _null_propagating(abs),
+    'size': _null_propagating(len),
+    'list_contains': _null_propagating(lambda values, value: value in values),
+    'coalesce': lambda *arguments: next((argument for argument in arguments if argument is not None), None),
+}
+
+
+def _python_apply(function: Callable, *arguments):
+    # Columns are lists, scalars (including list literals and parameters, kept as tuples) are broadcast
+    lengths = {len(argument) for argument in arguments if isinstance(argument, list)}
+    if not lengths:
+        return function(*arguments)
+    if len(lengths) > 1:
+        raise ValueError(f'Columns of different lengths: {", ".join(str(length) for length in sorted(lengths))}')
+    length = lengths.pop()
+    columns = [argument if isinstance(argument, list) else [argument] * length for argument in arguments]
+    return [function(*values) for values in zip(*columns)]
+
+
+# NumPy backend: vectorized over arrays
+
+def _numpy_column(numpy, values):
+    if isinstance(values, numpy.ndarray):
+        return values
+    values = list(values)
+    if any(isinstance(value, (list, tuple, dict)) for value in values):
+        # Lists (e.g. STRING[] properties) are kept as objects, not turned into a dimension of the array
+        column = numpy.empty(len(values), dtype=object)
+        column[:] = values
+        return column
+    return numpy.asarray(values)
+
+
+def _numpy_elementwise(numpy, function: Callable) -> Callable:
+    return lambda *arguments: numpy.frompyfunc(function, len(arguments), 1)(*arguments)
+
+
+def _numpy_strings(numpy, vectorized: Callable, function: Callable) -> Callable:
+    # numpy.char only handles string arrays, object arrays (e.g. with nulls) are evaluated element by element
+    def apply(string, *arguments):
+        string = numpy.asarray(string)
+        if string.dtype.kind in 'US':
+            return vectorized(string, *arguments)
+        return _numpy_elementwise(numpy, function)(string, *arguments)
+    return apply
+
+
+def _numpy_null_safe(numpy, vectorized: Callable, function: Callable) -> Callable:
+    # Object arrays (e.g. columns holding nulls) are evaluated element by element, with Cypher's null semantics
+    def apply(*arguments):
+        if any(isinstance(argument, numpy.ndarray) and argument.dtype.kind == 'O' for argument in arguments):
+            return _numpy_elementwise(numpy, function)(*arguments)
+        return vectorized(*arguments)
+    return apply
+
+
+def _numpy_operators(numpy) -> Dict[str, Callable]:
+    def add(left, right):
+        if any(numpy.asarray(value).dtype.kind in 'US' for value in (left, right)):
+            return numpy.char.add(numpy.asarray(left, dtype=str), numpy.asarray(right, dtype=str))
+        return numpy.add(left, right)
+
+    def divide(left, right):
+        quotient = numpy.true_divide(left, right)
+        if all(numpy.asarray(value).dtype.kind in 'iu' for value in (left, right)):
+            return numpy.trunc(quotient).astype(numpy.int64)
+        return quotient
+
+    def is_null(value):
+        value = numpy.asarray(value)
+        if value.dtype.kind == 'f':
+            return numpy.isnan(value)
+        if value.dtype.kind == 'O':
+            return numpy.equal(value, None)
+        return numpy.zeros(value.shape, dtype=bool)
+
+    def matches(string, pattern):
+        return _numpy_elementwise(numpy, PYTHON_OPERATORS['=~'])(string, pattern).astype(bool)
+
+    def is_in(value, values):
+        values = list(values)
+        if isinstance(value, numpy.ndarray) and value.dtype.kind == 'O':
+            return _numpy_elementwise(numpy, lambda item: _in(item, values))(value)
+        found = numpy.isin(value, [item for item in values if item is not None])
+        nulls = is_null(value)
+        if None not in values and not nulls.any():
+            return found
+        # A null value, or a value missing from a list holding a null, is null
+        result = numpy.where(found, True, None if None in values else False).astype(object)
+        result[nulls] = None
+        return result
+
+    vectorized = {
+        '+': add,
+        '-': numpy.subtract,
+        '*': numpy.multiply,
+        '/': divide,
+        '<': numpy.less,
+        '<=': numpy.less_equal,
+        '>': numpy.greater,
+        '>=': numpy.greater_equal,
+        '=': numpy.equal,
+        '<>': numpy.not_equal,
+        'AND': numpy.logical_and,
+        'OR': numpy.logical_or,
+        '=~': matches,
+        'NOT': numpy.logical_not,
+    }
+    operators = {name: _numpy_null_safe(numpy, function, PYTHON_OPERATORS[name])
+                 for name, function in vectorized.items()}
+    operators.update({
+        'IN': is_in,
+        'STARTS WITH': _numpy_strings(numpy, numpy.char.startswith, PYTHON_OPERATORS['STARTS WITH']),
+        'ENDS WITH': _numpy_strings(numpy, numpy.char.endswith, PYTHON_OPERATORS['ENDS WITH']),
+        'CONTAINS': _numpy_strings(numpy, lambda string, substring: numpy.char.find(string, substring) >= 0,
+                                   PYTHON_OPERATORS['CONTAINS']),
+        'IS NULL': is_null,
+        'IS NOT NULL': lambda value: numpy.logical_not(is_null(value)),
+    })
+    return operators
+
+
+def _numpy_functions(numpy) -> Dict[str, Callable]:
+    functions = {name: _numpy_elementwise(numpy, function) for name, function in PYTHON_FUNCTIONS.items()}
+    for name, vectorized in (('lower', numpy.char.lower), ('upper', numpy.char.upper), ('trim', numpy.char.strip),
+                             ('ltrim', numpy.char.lstrip), ('rtrim', numpy.char.rstrip)):
+        functions[name] = _numpy_strings(numpy, vectorized, PYTHON_FUNCTIONS[name])
+    functions['abs'] = numpy.abs
+    return functions
+
+
+class _Compiler:
+    def __init__(self, backend: str, numpy):
+        self.backend = backend
+        self.numpy = numpy
+        if backend == 'numpy':
+            self.operators = _numpy_operators(numpy)
+            self.functions = _numpy_functions(numpy)
+        else:
+            self.operators = PYTHON_OPERATORS
+            self.functions = PYTHON_FUNCTIONS
+
+    def _apply(self, function: Callable, operands: List[Callable]) -> Callable:
+        if self.backend == 'numpy':
+            return lambda columns, parameters: function(*(operand(columns, parameters) for operand in operands))
+        return lambda columns, parameters: _python_apply(function, *(operand(columns, parameters)
+                                                                     for operand in operands))
+
+    def _function(self, table: Dict[str, Callable], name: str, kind: str) -> Callable:
+        try:
+            return table[name]
+        except KeyError:
+            raise ValueError(f'Cannot evaluate the {kind} "{name}" client-side') from None
+
+    def _scalar(self, value):
+        # Python lists are columns, list values are kept as tuples to be broadcast like any other scalar
+        return tuple(value) if self.backend == 'python' and isinstance(value, list) else value
+
+    def _parameter(self, name: str) -> Callable:
+        def get(columns, parameters):
+            try:
+                return self._scalar(parameters[name])
+            except KeyError:
+                raise KeyError(f'No value given for the parameter ${name}') from None
+        return get
+
+    def compile(self, node) -> Callable:
+        if isinstance(node, Expr):
+            function = self._function(self.operators, node.op, 'operator')
+            return self._apply(function, [self.compile(node.left), self.compile(node.right)])
+        if isinstance(node, Unary):
+            return self._apply(self._function(self.operators, node.op, 'operator'), [self.compile(node.operand)])
+        if isinstance(node, Function):
+            function = self._function(self.functions, node.name.lower(), 'function')
+            return self._apply(function, [self.compile(argument) for argument in node.arguments])
+        if isinstance(node, Parameter):
+            return self._parameter(node.name)
+        if isinstance(node, Field):
+            names = [str(node), node._name] if node._alias else [node._name]
+        elif isinstance(node, ExpressionMixin):
+            raise TypeError(f'Cannot evaluate {node} client-side')
+        else:
+            literal, value = _literal(node)
+            if literal:
+                value = self._scalar(value)
+                return lambda columns, parameters: value
+            names = [value, value.split('.')[-1]] if '.' in value else [value]
+
+        if self.backend == 'numpy':
+            return lambda columns, parameters: _numpy_column(self.numpy, _lookup(columns, names))
+        return lambda columns, parameters: list(_lookup(columns, names))
+
+
+def compile_expression(expression: ExpressionMixin, backend: str = 'auto') -> Callable[..., Any]:
+    """Compile an expression into a function of the columns, returning an array (NumPy) or a list (Python).
+
+    :param expression: The expression, e.g. ``(n.age > 18) & n.name.is_in(param('names'))``
+    :type expression: ExpressionMixin
+    :param backend: "numpy", "python", or "auto" (NumPy when installed), defaults to "auto"
+    :type backend: str
+
+    :return: The compiled function, taking a mapping of column names to sequences (a dict, a DataFrame...) and
+        optionally the values of the query parameters
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f'Unknown backend "{backend}", expected one of {", ".join(BACKENDS)}')
+    numpy = _numpy() if backend != 'python' else None
+    if backend == 'numpy' and numpy is None:
+        raise ImportError('The numpy backend requires NumPy, install it with "pip install numpy"')
+    compiled = _Compiler('numpy' if numpy is not None else 'python', numpy).compile(expression)
+    return lambda columns, parameters=None: compiled(columns, parameters or {})
+
+
+def rows_to_columns(rows: List[Dict[str, Any]]) -> Dict[str, list]:
+    """Transpose rows (e.g. the results of a query) into columns keyed by column name."""
+    keys = {key: None for row in rows for key in row}
+    return {key: [row.get(key) for row in rows] for key in keys}
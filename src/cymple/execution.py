@@ -0,0 +1,161 @@
+"""Helpers for executing Cymple queries on a Kuzu connection.
+
+Kuzu is an optional dependency: anything exposing an ``execute(query, parameters)`` method
+(e.g. a ``kuzu.Connection``) can be used as an executor.
+"""
+import queue
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from functools import partial
+from typing import Any, Dict, List
+
+from .hooks import hooks
+from .hydration import column_types, hydrate
+from .plan import Plan
+
+
+def fetch_rows(result) -> List[Dict[str, Any]]:
+    """Drain a Kuzu query result into a list of rows, each row being a dict of column name to value.
+
+    :param result: A ``kuzu.QueryResult`` (or an already decoded list of rows)
+
+    :return: The list of rows
+    :rtype: List[Dict[str, Any]]
+    """
+    if isinstance(result, list):
+        return result
+
+    columns = result.get_column_names()
+    rows = []
+    while result.has_next():
+        rows.append(dict(zip(columns, result.get_next())))
+
+    return rows
+
+
+class Executor(ABC):
+    """Base class of the executors delegating to connections, whose ``execute`` returns decoded rows.
+
+    Queries run through ``run`` on an executor are instrumented once, by the connection-level ``run`` call
+    the executor eventually makes.
+    """
+
+    @abstractmethod
+    def execute(self, query, parameters: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+        """Execute a query and return its rows."""
+
+
+def shape_result(query, rows: List[Dict[str, Any]]) -> Any:
+    """Convert the rows of a query to the result its terminal method promises.
+
+    Queries ending with ``.explain()`` or ``.profile()`` return a ``Plan``, with ``.count()`` the number of rows,
+    with ``.exists()`` a bool, with ``.first()`` the first row (None when there is none), other queries their rows.
+    The rows of queries knowing the types of their columns (see ``return_aggregate``) are hydrated first.
+
+    :param query: The executed query (a built query or a string)
+    :param rows: The rows returned by Kuzu
+    :type rows: List[Dict[str, Any]]
+    """
+    types = column_types(query)
+    if types:
+        rows = hydrate(rows, types)
+    shape = getattr(query, 'result_shape', None)
+    if shape is None:
+        return rows
+    if shape in ('explain', 'profile'):
+        return Plan.parse(next(iter(rows[0].values())), profiled=shape == 'profile')
+    if shape == 'count':
+        return next(iter(rows[0].values())) if rows else 0
+    if shape == 'exists':
+        return bool(rows)
+    if shape == 'first':
+        return rows[0] if rows else None
+    raise ValueError(f'Unknown result shape "{shape}"')
+
+
+def _timings(result) -> tuple:
+    """Get the compiling and execution times (in seconds) Kuzu reports for a query result."""
+    try:
+        return result.get_compiling_time() / 1000, result.get_execution_time() / 1000
+    except AttributeError:
+        return None, None
+
+
+def run(executor, query, parameters: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+    """Execute a query and return its decoded rows.
+
+    :param executor: An object exposing ``execute(query, parameters)``, e.g. a ``kuzu.Connection``
+    :param query: The query to execute (a built query or a string)
+    :param parameters: The query parameters, defaults to None
+    :type parameters: Dict[str, Any]
+
+    :return: The list of rows (or the result promised by the terminal method of the query, see ``shape_result``)
+    :rtype: List[Dict[str, Any]]
+    """
+    built = query
+    query = str(query)
+    parameters = parameters or {}
+
+    if isinstance(executor, Executor):
+        return shape_result(built, executor.execute(query, parameters))
+
+    if not hooks:
+        return shape_result(built, fetch_rows(executor.execute(query, parameters)))
+
+    hooks.emit('execution_started', query=query, parameters=parameters)
+    start = time.perf_counter()
+    try:
+        result = executor.execute(query, parameters)
+        compiling_time, execution_time = _timings(result)
+        rows = fetch_rows(result)
+    except Exception as error:
+        hooks.emit('execution_failed', query=query, parameters=parameters, error=error,
+                   latency=time.perf_counter() - start)
+        raise
+
+    hooks.emit('execution_finished', query=query, parameters=parameters, rows=len(rows),
+               latency=time.perf_counter() - start, compiling_time=compiling_time, execution_time=execution_time)
+    return shape_result(built, rows)
+
+
+class ConnectionPool(Executor):
+    """A fixed-size pool of Kuzu connections to a single database, safe to share between threads.
+
+    The pool itself is an executor: ``execute`` borrows a connection, runs the query and returns
+    its decoded rows, so results never outlive the connection they were produced on.
+    """
+
+    def __init__(self, database=None, size: int = 4, connection_factory=None):
+        """Initialize the pool.
+
+        :param database: A ``kuzu.Database``, used when no connection factory is given, defaults to None
+        :param size: The number of connections in the pool, defaults to 4
+        :type size: int
+        :param connection_factory: A callable creating a new connection, defaults to None
+        """
+        if size <= 0:
+            raise ValueError('The pool size must be a positive integer')
+
+        if connection_factory is None:
+            import kuzu  # pylint: disable=C0415
+            connection_factory = partial(kuzu.Connection, database)
+
+        self.size = size
+        self._connections = queue.Queue()
+        for _ in range(size):
+            self._connections.put(connection_factory())
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection from the pool, for the duration of a with block."""
+        connection = self._connections.get()
+        try:
+            yield connection
+        finally:
+            self._connections.put(connection)
+
+    def execute(self, query, parameters: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+        """Execute a query on a pooled connection and return its decoded rows."""
+        with self.connection() as connection:
+            return run(connection, query, parameters)
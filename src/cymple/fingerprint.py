@@ -0,0 +1,116 @@
+"""Query fingerprinting: reduce a rendered query to its shape.
+
+Cymple inlines property values in the queries it builds, so queries of the same type rarely share the
+same text. A fingerprint strips the literals (strings, numbers, booleans) and collapses literal lists,
+while keeping the parameters, labels, property keys and clause structure, so that the latency of the
+queries of a same shape can be aggregated. ``parameterize`` goes one step further and turns the literals into
+parameters, so that queries of a same shape share the same text.
+"""
+import hashlib
+import re
+from typing import Any, Dict, List, Tuple
+
+from .analysis import normalize_whitespace
+
+PLACEHOLDER = '?'
+
+_NUMBER = re.compile(r'\d+(?:\.\d+)?(?:[eE][+-]?\d+)?')
+_BOOLEAN = re.compile(r'(?:true|false)\b', re.IGNORECASE)
+_LITERAL_LIST = re.compile(r'\[\s*\?(?:\s*,\s*\?)*\s*\]')
+_ESCAPES = {'n': '\n', 'r': '\r', 't': '\t'}
+
+
+def _literal_spans(query: str) -> List[tuple]:
+    """Find the (start, end) spans of the literals of a query, in order of appearance."""
+    spans = []
+    index = 0
+    while index < len(query):
+        char = query[index]
+        previous = query[index - 1] if index > 0 else ''
+        if char in '"\'':
+            end = index + 1
+            while end < len(query) and query[end] != char:
+                end += 2 if query[end] == '\\' else 1
+            spans.append((index, end + 1))
+            index = end + 1
+        elif char == '`':
+            # Escaped names are identifiers, not literals
+            index = query.find('`', index + 1) + 1 or len(query)
+        elif previous.isalnum() or previous in '_$.':
+            index += 1
+        elif char.isdigit():
+            end = _NUMBER.match(query, index).end()
+            # Bounds of variable-length relationships ("*1..3") belong to the pattern, not to the values
+            if not query[:index].rstrip().endswith(('*', '..')):
+                spans.append((index, end))
+            index = end
+        elif _BOOLEAN.match(query, index):
+            end = _BOOLEAN.match(query, index).end()
+            spans.append((index, end))
+            index = end
+        else:
+            index += 1
+    return spans
+
+
+def fingerprint(query) -> str:
+    """Compute the shape of a query.
+
+    :param query: The query (a built query or a string)
+
+    :return: The query with whitespace normalized, literals replaced by "?" and literal lists collapsed to "[?]"
+    :rtype: str
+    """
+    query = normalize_whitespace(query)
+    parts = []
+    position = 0
+    for start, end in _literal_spans(query):
+        parts.append(query[position:start])
+        parts.append(PLACEHOLDER)
+        position = end
+    parts.append(query[position:])
+    return _LITERAL_LIST.sub(f'[{PLACEHOLDER}]', ''.join(parts))
+
+
+def fingerprint_id(query) -> str:
+    """Compute a short, stable identifier of the shape of a query.
+
+    :param query: The query (a built query or a string)
+
+    :return: 16 hexadecimal characters
+    :rtype: str
+    """
+    return hashlib.blake2b(fingerprint(query).encode(), digest_size=8).hexdigest()
+
+
+def _literal_value(literal: str) -> Any:
+    if literal[0] in '"\'':
+        # Undo the escaping of Properties._escape (and Cypher's \n, \r, \t)
+        return re.sub(r'\\(.)', lambda match: _ESCAPES.get(match.group(1), match.group(1)), literal[1:-1])
+    if _BOOLEAN.fullmatch(literal):
+        return literal.lower() == 'true'
+    return float(literal) if any(char in literal for char in '.eE') else int(literal)
+
+
+def parameterize(query, prefix: str = '_p') -> Tuple[str, Dict[str, Any]]:
+    """Replace the literals of a query with parameters, e.g. ``{id: 3}`` with ``{id: $_p0}``.
+
+    :param query: The query (a built query or a string)
+    :param prefix: The prefix of the names of the parameters, numbered in order of appearance, defaults to "_p"
+    :type prefix: str
+
+    :return: The parameterized query, with whitespace normalized, and the values of its new parameters
+    :rtype: Tuple[str, Dict[str, Any]]
+    """
+    query = normalize_whitespace(query)
+    parts = []
+    values = {}
+    position = 0
+    for start, end in _literal_spans(query):
+        name = f'{prefix}{len(values)}'
+        parts.append(query[position:start])
+        parts.append(f'${name}')
+        values[name] = _literal_value(query[start:end])
+        position = end
+    parts.append(query[position:])
+    return ''.join(parts), values
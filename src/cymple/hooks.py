@@ -0,0 +1,195 @@
+"""Instrumentation hooks for the build, render and execute phases.
+
+Observers subscribe to the module-level ``hooks`` registry and receive the events they implement a
+method for. When no observer is subscribed, instrumented code paths only pay for a truthiness check.
+
+An observer raising an exception is logged and skipped, it never fails the instrumented code.
+
+Events (and their keyword arguments):
+
+- ``clause_appended(clause, size)``: a clause method of the builder returned a new query
+- ``properties_formatted(size, duration)``: a ``Properties`` dict was formatted to Cypher
+- ``query_rendered(query, size, duration)``: a query was rendered to a string (once per built query)
+- ``execution_started(query, parameters)``
+- ``execution_finished(query, parameters, rows, latency, compiling_time, execution_time)``: durations are
+  in seconds, the compiling/execution times being the ones reported by Kuzu (None when unavailable)
+- ``execution_failed(query, parameters, error, latency)``
+"""
+import logging
+import threading
+from collections import Counter
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+class Observer:
+    """Base class of the hook observers, every event is ignored unless overridden."""
+
+    def on_clause_appended(self, clause: str, size: int):
+        """Handle a clause appended to a query."""
+
+    def on_properties_formatted(self, size: int, duration: float):
+        """Handle properties formatted to Cypher."""
+
+    def on_query_rendered(self, query: str, size: int, duration: float):
+        """Handle a query rendered to a string."""
+
+    def on_execution_started(self, query: str, parameters: Dict[str, Any]):
+        """Handle the start of a query execution."""
+
+    def on_execution_finished(self, query: str, parameters: Dict[str, Any], rows: int, latency: float,
+                              compiling_time: float, execution_time: float):
+        """Handle a successful query execution."""
+
+    def on_execution_failed(self, query: str, parameters: Dict[str, Any], error: Exception, latency: float):
+        """Handle a failed query execution."""
+
+
+class HookRegistry:
+    """The registry of subscribed observers."""
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self.observers: List[Observer] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, observer: Observer) -> Observer:
+        """Subscribe an observer to every event, returning it."""
+        with self._lock:
+            # Copy on write: emitters iterate over the list without locking
+            self.observers = self.observers + [observer]
+        return observer
+
+    def unsubscribe(self, observer: Observer):
+        """Unsubscribe a previously subscribed observer."""
+        with self._lock:
+            self.observers = [subscribed for subscribed in self.observers if subscribed is not observer]
+
+    def emit(self, event: str, **payload):
+        """Notify every observer of an event, logging the exceptions raised by observers."""
+        for observer in self.observers:
+            try:
+                getattr(observer, f'on_{event}')(**payload)
+            except Exception:  # pylint: disable=W0703
+                logger.exception('Observer %r failed to handle the %s event', observer, event)
+
+    def __bool__(self) -> bool:
+        return bool(self.observers)
+
+
+hooks = HookRegistry()
+
+
+class MetricsCollector(Observer):
+    """An in-memory collector aggregating the events into counters and total durations."""
+
+    def __init__(self):
+        """Initialize the collector with zeroed metrics."""
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Zero every metric."""
+        with self._lock:
+            self.clauses = Counter()
+            self.properties_formatted = 0
+            self.properties_time = 0.0
+            self.queries_rendered = 0
+            self.rendered_bytes = 0
+            self.render_time = 0.0
+            self.executions = 0
+            self.errors = 0
+            self.rows = 0
+            self.latency = 0.0
+            self.compiling_time = 0.0
+            self.execution_time = 0.0
+
+    def on_clause_appended(self, clause: str, size: int):
+        with self._lock:
+            self.clauses[clause] += 1
+
+    def on_properties_formatted(self, size: int, duration: float):
+        with self._lock:
+            self.properties_formatted += 1
+            self.properties_time += duration
+
+    def on_query_rendered(self, query: str, size: int, duration: float):
+        with self._lock:
+            self.queries_rendered += 1
+            self.rendered_bytes += size
+            self.render_time += duration
+
+    def on_execution_finished(self, query: str, parameters: Dict[str, Any], rows: int, latency: float,
+                              compiling_time: float, execution_time: float):
+        with self._lock:
+            self.executions += 1
+            self.rows += rows
+            self.latency += latency
+            self.compiling_time += compiling_time or 0.0
+            self.execution_time += execution_time or 0.0
+
+    def on_execution_failed(self, query: str, parameters: Dict[str, Any], error: Exception, latency: float):
+        with self._lock:
+            self.errors += 1
+            self.latency += latency
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get a copy of the current metrics."""
+        with self._lock:
+            return {
+                'clauses': dict(self.clauses),
+                'properties_formatted': self.properties_formatted,
+                'properties_time': self.properties_time,
+                'queries_rendered': self.queries_rendered,
+                'rendered_bytes': self.rendered_bytes,
+                'render_time': self.render_time,
+                'executions': self.executions,
+                'errors': self.errors,
+                'rows': self.rows,
+                'latency': self.latency,
+                'compiling_time': self.compiling_time,
+                'execution_time': self.execution_time,
+            }
+
+
+class LoggingObserver(Observer):
+    """An adapter forwarding the execution events (and optionally the build events) to a ``logging`` logger."""
+
+    def __init__(self, logger: logging.Logger = None, level: int = logging.DEBUG, build_events: bool = False):
+        """Initialize the adapter.
+
+        :param logger: The logger to use, defaults to the "cymple" logger
+        :type logger: logging.Logger
+        :param level: The level of the successful events, failures being logged as errors, defaults to DEBUG
+        :type level: int
+        :param build_events: Also log clause appended / properties formatted / query rendered events,
+            defaults to False
+        :type build_events: bool
+        """
+        self.logger = logger or logging.getLogger('cymple')
+        self.level = level
+        self.build_events = build_events
+
+    def on_clause_appended(self, clause: str, size: int):
+        if self.build_events:
+            self.logger.log(self.level, 'Clause appended: %s (%d chars)', clause, size)
+
+    def on_properties_formatted(self, size: int, duration: float):
+        if self.build_events:
+            self.logger.log(self.level, 'Properties formatted: %d properties in %.6fs', size, duration)
+
+    def on_query_rendered(self, query: str, size: int, duration: float):
+        if self.build_events:
+            self.logger.log(self.level, 'Query rendered: %d chars in %.6fs', size, duration)
+
+    def on_execution_started(self, query: str, parameters: Dict[str, Any]):
+        self.logger.log(self.level, 'Executing: %s', query)
+
+    def on_execution_finished(self, query: str, parameters: Dict[str, Any], rows: int, latency: float,
+                              compiling_time: float, execution_time: float):
+        self.logger.log(self.level, 'Executed in %.6fs (compiling: %s, execution: %s), %d rows: %s',
+                        latency, compiling_time, execution_time, rows, query)
+
+    def on_execution_failed(self, query: str, parameters: Dict[str, Any], error: Exception, latency: float):
+        self.logger.error('Execution failed after %.6fs: %s: %s', latency, error, query)
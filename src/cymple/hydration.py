@@ -0,0 +1,85 @@
+"""Typed results: the values of returned columns converted to the Python types of the expressions they come from.
+
+Kuzu widens some aggregates (e.g. the sum of an INT32 property is an INT128, decoded as a ``Decimal``), so the
+rows of an aggregation do not always hold the type of the aggregated field. A query built with
+``return_aggregate`` knows the type of every column it returns, and rows returned through cymple
+(``execution.run``, a ``Session``, a ``ConnectionPool``...) are hydrated to those types::
+
+    n = Order('n')
+    query = QueryBuilder().match().node(Order, n) \\
+        .return_aggregate(group_by=[n.city], metrics={'total': n.amount.sum(), 'orders': n.id.count()}) \\
+        .order_by('total', ascending=False).limit(10)
+    rows = run(connection, query)  # [{'n.city': 'Paris', 'total': 1200, 'orders': 3}, ...]
+
+The column types are carried by the text of the query, so they survive the clauses chained after the RETURN,
+including raw ``cypher`` clauses and queries joined with ``+``.
+"""
+import typing
+from typing import Any, Dict, List, Optional
+
+
+class TypedText(str):
+    """The text of a query, along with the Python types of the columns it returns."""
+
+    def __new__(cls, text: str, column_types: Dict[str, Any]):
+        typed = super().__new__(cls, text)
+        typed.column_types = dict(column_types)
+        return typed
+
+    def __add__(self, other):
+        return TypedText(str(self) + other, self.column_types)
+
+    def __radd__(self, other):
+        return TypedText(other + str(self), self.column_types)
+
+    def strip(self, chars=None):
+        return TypedText(str(self).strip(chars), self.column_types)
+
+
+def column_types(query) -> Optional[Dict[str, Any]]:
+    """Get the types of the columns a query returns, None when they are unknown (e.g. a literal RETURN)."""
+    return getattr(getattr(query, 'query', query), 'column_types', None)
+
+
+def hydrate_value(value: Any, type_: Any) -> Any:
+    """Convert a returned value to a type, e.g. ``int`` or ``List[float]`` (lists being converted item by item).
+
+    Nulls, values of unknown type (None) and values already of the type are returned as they are.
+    """
+    if value is None or type_ is None:
+        return value
+    origin = typing.get_origin(type_) or type_
+    if not isinstance(origin, type):
+        return value
+    if origin is list and isinstance(value, list):
+        arguments = typing.get_args(type_)
+        return [hydrate_value(item, arguments[0]) for item in value] if arguments else value
+    if isinstance(value, origin):
+        return value
+    return origin(value)
+
+
+def hydrate(rows: List[Dict[str, Any]], types: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Convert the values of the rows to the types of their columns, other columns being left as they are.
+
+    :param rows: The rows returned by Kuzu
+    :type rows: List[Dict[str, Any]]
+    :param types: The Python type of the returned columns, keyed by column name
+    :type types: Dict[str, Any]
+
+    :return: The hydrated rows
+    :rtype: List[Dict[str, Any]]
+    """
+    if not types:
+        return rows
+    hydrated = []
+    for row in rows:
+        row = dict(row)
+        for column, type_ in types.items():
+            if column in row:
+                try:
+                    row[column] = hydrate_value(row[column], type_)
+                except (TypeError, ValueError) as error:
+                    raise TypeError(f'Cannot convert the column "{column}" ({row[column]!r}) to {type_}') from error
+        hydrated.append(row)
+    return hydrated
@@ -74,11 +74,14 @@ def _render_clause(declaration: dict):
                 def_lines = inspect.getsourcelines(method_overload)[0]
                 overload = ''
                 flag = False
+                signature = False
                 for line in def_lines:
                     if flag:
                         overload += line
-                    elif line.strip().startswith(f'def {method_name}'):
-                        flag = True
+                    elif signature or line.strip().startswith(f'def {method_name}'):
+                        # The signature may be wrapped, the body starts after its closing line
+                        signature = not line.rstrip().endswith(':')
+                        flag = not signature
 
                 overload = overload.replace('\n', '\n    ')
 
@@ -138,7 +141,9 @@ def render_builder_code():
     clauses_output += '# pylint: disable=R0901\n'
     clauses_output += '# pylint: disable=R0903\n'
     clauses_output += '# pylint: disable=W0102\n'
+    clauses_output += 'import time\n'
     clauses_output += 'from typing import List, Union, Dict, Any\n'
+    clauses_output += 'from .hooks import hooks\n'
     clauses_output += 'from .typedefs import Mapping, Properties\n\n'
     clauses_output += inspect.getsource(query_class) + '\n\n'
 
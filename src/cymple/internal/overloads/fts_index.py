@@ -0,0 +1,20 @@
+def create_fts_index(self, table: str, index_name: str, properties: str | list[str], options: dict = None):
+    if not isinstance(properties, list):
+        properties = [properties]
+    property_list = f'[{", ".join(Properties._format_value(name, True) for name in properties)}]'
+    procedure = self._index_procedure('CREATE_FTS_INDEX', [table, index_name], [property_list], options)
+    return FtsIndexAvailable(self.query + procedure)
+
+
+def query_fts_index(self, table: str, index_name: str, parameter: str = 'query', options: dict = None):
+    if not isinstance(parameter, str):
+        raise TypeError('The search terms are passed at execution time, give the name of their parameter instead')
+    procedure = self._index_procedure('QUERY_FTS_INDEX', [table, index_name], [f'${parameter.lstrip("$")}'], options)
+    return FtsIndexAvailable(self.query + procedure)
+
+
+def drop_fts_index(self, table: str, index_name: str):
+    return FtsIndexAvailable(self.query + self._index_procedure('DROP_FTS_INDEX', [table, index_name]))
+
+
+__all__ = ['create_fts_index', 'query_fts_index', 'drop_fts_index']
@@ -1,19 +1,19 @@
 from typing import Union
 
 
-def related(self, labels: str | list[str], ref_name: str = None, properties: dict = {}, min_hops: int = 1, max_hops: int = 1, shortest: Union[bool, str] = False, **kwargs):
-    return RelationAvailable(self.query + self._directed_relation('none', labels, ref_name, properties, min_hops, max_hops, shortest, **kwargs))
+def related(self, labels: str | list[str], ref_name: str = None, properties: dict = {}, min_hops: int = 1, max_hops: int = 1, shortest: Union[bool, str] = False, weight: str = None, rel_filter=None, node_filter=None, rel_projection: list = None, node_projection: list = None, filter_variables: tuple = ('r', 'n'), **kwargs):
+    return RelationAvailable(self.query + self._directed_relation('none', labels, ref_name, properties, min_hops, max_hops, shortest, weight, rel_filter, node_filter, rel_projection, node_projection, filter_variables, **kwargs))
 
 
-def related_to(self, labels: str | list[str], ref_name: str = None, properties: str = {}, min_hops: int = 1, max_hops: int = 1, shortest: Union[bool, str] = False, **kwargs):
-    return RelationAvailable(self.query + self._directed_relation('forward', labels, ref_name, properties, min_hops, max_hops, shortest, **kwargs))
+def related_to(self, labels: str | list[str], ref_name: str = None, properties: str = {}, min_hops: int = 1, max_hops: int = 1, shortest: Union[bool, str] = False, weight: str = None, rel_filter=None, node_filter=None, rel_projection: list = None, node_projection: list = None, filter_variables: tuple = ('r', 'n'), **kwargs):
+    return RelationAvailable(self.query + self._directed_relation('forward', labels, ref_name, properties, min_hops, max_hops, shortest, weight, rel_filter, node_filter, rel_projection, node_projection, filter_variables, **kwargs))
 
 
-def related_from(self, labels: str | list[str], ref_name: str = None, properties: str = {}, min_hops: int = 1, max_hops: int = 1, shortest: Union[bool, str] = False, **kwargs):
-    return RelationAvailable(self.query + self._directed_relation('backward', labels, ref_name, properties, min_hops, max_hops, shortest, **kwargs))
+def related_from(self, labels: str | list[str], ref_name: str = None, properties: str = {}, min_hops: int = 1, max_hops: int = 1, shortest: Union[bool, str] = False, weight: str = None, rel_filter=None, node_filter=None, rel_projection: list = None, node_projection: list = None, filter_variables: tuple = ('r', 'n'), **kwargs):
+    return RelationAvailable(self.query + self._directed_relation('backward', labels, ref_name, properties, min_hops, max_hops, shortest, weight, rel_filter, node_filter, rel_projection, node_projection, filter_variables, **kwargs))
 
 
-def _directed_relation(self, direction: str, labels: str | list[str], ref_name: str = None, properties: str = {}, min_hops: int = 1, max_hops: int = 1, shortest: Union[bool, str] = False, **kwargs):
+def _directed_relation(self, direction: str, labels: str | list[str], ref_name: str = None, properties: str = {}, min_hops: int = 1, max_hops: int = 1, shortest: Union[bool, str] = False, weight: str = None, rel_filter=None, node_filter=None, rel_projection: list = None, node_projection: list = None, filter_variables: tuple = ('r', 'n'), **kwargs):
     min_hops_str = '' if min_hops == -1 else str(min_hops)
     max_hops_str = '' if max_hops == -1 else str(max_hops)
 
@@ -24,24 +24,50 @@ def _directed_relation(self, direction: str, labels: str | list[str], ref_name:
     relation_ref_name = '' if ref_name is None else f'{ref_name}'
     relation_properties = f' {{{Properties(properties).to_str(**kwargs)}}}' if properties else ''
 
-    if min_hops == 1 and max_hops == 1:
+    if min_hops == 1 and max_hops == 1 and weight is None:
         relation_length = ''
     else:
+        if min_hops == 1 and max_hops == 1:
+            # A weighted shortest path is recursive even with the default hops, Kuzu then bounding it itself
+            relation_hops = ''
+        elif min_hops == max_hops:
+            relation_hops = min_hops_str if min_hops != -1 else ''
+        else:
+            relation_hops = f'{min_hops_str}..{max_hops_str}'
+
         relation_length = '*'
-        if shortest and not (min_hops == 1 and max_hops == 1):
+        if weight is not None:
+            # The weight is the name of a numeric property of the relationship
+            relation_length += "ALL WSHORTEST" if shortest == 'all' else "WSHORTEST"
+            relation_length += f"({str(weight).split('.')[-1]}){' ' if relation_hops else ''}"
+        elif shortest:
             if shortest == 'all':
                 relation_length += "ALL SHORTEST "
             else:
                 relation_length += "SHORTEST "
-
-        if min_hops == max_hops:
-            if min_hops != -1:
-                relation_length += f'{min_hops_str}'
-        else:
-            relation_length += f'{min_hops_str}..{max_hops_str}'
+        relation_length += relation_hops
+
+    relation_filter = ''
+    if rel_filter is not None or node_filter is not None or rel_projection is not None or node_projection is not None:
+        if not relation_length:
+            raise ValueError('Recursive pattern filters and projections need a variable-length relationship')
+        rel_variable, node_variable = filter_variables
+        # Predicates on every relationship and intermediate node, evaluated while expanding the paths
+        predicates = [predicate for predicate in (rel_filter, node_filter) if predicate is not None]
+        # Expressions are parenthesized when rendered, plain strings only need it when combined
+        predicates = [f'({predicate})' if isinstance(predicate, str) and len(predicates) > 1 else str(predicate)
+                      for predicate in predicates]
+        parts = [f'WHERE {" AND ".join(predicates)}'] if predicates else []
+        if rel_projection is not None or node_projection is not None:
+            projections = []
+            for variable, projection in ((rel_variable, rel_projection), (node_variable, node_projection)):
+                names = [str(name) if '.' in str(name) else f'{variable}.{name}' for name in projection or []]
+                projections.append(f'{{{", ".join(names)}}}')
+            parts.append(', '.join(projections))
+        relation_filter = f' ({rel_variable}, {node_variable} | {" | ".join(parts)})'
 
     if relation_ref_name or relation_type or relation_length or relation_properties:
-        relation_str = f'[{relation_ref_name}{relation_type}{relation_length}{relation_properties}]'
+        relation_str = f'[{relation_ref_name}{relation_type}{relation_length}{relation_filter}{relation_properties}]'
     else:
         relation_str = ''
 
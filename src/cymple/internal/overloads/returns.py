@@ -14,7 +14,31 @@ def return_mapping(self, mappings):
 
     ret = ' RETURN ' + \
         ', '.join(
-            f'{mapping[0]} AS {mapping[1]}' if mapping[1] else mapping[0].replace(".", "_")
+            f'{mapping[0]} AS {mapping[1]}' if mapping[1] else str(mapping[0]).replace(".", "_")
             for mapping in mappings)
 
     return ReturnAvailable(self.query + ret)
+
+
+def return_aggregate(self, group_by=None, metrics=None):
+    from .hydration import TypedText  # pylint: disable=C0415
+    from .table_model import contains_aggregate  # pylint: disable=C0415
+
+    group_by = list(group_by or [])
+    metrics = dict(metrics or {})
+    if not metrics:
+        raise ValueError('An aggregation needs at least one metric')
+    for key in group_by:
+        if contains_aggregate(key):
+            raise ValueError(f'Cannot group by the aggregate {key}')
+    for alias, metric in metrics.items():
+        # The column types come from the expressions, a literal metric would return an untyped column
+        if not contains_aggregate(metric):
+            raise ValueError(f'The metric "{alias}" ({metric}) is not an aggregate expression')
+
+    # Cypher groups by the returned expressions which are not aggregates
+    items = [str(key) for key in group_by] + [f'{metric} AS {alias}' for alias, metric in metrics.items()]
+    types = {str(key): getattr(key, '_type', None) for key in group_by}
+    types.update({alias: getattr(metric, '_type', None) for alias, metric in metrics.items()})
+
+    return ReturnAvailable(TypedText(self.query + ' RETURN ' + ', '.join(items), types))
@@ -0,0 +1,19 @@
+def create_vector_index(self, table: str, index_name: str, property_name: str, options: dict = None):
+    procedure = self._index_procedure('CREATE_VECTOR_INDEX', [table, index_name, property_name], options=options)
+    return VectorIndexAvailable(self.query + procedure)
+
+
+def query_vector_index(self, table: str, index_name: str, parameter: str = 'query_vector', k: int = 10,
+                       options: dict = None):
+    if not isinstance(parameter, str):
+        raise TypeError('The query vector is passed at execution time, give the name of its parameter instead')
+    expressions = [f'${parameter.lstrip("$")}', k]
+    procedure = self._index_procedure('QUERY_VECTOR_INDEX', [table, index_name], expressions, options)
+    return VectorIndexAvailable(self.query + procedure)
+
+
+def drop_vector_index(self, table: str, index_name: str):
+    return VectorIndexAvailable(self.query + self._index_procedure('DROP_VECTOR_INDEX', [table, index_name]))
+
+
+__all__ = ['create_vector_index', 'query_vector_index', 'drop_vector_index']
@@ -11,4 +11,4 @@ def where_multiple(self, filters: dict, comparison_operator: str = '=', boolean_
     return WhereAvailable(self.query + filt)
 
 def where(self, name: str, comparison_operator: str, value: Any, **kwargs):
-    return self.where_multiple({name: value}, comparison_operator, **kwargs)
+    return self.where_multiple({str(name): value}, comparison_operator, **kwargs)
@@ -4,10 +4,22 @@ class Query():
     def __init__(self, query):
         """Initialize the query object."""
         self.query = query
+        if hooks:
+            hooks.emit('clause_appended', clause=type(self).__name__.replace('Available', ''), size=len(query))
 
     def __str__(self) -> str:
         """Implement the str() operator for the query builder."""
-        return self.query.strip()
+        if not hooks:
+            return self.query.strip()
+
+        start = time.perf_counter()
+        query = self.query.strip()
+        duration = time.perf_counter() - start
+        # The query text is built clause by clause, observers are notified once per rendered text
+        if self.__dict__.get('_rendered') is not self.query:
+            self._rendered = self.query
+            hooks.emit('query_rendered', query=query, size=len(query), duration=duration)
+        return query
 
     def __add__(self, other):
         """Implement the + operator for the query builder."""
@@ -25,3 +37,168 @@ class Query():
     def cypher(self, cypher_query_str):
         """Concatenate a cypher query string"""
         return AnyAvailable(self.query.strip() + ' ' + cypher_query_str.strip())
+
+    def explain(self):
+        """Prefix the query with EXPLAIN, to get the plan Kuzu would execute.
+
+        Executed through cymple (``execution.run``, a ``Session``, a ``ConnectionPool``...), the query returns
+        a ``Plan`` instead of rows.
+
+        :return: The EXPLAIN query
+        :rtype: Query
+        """
+        return self._with_plan('explain')
+
+    def profile(self):
+        """Prefix the query with PROFILE, to execute it and get its plan with per-operator measurements.
+
+        Executed through cymple (``execution.run``, a ``Session``, a ``ConnectionPool``...), the query returns
+        a ``Plan`` instead of rows.
+
+        :return: The PROFILE query
+        :rtype: Query
+        """
+        return self._with_plan('profile')
+
+    def _with_plan(self, keyword: str):
+        query = Query(keyword.upper() + ' ' + self.query.strip())
+        query.result_shape = keyword
+        return query
+
+    def count(self):
+        """Rewrite the query to count the rows it returns (``RETURN count(*)``) instead of fetching them.
+
+        The WHERE and WITH clauses are kept; a RETURN with DISTINCT, aggregations, SKIP or LIMIT becomes a WITH
+        so that the same rows are counted. Executed through cymple, the query returns an int.
+
+        :return: The counting query
+        :rtype: Query
+        """
+        from .analysis import count_query
+        return self._with_shape(count_query(self.query), 'count')
+
+    def exists(self):
+        """Rewrite the query to check whether it returns any row (``RETURN true LIMIT 1``).
+
+        Executed through cymple, the query returns a bool.
+
+        :return: The existence query
+        :rtype: Query
+        """
+        from .analysis import exists_query
+        return self._with_shape(exists_query(self.query), 'exists')
+
+    def first(self):
+        """Limit the query to its first row (``LIMIT 1``), keeping its ORDER BY and SKIP.
+
+        Executed through cymple, the query returns the first row as a dict, or None when there is no row.
+
+        :return: The limited query
+        :rtype: Query
+        """
+        from .analysis import first_query
+        from .hydration import TypedText, column_types
+        query = first_query(self.query)
+        types = column_types(self)
+        return self._with_shape(TypedText(query, types) if types else query, 'first')
+
+    def _with_shape(self, query: str, shape: str):
+        query = Query(query)
+        query.result_shape = shape
+        return query
+
+    @staticmethod
+    def _index_procedure(procedure: str, arguments: list, expressions: list = None, options: dict = None):
+        rendered = [str(Properties._format_value(argument, True)) for argument in arguments]
+        rendered += [str(expression) for expression in expressions or []]
+        if options:
+            rendered.append(Properties(options).to_str(':='))
+        return f' {procedure}({", ".join(rendered)})'
+
+    def materialize(self, executor, name: str, key: str = None, parameters: dict = None, column_types: dict = None):
+        """Persist the results of this read query in a node table, created if needed and filled right away.
+
+        :param executor: A ``kuzu.Connection`` or a ``ConnectionPool``
+        :param name: The name of the node table
+        :type name: str
+        :param key: The returned column used as primary key, defaults to None (a SERIAL "row_id" column)
+        :type key: str
+        :param parameters: The query parameters, defaults to None
+        :type parameters: dict
+        :param column_types: The Kuzu type of every column, defaults to None (the types Kuzu reports)
+        :type column_types: dict
+
+        :return: The view, to refresh the table on demand (``refresh``) or on a schedule (``schedule``)
+        :rtype: MaterializedView
+        """
+        from .materialized import MaterializedView
+        view = MaterializedView(executor, name, self, key, parameters, column_types).create()
+        view.refresh()
+        return view
+
+    def paginate(self, executor, key, page_size: int, descending: bool = False, parameters: dict = None):
+        """Iterate over the query results page by page, using keyset pagination instead of SKIP/LIMIT.
+
+        The query is rewritten to "WHERE key > $last ORDER BY key LIMIT $size", with the last key of each page
+        being tracked between pages. The key must be unique, rows tying with the last row of a page would be
+        skipped: paginate on a composite key ending with a unique tiebreaker, e.g. ['n.score', 'n.id']. Duplicate
+        keys, within a page or across a page boundary, raise a ValueError.
+
+        :param executor: An object exposing ``execute(query, parameters)``, e.g. a ``kuzu.Connection``
+        :param key: The unique expression (or list of expressions, for a composite key) to paginate on, e.g. 'n.id'
+        :type key: Union[str, List[str]]
+        :param page_size: The maximal number of rows in a page
+        :type page_size: int
+        :param descending: Iterate in descending key order, defaults to False
+        :type descending: bool
+        :param parameters: Extra parameters of the query, defaults to None
+        :type parameters: dict
+
+        :return: A generator of pages, each page being a list of rows
+        """
+        from .pagination import keyset_pages
+        return keyset_pages(executor, self, key, page_size, descending, parameters)
+
+    def execute_in_batches(self, executor, batch_size: int = 10000, key: str = None, parameters: dict = None,
+                           checkpoint: str = None, on_progress=None):
+        """Execute this MATCH ... DELETE/SET query as a loop of bounded batches, each one committed on its own.
+
+        :param executor: An object exposing ``execute(query, parameters)``, e.g. a ``kuzu.Connection``
+        :param batch_size: The maximal number of rows written per batch, or with a key of values of the key,
+            defaults to 10000
+        :type batch_size: int
+        :param key: The expression to batch on, e.g. 'n.id', required for updates, defaults to None (LIMIT batches)
+        :type key: str
+        :param parameters: The query parameters, defaults to None
+        :type parameters: dict
+        :param checkpoint: The path of the JSON file used to resume an interrupted run, defaults to None
+        :type checkpoint: str
+        :param on_progress: A callable receiving the progress after every batch, defaults to None
+
+        :return: The report: rows written, batches, last key, duration, throughput, done
+        """
+        from .bulk import execute_in_batches
+        return execute_in_batches(executor, self, batch_size, key, parameters, checkpoint, on_progress)
+
+    def execute_partitioned(self, pool, key: str, partitions: int = 4, method: str = 'hash', bounds: list = None,
+                            parameters: dict = None, preserve_order: bool = True):
+        """Execute this read query as disjoint partitions running concurrently on pooled connections.
+
+        :param pool: A ``ConnectionPool`` (or any thread-safe executor exposing ``execute(query, parameters)``)
+        :param key: The expression to partition on, e.g. 'f.id'
+        :type key: str
+        :param partitions: The number of partitions, defaults to 4
+        :type partitions: int
+        :param method: 'hash', 'modulo' or 'range', defaults to 'hash'
+        :type method: str
+        :param bounds: The split points of a 'range' partitioning, defaults to None
+        :type bounds: list
+        :param parameters: The query parameters, defaults to None
+        :type parameters: dict
+        :param preserve_order: K-way merge the partitions according to the query ORDER BY, defaults to True
+        :type preserve_order: bool
+
+        :return: The merged rows
+        """
+        from .partitioning import execute_partitioned
+        return execute_partitioned(pool, self, key, partitions, method, bounds, parameters, preserve_order)
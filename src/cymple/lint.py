@@ -0,0 +1,286 @@
+"""A static performance linter for built queries.
+
+The linter reports the constructs which make a query slow by construction, each with a severity and a
+suggested fix:
+
+- ``unbounded-path``: a variable-length relationship without an upper bound (``*1..`` or ``*``)
+- ``cartesian-product``: patterns of a MATCH (e.g. joined with ``and_()``) sharing no variable
+- ``return-whole-entity``: returning whole nodes or relationships (e.g. ``return_literal('n')``)
+- ``deep-skip``: SKIP based paging
+- ``inline-list``: huge literal lists inlined in the query
+
+It runs on single queries (``lint``), on every query rendered while importing modules (``lint_modules``,
+``python -m cymple lint``) or while running tests (the ``cymple.pytest_plugin`` pytest plugin).
+"""
+import importlib
+import importlib.util
+import os
+import re
+import sys
+from collections import namedtuple
+from typing import Dict, Iterable, List
+
+from .analysis import PATTERN_KEYWORDS, projection_items, split_clauses, split_top_level
+from .hooks import Observer, hooks
+
+INFO = 'info'
+WARNING = 'warning'
+ERROR = 'error'
+SEVERITIES = (INFO, WARNING, ERROR)
+
+Finding = namedtuple('Finding', ['rule', 'severity', 'message', 'suggestion'])
+
+# The hops of a variable-length relationship, followed by its end, properties, or recursive filter/projection
+_UNBOUNDED_PATH = re.compile(r'\*\s*(?:(?:ALL\s+)?W?SHORTEST\s*(?:\([^)]*\)\s*)?(?!\())?(\d*)(\.\.)?\s*(?=[\]{(])',
+                             re.IGNORECASE)
+_PATTERN_VARIABLE = re.compile(r'[(\[]\s*([A-Za-z_]\w*)\s*(?=[:)\]{*|])')
+_REFERENCED_VARIABLE = re.compile(r'(?<![\w.$])([A-Za-z_]\w*)\b(?!\s*\()')
+_INTEGER = re.compile(r'\d+')
+
+
+def _severity_rank(severity: str) -> int:
+    return SEVERITIES.index(severity)
+
+
+def _unbounded_paths(clauses) -> List[Finding]:
+    findings = []
+    for clause in clauses:
+        if clause.keyword not in PATTERN_KEYWORDS:
+            continue
+        for match in _UNBOUNDED_PATH.finditer(clause.body):
+            if match.group(1) and not match.group(2):
+                # "*3" is a fixed length
+                continue
+            findings.append(Finding(
+                'unbounded-path', ERROR,
+                f'Variable-length relationship without an upper bound: "{match.group().strip()}"',
+                'Give the relation a max_hops, e.g. related(min_hops=1, max_hops=3)'))
+    return findings
+
+
+def _pattern_variables(pattern: str) -> set:
+    return set(_PATTERN_VARIABLE.findall(pattern))
+
+
+def _merge_components(components: List[set], variables: set) -> List[set]:
+    """Merge the components sharing a variable with the given ones into a single component."""
+    merged = set(variables)
+    remaining = []
+    for component in components:
+        if component & variables:
+            merged |= component
+        else:
+            remaining.append(component)
+    return remaining + [merged]
+
+
+def _cartesian_products(clauses) -> List[Finding]:
+    findings = []
+    bound = set()
+    for index, clause in enumerate(clauses):
+        if clause.keyword in ('MATCH', 'OPTIONAL MATCH'):
+            # The variables bound by the previous clauses form a component the new patterns can connect to
+            components = [set(bound)] if bound else []
+            known = bound | _pattern_variables(clause.body)
+            for pattern in split_top_level(clause.body):
+                # A pattern also connects to the variables its property values reference, e.g. {id: row.id}
+                referenced = set(_REFERENCED_VARIABLE.findall(pattern)) & known
+                components = _merge_components(components, _pattern_variables(pattern) | referenced)
+            if len(components) > 1 and index + 1 < len(clauses) and clauses[index + 1].keyword == 'WHERE':
+                # Predicates referencing several components are join conditions
+                for predicate in split_top_level(clauses[index + 1].body, ' AND '):
+                    referenced = set(_REFERENCED_VARIABLE.findall(predicate)) & known
+                    if sum(bool(component & referenced) for component in components) > 1:
+                        components = _merge_components(components, referenced)
+            if len(components) > 1:
+                findings.append(Finding(
+                    'cartesian-product', WARNING,
+                    f'Disconnected patterns in "{clause.keyword} {clause.body}" are joined as a cartesian product',
+                    'Connect the patterns with a relation, or join them with a predicate in the following WHERE'))
+            bound |= _pattern_variables(clause.body)
+        elif clause.keyword in PATTERN_KEYWORDS:
+            bound |= _pattern_variables(clause.body)
+        elif clause.keyword in ('UNWIND', 'YIELD'):
+            projected = clause.body.split(' AS ')[-1] if clause.keyword == 'UNWIND' else clause.body
+            bound |= {column for _, column in projection_items(projected)}
+        elif clause.keyword == 'WITH':
+            bound = {column for _, column in projection_items(clause.body)}
+    return findings
+
+
+def _whole_entities(clauses) -> List[Finding]:
+    returns = [clause for clause in clauses if clause.keyword == 'RETURN']
+    if not returns:
+        return []
+
+    entities = set()
+    for clause in clauses:
+        if clause.keyword in PATTERN_KEYWORDS:
+            entities |= _pattern_variables(clause.body)
+
+    findings = []
+    for expression, _ in projection_items(returns[-1].body):
+        if expression == '*' or expression in entities:
+            findings.append(Finding(
+                'return-whole-entity', INFO,
+                f'"RETURN {expression}" fetches every property of the matched entities',
+                'Return only the needed properties, e.g. return_mapping([("n.id", "id"), ("n.name", "name")])'))
+    return findings
+
+
+def _deep_skips(clauses, max_skip: int) -> List[Finding]:
+    findings = []
+    for clause in clauses:
+        if clause.keyword != 'SKIP':
+            continue
+        if _INTEGER.fullmatch(clause.body) and int(clause.body) < max_skip:
+            continue
+        severity = WARNING if _INTEGER.fullmatch(clause.body) else INFO
+        findings.append(Finding(
+            'deep-skip', severity,
+            f'"SKIP {clause.body}" reads and discards every skipped row',
+            'Use keyset pagination: query.paginate(executor, key, page_size)'))
+    return findings
+
+
+def _list_sizes(text: str) -> Iterable[int]:
+    starts = []
+    quote = None
+    for index, char in enumerate(text):
+        if quote:
+            if char == quote and text[index - 1] != '\\':
+                quote = None
+        elif char in '"\'':
+            quote = char
+        elif char == '[':
+            starts.append(index)
+        elif char == ']' and starts:
+            start = starts.pop()
+            yield len(split_top_level(text[start + 1:index]))
+
+
+def _inline_lists(clauses, max_list_items: int) -> List[Finding]:
+    findings = []
+    for clause in clauses:
+        if clause.keyword in PATTERN_KEYWORDS:
+            continue
+        for size in _list_sizes(clause.body):
+            if size > max_list_items:
+                findings.append(Finding(
+                    'inline-list', WARNING,
+                    f'A list of {size} literal items is inlined in the {clause.keyword} clause',
+                    'Pass the list as a parameter (e.g. "n.id IN $ids") so that the query text stays small and '
+                    'its plan can be reused'))
+    return findings
+
+
+def lint(query, max_skip: int = 1000, max_list_items: int = 100) -> List[Finding]:
+    """Report the performance anti-patterns of a query.
+
+    :param query: The query to analyze (a built query or a string)
+    :param max_skip: The SKIP count from which paging is reported, defaults to 1000
+    :type max_skip: int
+    :param max_list_items: The number of items from which an inline list is reported, defaults to 100
+    :type max_list_items: int
+
+    :return: The findings, most severe first
+    :rtype: List[Finding]
+    """
+    clauses = split_clauses(query)
+    findings = (_unbounded_paths(clauses) + _cartesian_products(clauses) + _whole_entities(clauses) +
+                _deep_skips(clauses, max_skip) + _inline_lists(clauses, max_list_items))
+    return sorted(findings, key=lambda finding: -_severity_rank(finding.severity))
+
+
+class LintCollector(Observer):
+    """A hooks observer linting every distinct query rendered while it is subscribed."""
+
+    def __init__(self, min_severity: str = INFO, **thresholds):
+        """Initialize the collector.
+
+        :param min_severity: The least severe findings kept, defaults to "info"
+        :type min_severity: str
+        :param thresholds: The thresholds passed to ``lint``
+        """
+        self.min_severity = min_severity
+        self.thresholds = thresholds
+        self.findings: Dict[str, List[Finding]] = {}
+
+    def on_query_rendered(self, query: str, size: int, duration: float):
+        if query in self.findings:
+            return
+        findings = [finding for finding in lint(query, **self.thresholds)
+                    if _severity_rank(finding.severity) >= _severity_rank(self.min_severity)]
+        self.findings[query] = findings
+
+    def reported(self) -> Dict[str, List[Finding]]:
+        """Get the findings of the queries having some, by query."""
+        return {query: findings for query, findings in self.findings.items() if findings}
+
+    def max_severity(self) -> str:
+        """Get the most severe reported severity, None when there is no finding."""
+        severities = [finding.severity for findings in self.findings.values() for finding in findings]
+        return max(severities, key=_severity_rank, default=None)
+
+
+def format_findings(reported: Dict[str, List[Finding]]) -> str:
+    """Format findings by query as a human readable report."""
+    lines = []
+    for query, findings in reported.items():
+        lines.append(query)
+        for finding in findings:
+            lines.append(f'  {finding.severity.upper()} [{finding.rule}] {finding.message}')
+            lines.append(f'    fix: {finding.suggestion}')
+    return '\n'.join(lines)
+
+
+def _import(target: str):
+    if target.endswith('.py') or os.path.sep in target:
+        name = os.path.splitext(os.path.basename(target))[0]
+        spec = importlib.util.spec_from_file_location(f'cymple_lint_{name}', target)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+    return importlib.import_module(target)
+
+
+def lint_modules(targets: List[str], min_severity: str = INFO, **thresholds) -> Dict[str, List[Finding]]:
+    """Import modules and lint every query they render, including the built queries they define at module level.
+
+    :param targets: Dotted module names or paths to Python files
+    :type targets: List[str]
+    :param min_severity: The least severe findings kept, defaults to "info"
+    :type min_severity: str
+
+    :return: The findings by query
+    :rtype: Dict[str, List[Finding]]
+    """
+    from .builder import Query  # pylint: disable=C0415
+
+    collector = hooks.subscribe(LintCollector(min_severity, **thresholds))
+    try:
+        for target in targets:
+            module = _import(target)
+            for value in vars(module).values():
+                if isinstance(value, Query):
+                    str(value)
+    finally:
+        hooks.unsubscribe(collector)
+    return collector.reported()
+
+
+def main(arguments) -> int:
+    """Run the ``python -m cymple lint`` command, returning its exit status.
+
+    :param arguments: The parsed command line arguments (targets, min_severity, fail_on, max_skip, max_list_items)
+    """
+    sys.path.insert(0, os.getcwd())
+    reported = lint_modules(arguments.targets, arguments.min_severity, max_skip=arguments.max_skip,
+                            max_list_items=arguments.max_list_items)
+    if reported:
+        print(format_findings(reported))
+    count = sum(len(findings) for findings in reported.values())
+    print(f'{count} finding(s) in {len(reported)} query(ies)')
+    failing = [finding for findings in reported.values() for finding in findings
+               if _severity_rank(finding.severity) >= _severity_rank(arguments.fail_on)]
+    return 1 if failing else 0
@@ -0,0 +1,128 @@
+"""Batch lookups of large key collections, in chunks passed as list parameters.
+
+Rendering 200k keys into ``WHERE n.id IN [...]`` gives a query of several megabytes, slow to build, parse and
+plan, and never reused by the plan cache. ``batch_lookup`` instead filters a query template on a list
+parameter (``n.id IN $keys``), splits the keys into chunks, runs the chunks concurrently on a connection pool
+and streams the merged rows::
+
+    query = QueryBuilder().match().node('Person', 'n').return_literal('n.id AS id, n.name AS name')
+    for row in batch_lookup(pool, query, 'n.id', ids, chunk_size=5000, restore_order=True):
+        ...
+
+The template is run once per chunk: its ORDER BY, SKIP and LIMIT apply to the rows of a chunk.
+"""
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterable, Iterator, List
+
+from .analysis import add_predicate, final_return_index, projection_items, split_clauses
+from .execution import run
+
+KEYS_PARAMETER = 'keys'
+
+
+def lookup_query(query, key: str = None, parameter: str = KEYS_PARAMETER) -> str:
+    """Filter a query template on a list parameter of keys, e.g. ``n.id IN $keys``.
+
+    A template already referencing the parameter (e.g. ``where_literal(n.id.is_in(param('keys')))``) is kept
+    as it is, otherwise the predicate on the key is injected before its final RETURN.
+    """
+    query = str(query)
+    if f'${parameter}' in query:
+        return query
+    if key is None:
+        raise ValueError(f'The query does not reference ${parameter}, give the key to filter on')
+    return add_predicate(query, f'{key} IN ${parameter}')
+
+
+def chunks(keys: Iterable[Any], chunk_size: int) -> Iterator[List[Any]]:
+    """Split keys into lists of at most chunk_size distinct keys, in their order of first appearance."""
+    if chunk_size <= 0:
+        raise ValueError('chunk_size must be a positive integer')
+    seen = set()
+    chunk = []
+    for key in keys:
+        if key in seen:
+            continue
+        seen.add(key)
+        chunk.append(key)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _key_column(query: str, key: str) -> str:
+    if key is None:
+        raise ValueError('Restoring the order of the keys requires the key expression, e.g. "n.id"')
+    clauses = split_clauses(query)
+    projection = dict(projection_items(clauses[final_return_index(clauses)].body))
+    if key not in projection and key not in projection.values():
+        raise ValueError(f'Restoring the order of the keys requires the query to return the key {key}')
+    return projection.get(key, key)
+
+
+def _in_key_order(rows: List[Dict[str, Any]], chunk: List[Any], column: str) -> List[Dict[str, Any]]:
+    positions = {key: position for position, key in enumerate(chunk)}
+    return sorted(rows, key=lambda row: positions.get(row[column], len(positions)))
+
+
+def batch_lookup(pool, query, key: str = None, keys: Iterable[Any] = (), chunk_size: int = 10000,
+                 parameters: Dict[str, Any] = None, restore_order: bool = False, parameter: str = KEYS_PARAMETER,
+                 workers: int = None) -> Iterator[Dict[str, Any]]:
+    """Look up many keys with a query template, chunk by chunk, streaming back the rows found.
+
+    :param pool: A ``ConnectionPool`` (or any thread-safe executor exposing ``execute(query, parameters)``)
+    :param query: The query template (a built query or a string), ending with a RETURN clause
+    :param key: The expression the keys are compared to, e.g. 'n.id', defaults to None (the template already
+        filters on the parameter)
+    :type key: str
+    :param keys: The keys to look up, any iterable (consumed lazily, duplicates are looked up once)
+    :type keys: Iterable[Any]
+    :param chunk_size: The maximal number of keys per query, defaults to 10000
+    :type chunk_size: int
+    :param parameters: Extra parameters of the query, defaults to None
+    :type parameters: Dict[str, Any]
+    :param restore_order: Yield the rows in the order of the keys (the query returning the key), instead of
+        chunk by chunk as soon as each one completes, defaults to False
+    :type restore_order: bool
+    :param parameter: The name of the list parameter, defaults to "keys"
+    :type parameter: str
+    :param workers: The number of chunks running at once, defaults to None (the size of the pool, 1 for an
+        executor without a size, e.g. a single connection)
+    :type workers: int
+
+    :return: A generator of rows
+    :rtype: Iterator[Dict[str, Any]]
+    """
+    parameters = dict(parameters or {})
+    if parameter in parameters:
+        raise ValueError(f'The parameter {parameter} is reserved for the keys')
+    query = lookup_query(query, key, parameter)
+    column = _key_column(query, key) if restore_order else None
+    workers = workers or getattr(pool, 'size', 1)
+
+    def look_up(chunk: List[Any]) -> List[Dict[str, Any]]:
+        rows = run(pool, query, {**parameters, parameter: chunk})
+        return _in_key_order(rows, chunk, column) if restore_order else rows
+
+    pending = deque()
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        # At most twice as many chunks as workers are in flight, so that keys and rows are streamed
+        for chunk in chunks(keys, chunk_size):
+            pending.append(executor.submit(look_up, chunk))
+            if len(pending) < 2 * workers:
+                continue
+            if restore_order:
+                yield from pending.popleft().result()
+            else:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.remove(future)
+                    yield from future.result()
+        while pending:
+            yield from pending.popleft().result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,199 @@
+"""Materialized query results: the rows of an expensive read query persisted in a dedicated node table.
+
+A ``MaterializedView`` creates a node table from the projection of a query (columns named after its aliases,
+typed after what Kuzu reports for them) and fills it with ``COPY Table FROM (MATCH ... RETURN ...)``::
+
+    view = QueryBuilder().match().node('Person', 'p').related_to('Knows').node('Person', 'f') \\
+        .return_literal('p.id AS id, count(f) AS friends').materialize(pool, 'PersonFriends', key='id')
+    view.schedule(interval=600)
+
+Readers then query the small table (``MATCH (s: PersonFriends) ...``) instead of the traversal. A refresh
+replaces every row of the table in a single transaction, so readers never see a partially refreshed table.
+"""
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict
+
+from .analysis import final_return_index, is_read_only, replace_tail, split_clauses
+from .execution import ConnectionPool, run
+
+SERIAL_COLUMN = 'row_id'
+_COLUMN_NAME = re.compile(r'[A-Za-z_]\w*')
+_COPIED_ROWS = re.compile(r'(\d+) tuples?')
+_UNSTORABLE_TYPES = ('NODE', 'REL', 'RECURSIVE_REL')
+
+
+class MaterializedView:
+    """The rows of a read query, stored in a node table refreshed on demand or on a schedule."""
+
+    def __init__(self, executor, name: str, query, key: str = None, parameters: Dict[str, Any] = None,
+                 column_types: Dict[str, str] = None):
+        """Initialize the view, without creating its table.
+
+        :param executor: A ``kuzu.Connection`` or a ``ConnectionPool``, refreshes running on a single connection
+        :param name: The name of the node table
+        :type name: str
+        :param query: The read query, every projected expression being aliased (a built query or a string)
+        :param key: The returned column used as primary key, unique in the results, defaults to None (a SERIAL
+            "row_id" column is added)
+        :type key: str
+        :param parameters: The query parameters, defaults to None
+        :type parameters: Dict[str, Any]
+        :param column_types: The Kuzu type of every column, in order, defaults to None (the types Kuzu reports
+            for the projection, which requires a ``kuzu.Connection`` or a ``ConnectionPool``)
+        :type column_types: Dict[str, str]
+        """
+        query = str(query)
+        final_return_index(split_clauses(query))
+        if not is_read_only(query):
+            raise ValueError('Only the results of read queries can be materialized')
+        self.executor = executor
+        self.name = name
+        self.query = query
+        self.key = key
+        self.parameters = parameters or {}
+        self._column_types = dict(column_types) if column_types else None
+        self.refreshes = 0
+        self.refreshed_at = None
+        self.rows = None
+        self.duration = None
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._stop = None
+        self._thread = None
+
+    @contextmanager
+    def _connection(self):
+        if isinstance(self.executor, ConnectionPool):
+            with self.executor.connection() as connection:
+                yield connection
+        else:
+            yield self.executor
+
+    @property
+    def column_types(self) -> Dict[str, str]:
+        """The columns of the table and their Kuzu types, in the order of the projection."""
+        if self._column_types is None:
+            probe = replace_tail(self.query, limit=0, replace_window=True)
+            with self._connection() as connection:
+                result = connection.execute(probe, self.parameters)
+                if not hasattr(result, 'get_column_data_types'):
+                    raise TypeError('The executor does not report column types, give the column_types')
+                self._column_types = dict(zip(result.get_column_names(), result.get_column_data_types()))
+        return self._column_types
+
+    def create_statement(self) -> str:
+        """Get the statement creating the table (if it does not exist yet)."""
+        columns = []
+        for column, kuzu_type in self.column_types.items():
+            if not _COLUMN_NAME.fullmatch(column):
+                raise ValueError(f'Cannot name a column "{column}", alias every projected expression, '
+                                 f'e.g. "n.name AS name"')
+            if kuzu_type.split('(')[0] in _UNSTORABLE_TYPES:
+                raise ValueError(f'Cannot store the {kuzu_type} column "{column}", return its properties instead')
+            columns.append(f'{column} {kuzu_type}')
+
+        if self.key is None:
+            if SERIAL_COLUMN in self.column_types:
+                raise ValueError(f'The column "{SERIAL_COLUMN}" is reserved for the key, give the key to use instead')
+            columns.insert(0, f'{SERIAL_COLUMN} SERIAL')
+        elif self.key not in self.column_types:
+            raise ValueError(f'The key "{self.key}" is not a returned column')
+        return (f'CREATE NODE TABLE IF NOT EXISTS {self.name}({", ".join(columns)}, '
+                f'PRIMARY KEY({self.key or SERIAL_COLUMN}))')
+
+    def refresh_statements(self) -> list:
+        """Get the statements replacing the rows of the table, executed in a single transaction."""
+        return [f'MATCH (row: {self.name}) DELETE row',
+                f'COPY {self.name}({", ".join(self.column_types)}) FROM ({self.query})']
+
+    def create(self) -> 'MaterializedView':
+        """Create the table if it does not exist yet, without filling it."""
+        with self._connection() as connection:
+            run(connection, self.create_statement())
+        return self
+
+    def refresh(self) -> Dict[str, Any]:
+        """Replace the rows of the table with the current results of the query.
+
+        :return: The number of rows copied, the duration of the refresh and its (epoch) time
+        :rtype: Dict[str, Any]
+        """
+        delete, copy = self.refresh_statements()
+        with self._lock, self._connection() as connection:
+            start = time.perf_counter()
+            run(connection, 'BEGIN TRANSACTION')
+            try:
+                run(connection, delete)
+                copied = run(connection, copy, self.parameters)
+                run(connection, 'COMMIT')
+            except Exception:
+                try:
+                    run(connection, 'ROLLBACK')
+                except Exception:  # pylint: disable=W0703
+                    pass
+                raise
+            self.duration = time.perf_counter() - start
+            self.refreshed_at = time.time()
+            self.refreshes += 1
+            message = str(next(iter(copied[0].values()))) if copied and copied[0] else ''
+            match = _COPIED_ROWS.search(message)
+            self.rows = int(match.group(1)) if match else None
+        return {'rows': self.rows, 'duration': self.duration, 'refreshed_at': self.refreshed_at}
+
+    @property
+    def age(self) -> float:
+        """The number of seconds since the last refresh, None when never refreshed."""
+        return None if self.refreshed_at is None else time.time() - self.refreshed_at
+
+    def is_stale(self, max_age: float) -> bool:
+        """Whether the table was never refreshed, or was refreshed more than max_age seconds ago."""
+        return self.refreshed_at is None or self.age > max_age
+
+    def schedule(self, interval: float, on_error: Callable[[Exception], None] = None) -> 'MaterializedView':
+        """Refresh the table every interval seconds, from a background thread, until ``stop`` is called.
+
+        :param interval: The number of seconds between the end of a refresh and the start of the next one
+        :type interval: float
+        :param on_error: A callable receiving the exception of a failed refresh (also kept as ``last_error``),
+            the schedule going on, defaults to None
+        :type on_error: Callable[[Exception], None]
+        """
+        if self._thread is not None:
+            raise RuntimeError(f'The refresh of {self.name} is already scheduled')
+        self._stop = threading.Event()
+
+        def work(stop: threading.Event):
+            while not stop.wait(interval):
+                try:
+                    self.refresh()
+                except Exception as error:  # pylint: disable=W0703
+                    self.last_error = error
+                    if on_error is not None:
+                        on_error(error)
+
+        self._thread = threading.Thread(target=work, args=(self._stop,), name=f'cymple-refresh-{self.name}',
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the scheduled refreshes, waiting for a running refresh to finish."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def drop(self):
+        """Stop the scheduled refreshes and drop the table."""
+        self.stop()
+        with self._connection() as connection:
+            run(connection, f'DROP TABLE {self.name}')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
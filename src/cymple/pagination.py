@@ -0,0 +1,119 @@
+"""Keyset pagination over built queries.
+
+``SKIP n LIMIT m`` makes the database produce and discard ``n`` rows for every page, so late pages get
+slower and slower. Keyset pagination instead filters on the last key seen: every page costs the same.
+
+The key must be unique: a page starts strictly after the last key of the previous one, so rows tying with
+the last row of a page would be skipped. Paginate on a composite key ending with a unique tiebreaker, e.g.
+``['n.score', 'n.id']``. Every page is fetched with the first row of the next one, so duplicate keys within a page
+or across a page boundary raise a ValueError.
+"""
+from typing import Any, Dict, Iterator, List, Union
+
+from .analysis import add_predicate, final_return_index, projection_items, replace_tail, split_clauses
+from .execution import run
+
+LAST_PARAMETER = 'last'
+SIZE_PARAMETER = 'size'
+
+
+def _key_columns(query: str, keys: List[str]) -> List[str]:
+    clauses = split_clauses(query)
+    projection = dict(projection_items(clauses[final_return_index(clauses)].body))
+    missing = [key for key in keys if key not in projection]
+    if missing:
+        raise ValueError(f'Pagination keys must be returned by the query, missing: {", ".join(missing)}')
+    return [projection[key] for key in keys]
+
+
+def _last_parameters(keys: List[str]) -> List[str]:
+    if len(keys) == 1:
+        return [LAST_PARAMETER]
+    return [f'{LAST_PARAMETER}_{index}' for index in range(len(keys))]
+
+
+def _check_unique(page: List[Dict[str, Any]], columns: List[str]):
+    # The rows of a page (and the first row of the next one) are sorted by key, duplicate keys are consecutive
+    keys = [tuple(row[column] for column in columns) for row in page]
+    for previous, key in zip(keys, keys[1:]):
+        if previous == key:
+            raise ValueError(f'The pagination key is not unique ({", ".join(columns)} = {key!r} twice), rows would be '
+                             f'skipped: add a unique tiebreaker, e.g. [key, "n.id"]')
+
+
+def keyset_predicate(keys: List[str], descending: bool = False) -> str:
+    """Render the predicate selecting the rows which come after the last row of the previous page.
+
+    Composite keys are compared lexicographically, e.g. for keys (a, b):
+    ``a > $last_0 OR (a = $last_0 AND b > $last_1)``.
+    """
+    operator = '<' if descending else '>'
+    parameters = _last_parameters(keys)
+    alternatives = []
+    for index, key in enumerate(keys):
+        equalities = [f'{keys[i]} = ${parameters[i]}' for i in range(index)]
+        alternatives.append(' AND '.join(equalities + [f'{key} {operator} ${parameters[index]}']))
+
+    if len(alternatives) == 1:
+        return alternatives[0]
+    return ' OR '.join(f'({alternative})' for alternative in alternatives)
+
+
+def keyset_queries(query, key: Union[str, List[str]], descending: bool = False) -> tuple:
+    """Rewrite a query into its first page and following pages variants.
+
+    The query must not have its own SKIP or LIMIT, pages being selected by the key.
+
+    :return: A (first page query, next pages query) tuple
+    :rtype: tuple
+    """
+    keys = [key] if isinstance(key, str) else list(key)
+    query = str(query)
+    direction = ' DESC' if descending else ' ASC'
+    order_by = ', '.join(f'{key}{direction}' for key in keys)
+
+    first = replace_tail(query, order_by=order_by, limit=f'${SIZE_PARAMETER}')
+    following = replace_tail(add_predicate(query, keyset_predicate(keys, descending)),
+                             order_by=order_by, limit=f'${SIZE_PARAMETER}')
+    return first, following
+
+
+def keyset_pages(executor, query, key: Union[str, List[str]], page_size: int, descending: bool = False,
+                 parameters: Dict[str, Any] = None) -> Iterator[List[Dict[str, Any]]]:
+    """Iterate over the results of a query, page by page, using keyset pagination.
+
+    :param executor: An object exposing ``execute(query, parameters)``, e.g. a ``kuzu.Connection``
+    :param query: The query to paginate, it must end with a RETURN clause projecting the key(s)
+    :param key: The unique expression (or list of expressions, for a composite key) to paginate on, e.g. 'n.id'
+    :type key: Union[str, List[str]]
+    :param page_size: The maximal number of rows in a page
+    :type page_size: int
+    :param descending: Iterate in descending key order, defaults to False
+    :type descending: bool
+    :param parameters: Extra parameters of the query, defaults to None
+    :type parameters: Dict[str, Any]
+
+    :return: A generator of pages, each page being a list of rows
+    :rtype: Iterator[List[Dict[str, Any]]]
+    """
+    keys = [key] if isinstance(key, str) else list(key)
+    if page_size <= 0:
+        raise ValueError('page_size must be a positive integer')
+
+    parameters = dict(parameters or {})
+    reserved = set(_last_parameters(keys) + [SIZE_PARAMETER]) & set(parameters)
+    if reserved:
+        raise ValueError(f'Parameters reserved for pagination: {", ".join(sorted(reserved))}')
+
+    columns = _key_columns(str(query), keys)
+    first, following = keyset_queries(query, keys, descending)
+
+    # One row more than a page: a key tying across the page boundary is detected too
+    page = run(executor, first, {**parameters, SIZE_PARAMETER: page_size + 1})
+    while page:
+        _check_unique(page, columns)
+        yield page[:page_size]
+        if len(page) <= page_size:
+            return
+        last = dict(zip(_last_parameters(keys), (page[page_size - 1][column] for column in columns)))
+        page = run(executor, following, {**parameters, **last, SIZE_PARAMETER: page_size + 1})
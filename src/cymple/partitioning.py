@@ -0,0 +1,289 @@
+"""Partitioned parallel execution of a single read query.
+
+A query is split into disjoint partitions by injecting a predicate on a key (hash buckets, modulo buckets
+or key ranges), the partitions run concurrently on pooled connections and their rows are merged back,
+optionally preserving the query ORDER BY with a k-way merge. SKIP and LIMIT apply to the merged rows.
+
+The rows of a RETURN DISTINCT or of an aggregation are grouped again across partitions, ``count`` and ``sum``
+being summed and ``min`` and ``max`` reduced; other aggregates (``avg``, ``collect``, ``count(DISTINCT ...)``,
+expressions of aggregates...) cannot be recombined from partial results and are rejected.
+"""
+import heapq
+import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import cmp_to_key
+from typing import Any, Callable, Dict, Iterable, List, Union
+
+from .analysis import (Clause, add_predicate, final_return_index, has_aggregate, join_clauses, projection_items,
+                       split_clauses, split_top_level)
+from .execution import run
+
+LOW_PARAMETER = 'partition_low'
+HIGH_PARAMETER = 'partition_high'
+
+_CALL = re.compile(r'^(\w+)\s*\((.*)\)$', re.DOTALL)
+
+
+def _sum(values: List[Any]) -> Any:
+    return sum(values[1:], values[0]) if values else None
+
+
+def _count(values: List[Any]) -> Any:
+    return sum(values) if values else 0
+
+
+_COMBINERS = {'count': _count, 'sum': _sum, 'min': lambda values: min(values) if values else None,
+              'max': lambda values: max(values) if values else None}
+
+
+def _call(expression: str) -> tuple:
+    # The (function, argument) of an expression which is a single function call, e.g. not "count(x) + sum(y)"
+    match = _CALL.match(expression)
+    if match is None:
+        return None, None
+    depth = 0
+    for char in match.group(2):
+        depth += {'(': 1, ')': -1}.get(char, 0)
+        if depth < 0:
+            return None, None
+    return match.group(1).lower(), match.group(2).strip()
+
+
+def recombination(return_body: str) -> Union[List[Callable], None]:
+    """Get how the columns of a RETURN clause are recombined across partitions.
+
+    :param return_body: The body of the final RETURN clause
+    :type return_body: str
+
+    :return: None when the rows of the partitions are simply concatenated, otherwise the combining function of every
+        returned column, in order (None for the columns which are not aggregated, the grouping keys)
+    :rtype: Union[List[Callable], None]
+    """
+    combiners = []
+    for expression, _ in projection_items(return_body):
+        name, argument = _call(expression)
+        if name in _COMBINERS and not argument.upper().startswith('DISTINCT '):
+            combiners.append(_COMBINERS[name])
+        elif has_aggregate(expression):
+            raise ValueError(f'Cannot recombine "{expression}" across partitions, only plain count, sum, min and '
+                             f'max aggregates are supported')
+        else:
+            combiners.append(None)
+
+    if not any(combiners) and not return_body.upper().startswith('DISTINCT '):
+        return None
+    return combiners
+
+
+def _hashable(value: Any) -> Any:
+    if isinstance(value, list):
+        return tuple(_hashable(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((name, _hashable(item)) for name, item in value.items()))
+    return value
+
+
+def combine(results: Iterable[List[Dict[str, Any]]], combiners: List[Callable]) -> List[Dict[str, Any]]:
+    """Group the rows of every partition by their non-aggregated columns and combine their aggregated columns.
+
+    Columns are matched to their combiners by position, as Kuzu renames the aggregates which are not aliased
+    (e.g. ``count(*)`` is returned as ``COUNT_STAR()``).
+
+    :param results: The rows of every partition
+    :type results: Iterable[List[Dict[str, Any]]]
+    :param combiners: The combining function of every column, see ``recombination``
+    :type combiners: List[Callable]
+
+    :return: A row per group, in order of first appearance
+    :rtype: List[Dict[str, Any]]
+    """
+    groups: Dict[Any, List[Dict[str, Any]]] = {}
+    for rows in results:
+        for row in rows:
+            group = _hashable([value for value, combiner in zip(row.values(), combiners) if combiner is None])
+            groups.setdefault(group, []).append(row)
+
+    combined = []
+    for rows in groups.values():
+        row = dict(rows[0])
+        for column, combiner in zip(list(row), combiners):
+            if combiner is not None:
+                row[column] = combiner([other[column] for other in rows if other[column] is not None])
+        combined.append(row)
+    return combined
+
+
+def partition_predicates(key: str, partitions: int = 4, method: str = 'hash', bounds: List[Any] = None) -> List[tuple]:
+    """Render the predicates splitting a key domain into disjoint partitions.
+
+    :param key: The expression to partition on, e.g. 'f.id'
+    :type key: str
+    :param partitions: The number of hash/modulo buckets, ignored for ranges, defaults to 4
+    :type partitions: int
+    :param method: 'hash' (hash(key) % N), 'modulo' (key % N, for integer keys) or 'range', defaults to 'hash'
+    :type method: str
+    :param bounds: The sorted split points of a 'range' partitioning (N - 1 points for N partitions)
+    :type bounds: List[Any]
+
+    The rows whose key is NULL match no bucket nor range, they go to the first partition.
+
+    :return: A list of (predicate, parameters) tuples, one per partition
+    :rtype: List[tuple]
+    """
+    if method == 'range':
+        if not bounds:
+            raise ValueError('A range partitioning requires bounds')
+        predicates = [(f'{key} IS NULL OR {key} < ${HIGH_PARAMETER}', {HIGH_PARAMETER: bounds[0]})]
+        for low, high in zip(bounds, bounds[1:]):
+            predicates.append((f'{key} >= ${LOW_PARAMETER} AND {key} < ${HIGH_PARAMETER}',
+                               {LOW_PARAMETER: low, HIGH_PARAMETER: high}))
+        predicates.append((f'{key} >= ${LOW_PARAMETER}', {LOW_PARAMETER: bounds[-1]}))
+        return predicates
+
+    if partitions <= 0:
+        raise ValueError('The number of partitions must be a positive integer')
+    if method == 'hash':
+        # hash() is unsigned, but hashes NULL too
+        expression = f'hash({key}) % {partitions}'
+    elif method == 'modulo':
+        # % keeps the sign of the dividend, negative keys are brought back to [0, N)
+        expression = f'(({key} % {partitions}) + {partitions}) % {partitions}'
+    else:
+        raise ValueError(f'Unknown partitioning method "{method}"')
+
+    return [(f'{key} IS NULL OR {expression} = 0', {})] + \
+        [(f'{key} IS NOT NULL AND {expression} = {bucket}', {}) for bucket in range(1, partitions)]
+
+
+def _sort_columns(clauses) -> List[tuple]:
+    """Map the final ORDER BY items to (column name, descending) pairs."""
+    return_index = final_return_index(clauses)
+    projection = projection_items(clauses[return_index].body)
+    by_expression = {expression: column for expression, column in projection}
+    columns = {column for _, column in projection}
+
+    sort_columns = []
+    for clause in clauses[return_index + 1:]:
+        if clause.keyword != 'ORDER BY':
+            continue
+        for item in split_top_level(clause.body):
+            words = item.rsplit(' ', 1)
+            descending = len(words) == 2 and words[1].upper() in ('DESC', 'DESCENDING')
+            if len(words) == 2 and words[1].upper() in ('ASC', 'ASCENDING', 'DESC', 'DESCENDING'):
+                item = words[0].strip()
+            column = item if item in columns else by_expression.get(item)
+            if column is None:
+                raise ValueError(f'Cannot merge on "{item}", ORDER BY items must be returned by the query')
+            sort_columns.append((column, descending))
+    return sort_columns
+
+
+def _compare(left, right) -> int:
+    # NULLs sort after any other value, like Kuzu does for ascending orders
+    if left is None or right is None:
+        return (left is None) - (right is None)
+    return (left > right) - (left < right)
+
+
+def _row_comparator(sort_columns: List[tuple]):
+    def compare(left, right):
+        for column, descending in sort_columns:
+            result = _compare(left[column], right[column])
+            if result:
+                return -result if descending else result
+        return 0
+    return cmp_to_key(compare)
+
+
+def _split_tail(query: str) -> tuple:
+    """Strip SKIP/LIMIT of the final RETURN, to apply them after merging the partitions."""
+    clauses = split_clauses(query)
+    return_index = final_return_index(clauses)
+    head, skip, limit = clauses[:return_index + 1], 0, None
+
+    for clause in clauses[return_index + 1:]:
+        if clause.keyword in ('SKIP', 'LIMIT'):
+            if not clause.body.isdigit():
+                raise ValueError(f'Partitioned queries require a literal {clause.keyword}, got "{clause.body}"')
+            if clause.keyword == 'SKIP':
+                skip = int(clause.body)
+            else:
+                limit = int(clause.body)
+        else:
+            head.append(clause)
+
+    if limit is not None:
+        # Each partition may hold all of the rows of the requested window
+        head.append(Clause('LIMIT', str(skip + limit)))
+
+    return head, skip, limit
+
+
+def scatter(query: str, preserve_order: bool = True) -> tuple:
+    """Plan a read query running on disjoint parts of the data (partitions or shards).
+
+    :return: The query every part runs, and the arguments of ``gather`` recombining their rows
+    :rtype: tuple
+    """
+    head, skip, limit = _split_tail(query)
+    sort_columns = _sort_columns(head)
+    if sort_columns and not preserve_order and (skip or limit is not None):
+        raise ValueError('SKIP and LIMIT of an ordered query only select the requested rows when the order is '
+                         'preserved')
+    combiners = recombination(head[final_return_index(head)].body)
+    if combiners is not None:
+        # Partial groups of a part could be cut by its own LIMIT, every part returns all of its groups
+        head = head[:final_return_index(head) + 1]
+    return join_clauses(head), (combiners, sort_columns if preserve_order else [], skip, limit)
+
+
+def gather(results: List[List[Dict[str, Any]]], combiners: List[Callable], sort_columns: List[tuple], skip: int,
+           limit: int) -> List[Dict[str, Any]]:
+    """Recombine the rows of the parts of a query planned by ``scatter``: regroup the aggregates, merge the sorted
+    rows and apply SKIP and LIMIT."""
+    if combiners is not None:
+        rows = combine(results, combiners)
+        if sort_columns:
+            rows.sort(key=_row_comparator(sort_columns))
+    elif sort_columns:
+        rows = list(heapq.merge(*results, key=_row_comparator(sort_columns)))
+    else:
+        rows = [row for result in results for row in result]
+    return rows[skip:None if limit is None else skip + limit]
+
+
+def execute_partitioned(pool, query, key: str, partitions: int = 4, method: str = 'hash', bounds: List[Any] = None,
+                        parameters: Dict[str, Any] = None, preserve_order: bool = True) -> List[Dict[str, Any]]:
+    """Execute a read query as disjoint partitions running concurrently on pooled connections.
+
+    :param pool: A ``ConnectionPool`` (or any thread-safe executor exposing ``execute(query, parameters)``)
+    :param query: The query to execute, it must end with a RETURN clause
+    :param key: The expression to partition on, e.g. 'f.id'
+    :type key: str
+    :param partitions: The number of partitions, defaults to 4
+    :type partitions: int
+    :param method: 'hash', 'modulo' or 'range', see ``partition_predicates``, defaults to 'hash'
+    :type method: str
+    :param bounds: The split points of a 'range' partitioning, defaults to None
+    :type bounds: List[Any]
+    :param parameters: The query parameters, defaults to None
+    :type parameters: Dict[str, Any]
+    :param preserve_order: K-way merge the partitions according to the query ORDER BY, defaults to True (an
+        ordered query with a SKIP or a LIMIT requires it)
+    :type preserve_order: bool
+
+    :return: The merged rows
+    :rtype: List[Dict[str, Any]]
+    """
+    query = str(query)
+    parameters = dict(parameters or {})
+    base_query, plan = scatter(query, preserve_order)
+
+    jobs = [(add_predicate(base_query, predicate), {**parameters, **partition_parameters})
+            for predicate, partition_parameters in partition_predicates(key, partitions, method, bounds)]
+
+    workers = min(len(jobs), getattr(pool, 'size', len(jobs)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(lambda job: run(pool, *job), jobs))
+
+    return gather(results, *plan)
@@ -0,0 +1,302 @@
+"""Parsing of the query plans Kuzu renders for ``EXPLAIN`` and ``PROFILE`` queries.
+
+Kuzu returns a plan as a single string, drawing every operator in a box, children below their parent
+(the first child right below it, the following ones to its right)::
+
+    ┌─────────────────────────────┐
+    │     RESULT_COLLECTOR[2]     │
+    │   -----------------------   │
+    │     Expressions: a.name     │
+    │   -----------------------   │
+    │     NumOutputTuples: 3      │
+    │   -----------------------   │
+    │   ExecutionTime: 0.012000   │
+    └──────────────┬──────────────┘
+    ┌──────────────┴──────────────┐
+    │     SCAN_NODE_TABLE[0]      │
+    ...
+"""
+import difflib
+import re
+from collections import namedtuple
+from typing import Any, Dict, Iterator, List, Tuple
+
+_OPERATOR_NAME = re.compile(r'([A-Z][A-Z0-9_]*)(?:\[(\d+)\])?')
+_SEPARATOR = re.compile(r'-+')
+_PROFILE_ROOT = 'PROFILE'
+
+CARDINALITY_PROPERTY = 'NumOutputTuples'
+TIME_PROPERTY = 'ExecutionTime'
+DETAILS_PROPERTY = 'Details'
+ESTIMATE_PROPERTIES = ('EstimatedCardinality', 'Cardinality')
+_MEASUREMENTS = (CARDINALITY_PROPERTY, TIME_PROPERTY)
+
+_Box = namedtuple('_Box', ['top', 'left', 'lines'])
+
+
+class PlanNode:
+    """An operator of a query plan, with the properties Kuzu reports for it."""
+
+    def __init__(self, name: str, id: int = None, properties: Dict[str, str] = None,
+                 children: List['PlanNode'] = None, profiled: bool = True):
+        """Initialize the operator.
+
+        :param name: The name of the operator, e.g. "SCAN_NODE_TABLE"
+        :type name: str
+        :param id: The identifier of the operator in the plan, defaults to None
+        :type id: int
+        :param properties: The properties of the operator, e.g. {"Tables": "Person"}, defaults to None
+        :type properties: Dict[str, str]
+        :param children: The operators feeding this one, defaults to None
+        :type children: List[PlanNode]
+        :param profiled: Whether the operator was executed (PROFILE) or only planned (EXPLAIN), in which case
+            the measurements Kuzu prints are placeholders, defaults to True
+        :type profiled: bool
+        """
+        self.name = name
+        self.id = id
+        self.properties = properties or {}
+        self.children = children or []
+        self.profiled = profiled
+
+    @property
+    def cardinality(self) -> int:
+        """The actual number of tuples output by the operator, None when not profiled."""
+        value = self.properties.get(CARDINALITY_PROPERTY)
+        return None if value is None or not self.profiled else int(value)
+
+    @property
+    def estimated_cardinality(self) -> int:
+        """The number of tuples the planner expects the operator to output, None when not reported."""
+        for key in ESTIMATE_PROPERTIES:
+            if key in self.properties:
+                return int(float(self.properties[key]))
+        return None
+
+    @property
+    def time(self) -> float:
+        """The execution time of the operator in seconds (Kuzu reports milliseconds), None when not profiled."""
+        value = self.properties.get(TIME_PROPERTY)
+        return None if value is None or not self.profiled else float(value.rstrip('ms')) / 1000
+
+    @property
+    def signature(self) -> Tuple[str, tuple]:
+        """The operator name and properties, measurements excluded, identifying the operator between plans."""
+        return self.name, tuple(sorted((key, value) for key, value in self.properties.items()
+                                       if key not in _MEASUREMENTS))
+
+    def walk(self) -> Iterator['PlanNode']:
+        """Iterate over this operator and its descendants, depth first."""
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the operator tree as a JSON serializable dict."""
+        return {
+            'name': self.name,
+            'id': self.id,
+            'properties': self.properties,
+            'cardinality': self.cardinality,
+            'estimated_cardinality': self.estimated_cardinality,
+            'time': self.time,
+            'children': [child.to_dict() for child in self.children],
+        }
+
+    def __repr__(self) -> str:
+        return f'PlanNode({self.name}[{self.id}], {len(self.children)} children)'
+
+
+def _find_boxes(lines: List[str]) -> List[_Box]:
+    boxes = []
+    for top, line in enumerate(lines):
+        left = line.find('┌')
+        while left != -1:
+            right = line.find('┐', left)
+            # Boxes drawn inside another box are titles ("Physical Plan"), not operators
+            if right != -1 and (left == 0 or line[left - 1] != '│'):
+                content = []
+                row = top + 1
+                while row < len(lines) and len(lines[row]) > left and lines[row][left] != '└':
+                    content.append(lines[row][left + 1:right].strip())
+                    row += 1
+                boxes.append(_Box(top, left, content))
+            left = line.find('┌', left + 1)
+    return boxes
+
+
+def _parse_operator(content: List[str], profiled: bool) -> PlanNode:
+    if not content or any('┌' in line for line in content):
+        return None
+    name = _OPERATOR_NAME.fullmatch(content[0])
+    if name is None:
+        return None
+
+    properties = {}
+    key = None
+    for line in content[1:]:
+        if not line or _SEPARATOR.fullmatch(line):
+            continue
+        if ': ' in line:
+            key, value = line.split(': ', 1)
+            properties[key] = value
+        elif key is not None:
+            # Long values are wrapped over the following lines
+            properties[key] += f', {line}'
+        else:
+            key = DETAILS_PROPERTY
+            properties[key] = line
+
+    return PlanNode(name.group(1), None if name.group(2) is None else int(name.group(2)), properties,
+                    profiled=profiled)
+
+
+def parse_plan(text: str, profiled: bool = True) -> PlanNode:
+    """Parse the plan Kuzu returns for an ``EXPLAIN`` or ``PROFILE`` query into an operator tree.
+
+    :param text: The plan, as rendered by Kuzu
+    :type text: str
+    :param profiled: Whether the plan comes from a PROFILE query, defaults to True
+    :type profiled: bool
+
+    :return: The root operator (the ``PROFILE`` wrapper operator being skipped)
+    :rtype: PlanNode
+    """
+    operators = []
+    for box in _find_boxes(text.splitlines()):
+        operator = _parse_operator(box.lines, profiled)
+        if operator is not None:
+            operators.append((box, operator))
+    if not operators:
+        raise ValueError('No operator found in the plan')
+
+    bands = sorted({box.top for box, _ in operators})
+    for box, operator in operators:
+        band = bands.index(box.top)
+        if band == 0:
+            continue
+        # The parent is the nearest operator drawn at or left of the child in the band right above it
+        parents = [(parent_box.left, parent) for parent_box, parent in operators
+                   if parent_box.top == bands[band - 1] and parent_box.left <= box.left]
+        max(parents, key=lambda parent: parent[0])[1].children.append(operator)
+
+    root = operators[0][1]
+    if root.name == _PROFILE_ROOT and len(root.children) == 1:
+        root = root.children[0]
+    return root
+
+
+class PlanDiff:
+    """The structural differences between two plans, operators being compared by their signature."""
+
+    def __init__(self, before: 'Plan', after: 'Plan'):
+        """Compare two plans.
+
+        :param before: The plan of the original query
+        :type before: Plan
+        :param after: The plan of the rewritten query
+        :type after: Plan
+        """
+        self.before = before
+        self.after = after
+        self.removed = []
+        self.added = []
+        before_nodes = list(before.root.walk())
+        after_nodes = list(after.root.walk())
+        matcher = difflib.SequenceMatcher(a=[node.signature for node in before_nodes],
+                                          b=[node.signature for node in after_nodes], autojunk=False)
+        for tag, before_start, before_end, after_start, after_end in matcher.get_opcodes():
+            if tag != 'equal':
+                self.removed.extend(before_nodes[before_start:before_end])
+                self.added.extend(after_nodes[after_start:after_end])
+
+    def __bool__(self) -> bool:
+        """Whether the plans differ structurally."""
+        return bool(self.removed or self.added)
+
+    def __str__(self) -> str:
+        """Format the differences as a unified diff of the two indented plans."""
+        before = self.before.format(measurements=False).splitlines()
+        after = self.after.format(measurements=False).splitlines()
+        return '\n'.join(difflib.unified_diff(before, after, 'before', 'after', lineterm=''))
+
+
+class Plan:
+    """The plan of a query, as returned by executing a query built with ``.explain()`` or ``.profile()``."""
+
+    def __init__(self, root: PlanNode, profiled: bool):
+        """Initialize the plan.
+
+        :param root: The root operator
+        :type root: PlanNode
+        :param profiled: Whether the operators were executed (PROFILE) or only planned (EXPLAIN)
+        :type profiled: bool
+        """
+        self.root = root
+        self.profiled = profiled
+
+    @classmethod
+    def parse(cls, text: str, profiled: bool = True) -> 'Plan':
+        """Parse the plan Kuzu returns for an ``EXPLAIN`` or ``PROFILE`` query."""
+        return cls(parse_plan(text, profiled), profiled)
+
+    @property
+    def operators(self) -> List[PlanNode]:
+        """The operators of the plan, depth first from the root."""
+        return list(self.root.walk())
+
+    def find(self, name: str) -> List[PlanNode]:
+        """Get the operators of the plan with the given name, e.g. "FILTER"."""
+        return [node for node in self.root.walk() if node.name == name]
+
+    @property
+    def total_time(self) -> float:
+        """The sum of the operator times in seconds, None when not profiled."""
+        if not self.profiled:
+            return None
+        return sum(node.time or 0.0 for node in self.root.walk())
+
+    def most_expensive(self, by: str = 'time') -> PlanNode:
+        """Get the most expensive operator.
+
+        :param by: "time", "cardinality" (actual output tuples) or "estimated_cardinality", defaults to "time"
+        :type by: str
+
+        :return: The operator with the highest measurement, None when no operator reports it
+        :rtype: PlanNode
+        """
+        if by not in ('time', 'cardinality', 'estimated_cardinality'):
+            raise ValueError(f'Unknown cost "{by}", expected "time", "cardinality" or "estimated_cardinality"')
+        measured = [node for node in self.root.walk() if getattr(node, by) is not None]
+        return max(measured, key=lambda node: getattr(node, by), default=None)
+
+    def diff(self, other: 'Plan') -> PlanDiff:
+        """Compare this plan with the plan of another (e.g. rewritten) query."""
+        return PlanDiff(self, other)
+
+    def format(self, measurements: bool = True) -> str:
+        """Format the plan as an indented operator tree.
+
+        :param measurements: Include the actual cardinality and time of the operators, defaults to True
+        :type measurements: bool
+        """
+        lines = []
+
+        def append(node: PlanNode, depth: int):
+            properties = ', '.join(f'{key}: {value}' for key, value in node.signature[1])
+            details = f' ({properties})' if properties else ''
+            measured = '' if node.time is None or not measurements else \
+                f' [{node.cardinality} rows, {node.time * 1000:.3f}ms]'
+            lines.append(f'{"  " * depth}{node.name}{details}{measured}')
+            for child in node.children:
+                append(child, depth + 1)
+
+        append(self.root, 0)
+        return '\n'.join(lines)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the plan as a JSON serializable dict."""
+        return {'profiled': self.profiled, 'root': self.root.to_dict()}
+
+    def __str__(self) -> str:
+        return self.format()
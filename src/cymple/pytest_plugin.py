@@ -0,0 +1,61 @@
+"""A pytest plugin linting the queries rendered while the tests run.
+
+The plugin is registered through the ``pytest11`` entry point of the package and stays inactive until
+``pytest --cymple-lint`` is given (add ``--cymple-lint-fail-on=warning`` to fail the session on warnings
+too). The ``cymple_lint`` fixture asserts that a query has no finding.
+"""
+import pytest
+
+from .hooks import hooks
+from .lint import SEVERITIES, LintCollector, format_findings, lint
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('cymple')
+    group.addoption('--cymple-lint', action='store_true', help='Lint every query rendered by the tests')
+    group.addoption('--cymple-lint-fail-on', default='error', choices=SEVERITIES,
+                    help='The least severe findings failing the session (default: error)')
+
+
+def pytest_configure(config):
+    if config.getoption('cymple_lint', False):
+        config.cymple_lint_collector = hooks.subscribe(LintCollector())
+
+
+def pytest_unconfigure(config):
+    collector = getattr(config, 'cymple_lint_collector', None)
+    if collector is not None:
+        hooks.unsubscribe(collector)
+
+
+def _failing(config) -> bool:
+    collector = getattr(config, 'cymple_lint_collector', None)
+    if collector is None or collector.max_severity() is None:
+        return False
+    return SEVERITIES.index(collector.max_severity()) >= SEVERITIES.index(config.getoption('cymple_lint_fail_on'))
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if exitstatus == 0 and _failing(session.config):
+        session.exitstatus = 1
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    collector = getattr(config, 'cymple_lint_collector', None)
+    if collector is None:
+        return
+    reported = collector.reported()
+    terminalreporter.section('cymple lint')
+    terminalreporter.write_line(format_findings(reported) if reported else 'No finding')
+
+
+@pytest.fixture
+def cymple_lint():
+    """Get a function asserting that a query has no finding of at least a severity (default: warning)."""
+
+    def assert_no_findings(query, min_severity: str = 'warning', **thresholds):
+        findings = [finding for finding in lint(query, **thresholds)
+                    if SEVERITIES.index(finding.severity) >= SEVERITIES.index(min_severity)]
+        assert not findings, format_findings({str(query): findings})
+
+    return assert_no_findings
@@ -0,0 +1,109 @@
+"""The execution layer: runs built queries on Kuzu and applies the optional execution features."""
+import asyncio
+from typing import Any, Dict, List
+
+from .analysis import is_read_only, query_labels
+from .cache import MISSING, ResultCache
+from .coalescing import SingleFlight
+from .execution import Executor, run, shape_result
+from .transactions import Transaction, transaction
+from .writer import WriteQueue
+
+
+class Session(Executor):
+    """Execute built queries on an executor (a ``kuzu.Connection`` or a ``ConnectionPool``).
+
+    Queries are classified as read-only or writing from their clauses: reads run on the executor,
+    while writes go through the writer queue when one is given.
+    """
+
+    def __init__(self, executor, cache: ResultCache = None, coalesce: bool = False, writer: WriteQueue = None):
+        """Initialize the session.
+
+        :param executor: An object exposing ``execute(query, parameters)``, e.g. a ``ConnectionPool``
+        :param cache: A result cache for read queries, defaults to None (no caching)
+        :type cache: ResultCache
+        :param coalesce: Share a single execution between concurrent identical read queries, defaults to False
+        :type coalesce: bool
+        :param writer: A single-writer queue executing the write queries, defaults to None (writes run on
+            the executor)
+        :type writer: WriteQueue
+        """
+        self.executor = executor
+        self.cache = cache
+        self.single_flight = SingleFlight() if coalesce else None
+        self.writer = writer
+
+    def execute(self, query, parameters: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+        """Execute a query and return its rows.
+
+        :param query: The query to execute (a built query or a string)
+        :param parameters: The query parameters, defaults to None
+        :type parameters: Dict[str, Any]
+
+        :return: The list of rows (or the result promised by the terminal method of the query)
+        :rtype: List[Dict[str, Any]]
+        """
+        return shape_result(query, self._execute(str(query), parameters or {}))
+
+    def _execute(self, query: str, parameters: Dict[str, Any]) -> List[Dict[str, Any]]:
+        if self.cache is None and self.single_flight is None and self.writer is None:
+            return run(self.executor, query, parameters)
+
+        if not is_read_only(query):
+            return self._write(query, parameters)
+
+        if self.single_flight is None:
+            return self._read(query, parameters)
+
+        return self.single_flight.do(ResultCache.key(query, parameters), lambda: self._read(query, parameters))
+
+    async def execute_async(self, query, parameters: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+        """Execute a query from a coroutine, running the blocking Kuzu call in a worker thread.
+
+        Identical read queries awaited concurrently share a single execution when coalescing is enabled.
+        """
+        built = query
+        query = str(query)
+        parameters = parameters or {}
+
+        if self.single_flight is None or not is_read_only(query):
+            return shape_result(built, await asyncio.to_thread(self._execute, query, parameters))
+
+        return shape_result(built, await self.single_flight.do_async(
+            ResultCache.key(query, parameters), lambda: asyncio.to_thread(self._read, query, parameters)))
+
+    def transaction(self):
+        """Run the queries of a with block in a single transaction on the executor, e.g.
+        ``with session.transaction() as transaction: transaction.execute(query)``.
+
+        The queries of the transaction bypass the cache, the coalescing and the writer queue. Once committed,
+        the cached results reading the labels it wrote are invalidated.
+
+        :return: A context manager giving the ``Transaction``, committed at the end of the block or rolled back
+            when it raises
+        """
+        return transaction(self.executor, on_commit=self._committed)
+
+    def _committed(self, committed: Transaction):
+        if self.cache is not None:
+            self.cache.invalidate(committed.written_labels)
+
+    def _read(self, query: str, parameters: Dict[str, Any]) -> List[Dict[str, Any]]:
+        if self.cache is None:
+            return run(self.executor, query, parameters)
+
+        rows = self.cache.get(query, parameters)
+        if rows is MISSING:
+            labels = query_labels(query).read
+            generation = self.cache.generation(labels)
+            rows = run(self.executor, query, parameters)
+            self.cache.put(query, parameters, rows, labels, generation)
+        return rows
+
+    def _write(self, query: str, parameters: Dict[str, Any]) -> List[Dict[str, Any]]:
+        try:
+            return run(self.writer if self.writer is not None else self.executor, query, parameters)
+        finally:
+            if self.cache is not None:
+                self.cache.invalidate(query_labels(query).written)
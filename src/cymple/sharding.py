@@ -0,0 +1,127 @@
+"""Sharded execution: a graph split across several Kuzu databases, e.g. one database directory per tenant.
+
+A ``ShardRouter`` maps a shard key to the database holding it. Writes are routed to the single shard of their
+key, reads are scattered to every shard concurrently and their rows gathered back::
+
+    router = ShardRouter.from_paths({'acme': '/data/acme', 'globex': '/data/globex'},
+                                    shard_for=lambda tenant: tenant)
+    router.write('acme', QueryBuilder().create().node('Person', 'n', {'id': 1, 'name': 'Ann'}))
+    rows = router.execute(QueryBuilder().match().node('Person', 'n').return_literal('n.name AS name')
+                          .order_by('name').limit(10))
+
+The final RETURN of a read is recombined across shards: ORDER BY is kept by a k-way merge of the sorted rows of
+every shard, SKIP and LIMIT apply to the merged rows, and the rows of a RETURN DISTINCT or of an aggregation are
+grouped again, ``count`` and ``sum`` being summed and ``min`` and ``max`` reduced. Other aggregates (``avg``,
+``collect``, ``count(DISTINCT ...)``, expressions of aggregates...) cannot be recombined from the shard results
+and are rejected: return e.g. the sum and the count, and divide them. The clauses before the final RETURN run
+on every shard independently, so an aggregation, a DISTINCT, a SKIP or a LIMIT there is rejected as well.
+
+The shards run on threads: Kuzu releases the GIL while executing a query, and its databases and connections
+cannot be shared with other processes.
+"""
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Union
+
+from .analysis import final_return_index, has_aggregate, is_read_only, split_clauses
+from .execution import ConnectionPool, Executor, run
+from .partitioning import gather, scatter
+
+_PER_SHARD = ('SKIP', 'LIMIT')
+
+
+def stable_shard(key: Any, shards: List[str]) -> str:
+    """Pick the shard of a key by hashing it, the same key always going to the same shard between runs."""
+    digest = hashlib.blake2b(repr(key).encode(), digest_size=8).digest()
+    return shards[int.from_bytes(digest, 'big') % len(shards)]
+
+
+def _check_shardable(query: str):
+    # Only the final RETURN is recombined, the clauses before it must give the same rows split across shards
+    clauses = split_clauses(query)
+    for clause in clauses[:final_return_index(clauses)]:
+        if clause.keyword in _PER_SHARD:
+            raise ValueError(f'Cannot scatter a {clause.keyword} before the final RETURN across shards')
+        if clause.keyword == 'WITH' and (clause.body.upper().startswith('DISTINCT ') or
+                                         has_aggregate(clause.body)):
+            raise ValueError(f'Cannot scatter "WITH {clause.body}" across shards, only the aggregates and DISTINCT '
+                             f'of the final RETURN are recombined')
+
+
+class ShardRouter(Executor):
+    """Route writes to the shard of their key, and scatter-gather reads across every shard."""
+
+    def __init__(self, shards: Dict[str, Any], shard_for: Union[Callable[[Any], str], Dict[Any, str]] = None,
+                 pool_size: int = 4, workers: int = None):
+        """Initialize the router.
+
+        :param shards: The shards keyed by name: ``kuzu.Database`` objects (each one getting a ``ConnectionPool``)
+            or executors, e.g. ``ConnectionPool`` objects
+        :type shards: Dict[str, Any]
+        :param shard_for: The shard name of a key: a callable or a mapping, defaults to None (a stable hash of
+            the key, see ``stable_shard``)
+        :type shard_for: Union[Callable[[Any], str], Dict[Any, str]]
+        :param pool_size: The size of the connection pools of the given databases, defaults to 4
+        :type pool_size: int
+        :param workers: The number of shards queried at once, defaults to None (every shard)
+        :type workers: int
+        """
+        if not shards:
+            raise ValueError('A shard router requires at least one shard')
+        self.shards = {name: shard if hasattr(shard, 'execute') else ConnectionPool(shard, pool_size)
+                       for name, shard in shards.items()}
+        self.shard_for = shard_for
+        self.workers = workers
+
+    @classmethod
+    def from_paths(cls, paths: Dict[str, str], **kwargs) -> 'ShardRouter':
+        """Open the Kuzu database of every shard, from its path keyed by shard name."""
+        import kuzu  # pylint: disable=C0415
+        return cls({name: kuzu.Database(path) for name, path in paths.items()}, **kwargs)
+
+    def shard(self, key: Any) -> str:
+        """Get the name of the shard holding a key."""
+        if self.shard_for is None:
+            return stable_shard(key, list(self.shards))
+        if callable(self.shard_for):
+            name = self.shard_for(key)
+        else:
+            name = self.shard_for.get(key)
+        if name not in self.shards:
+            raise KeyError(f'No shard named {name!r} for the key {key!r}')
+        return name
+
+    def executor(self, key: Any):
+        """Get the executor of the shard holding a key."""
+        return self.shards[self.shard(key)]
+
+    def write(self, key: Any, query, parameters: Dict[str, Any] = None) -> Any:
+        """Execute a query (e.g. a write) on the single shard holding a key, and return its result."""
+        return run(self.executor(key), query, parameters)
+
+    def execute(self, query, parameters: Dict[str, Any] = None, shards: List[str] = None) -> List[Dict[str, Any]]:
+        """Execute a read query on every shard concurrently, and recombine their rows.
+
+        :param query: The read query, ending with a RETURN clause
+        :param parameters: The query parameters, defaults to None
+        :type parameters: Dict[str, Any]
+        :param shards: The names of the shards to query, defaults to None (every shard)
+        :type shards: List[str]
+
+        :return: The recombined rows
+        :rtype: List[Dict[str, Any]]
+        """
+        query = str(query)
+        if not is_read_only(query):
+            raise ValueError('Writes cannot be scattered across shards, route them to a shard with write()')
+        names = list(self.shards) if shards is None else list(shards)
+        unknown = [name for name in names if name not in self.shards]
+        if unknown:
+            raise KeyError(f'Unknown shards: {", ".join(map(repr, unknown))}')
+
+        _check_shardable(query)
+        shard_query, plan = scatter(query)
+        workers = min(len(names), self.workers or len(names)) or 1
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(lambda name: run(self.shards[name], shard_query, parameters), names))
+        return gather(results, *plan)
@@ -0,0 +1,200 @@
+"""A slow-query log, capturing the executions exceeding a latency threshold.
+
+Subscribe a ``SlowQueryLog`` to the instrumentation hooks::
+
+    from cymple.hooks import hooks
+    from cymple.slowlog import SlowQueryLog
+
+    slowlog = hooks.subscribe(SlowQueryLog(threshold=0.5, profile_connection=kuzu.Connection(db),
+                                           path='slow_queries.jsonl'))
+
+Every slow execution is logged with its fingerprint and parameters. When a side connection is given, the
+first slow execution of every read-only query fingerprint is re-run once as ``PROFILE <query>`` and the parsed
+operator tree is stored with the entry (and with the following entries of the fingerprint). Profiling runs on a
+background thread, never on the thread which executed the slow query: the entry is written to the file once its
+plan is known, ``wait()`` waits for the pending profiles.
+"""
+import json
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List
+
+from .analysis import is_read_only, normalize_whitespace
+from .execution import fetch_rows
+from .fingerprint import fingerprint, fingerprint_id
+from .hooks import Observer
+from .plan import parse_plan
+
+_NOT_PROFILED = ('EXPLAIN', 'PROFILE')
+_STOP = object()
+
+
+class SlowQueryLog(Observer):
+    """Keep the slow executions in a bounded ring buffer, optionally mirrored to a rotating JSON lines file."""
+
+    def __init__(self, threshold: float = 1.0, capacity: int = 100, profile_connection=None, path: str = None,
+                 max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5, logger: logging.Logger = None,
+                 max_pending_profiles: int = 16):
+        """Initialize the slow-query log.
+
+        :param threshold: The latency (in seconds) from which an execution is slow, defaults to 1.0
+        :type threshold: float
+        :param capacity: The number of most recent slow executions kept in memory, defaults to 100
+        :type capacity: int
+        :param profile_connection: A connection (e.g. a ``kuzu.Connection``) used to profile the slow read
+            queries, defaults to None (no profiling)
+        :param path: The path of the file the entries are appended to, as JSON lines, defaults to None (no file)
+        :type path: str
+        :param max_bytes: The size from which the file is rotated, defaults to 10 MiB
+        :type max_bytes: int
+        :param backup_count: The number of rotated files kept, defaults to 5
+        :type backup_count: int
+        :param logger: A logger to which a warning is emitted for every slow execution, defaults to None
+        :type logger: logging.Logger
+        :param max_pending_profiles: The number of profiles waiting for the profiling thread, the slow queries of
+            new fingerprints are not profiled when as many are pending, defaults to 16
+        :type max_pending_profiles: int
+        """
+        self.threshold = threshold
+        self.profile_connection = profile_connection
+        self.logger = logger
+        self._entries = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._profiling = threading.local()
+        # The plan of every fingerprint profiled (None while pending or when profiling failed)
+        self._plans: Dict[str, Any] = {}
+        self._pending = queue.Queue(maxsize=max_pending_profiles)
+        self._profiler = None
+        self._sink = None
+        if path is not None:
+            self._sink = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count,
+                                                              encoding='utf-8')
+            self._sink.setFormatter(logging.Formatter('%(message)s'))
+
+    def on_execution_finished(self, query: str, parameters: Dict[str, Any], rows: int, latency: float,
+                              compiling_time: float, execution_time: float):
+        if latency >= self.threshold:
+            self._log(query, parameters, latency, {'rows': rows, 'compiling_time': compiling_time,
+                                                   'execution_time': execution_time})
+
+    def on_execution_failed(self, query: str, parameters: Dict[str, Any], error: Exception, latency: float):
+        if latency >= self.threshold:
+            self._log(query, parameters, latency, {'error': repr(error)})
+
+    def _log(self, query: str, parameters: Dict[str, Any], latency: float, details: Dict[str, Any]):
+        if getattr(self._profiling, 'active', False):
+            # The PROFILE run of a slow query is not a slow query of its own
+            return
+
+        entry = {
+            'time': time.time(),
+            'id': fingerprint_id(query),
+            'fingerprint': fingerprint(query),
+            'query': query,
+            'parameters': parameters,
+            'latency': latency,
+            **details,
+            'plan': None,
+        }
+        pending = False
+        if self.profile_connection is not None and 'error' not in details and self._profilable(query):
+            with self._lock:
+                if entry['id'] in self._plans:
+                    entry['plan'] = self._plans[entry['id']]
+                else:
+                    self._plans[entry['id']] = None
+                    pending = self._enqueue(entry)
+                    if not pending:
+                        # Too many pending profiles, a later execution of the fingerprint may be profiled
+                        del self._plans[entry['id']]
+
+        with self._lock:
+            self._entries.append(entry)
+            if not pending:
+                self._write(entry)
+
+        if self.logger is not None:
+            self.logger.warning('Slow query (%.3fs) %s: %s', latency, entry['id'], query)
+
+    @staticmethod
+    def _profilable(query: str) -> bool:
+        return is_read_only(query) and not normalize_whitespace(query).upper().startswith(_NOT_PROFILED)
+
+    def _enqueue(self, entry: Dict[str, Any]) -> bool:
+        try:
+            self._pending.put_nowait(entry)
+        except queue.Full:
+            return False
+        if self._profiler is None:
+            self._profiler = threading.Thread(target=self._profile_pending, name='cymple-slowlog-profiler',
+                                              daemon=True)
+            self._profiler.start()
+        return True
+
+    def _profile_pending(self):
+        while True:
+            entry = self._pending.get()
+            try:
+                if entry is _STOP:
+                    return
+                plan = self.profile(entry['query'], entry['parameters'])
+                with self._lock:
+                    entry['plan'] = self._plans[entry['id']] = plan
+                    self._write(entry)
+            finally:
+                self._pending.task_done()
+
+    def _write(self, entry: Dict[str, Any]):
+        if self._sink is not None:
+            record = dict(entry, plan=None if entry['plan'] is None else entry['plan'].to_dict())
+            self._sink.handle(logging.makeLogRecord({'msg': json.dumps(record, default=repr)}))
+
+    def wait(self):
+        """Wait until the pending profiles are done."""
+        self._pending.join()
+
+    def profile(self, query: str, parameters: Dict[str, Any] = None):
+        """Run a read-only query as ``PROFILE <query>`` on the side connection.
+
+        :return: The root of the operator tree, None for writes, already profiled/explained queries, or when
+            profiling failed
+        :rtype: PlanNode
+        """
+        if not self._profilable(query):
+            return None
+
+        self._profiling.active = True
+        try:
+            rows = fetch_rows(self.profile_connection.execute(f'PROFILE {query}', parameters or {}))
+            return parse_plan(next(iter(rows[0].values())))
+        except Exception:  # pylint: disable=W0703
+            return None
+        finally:
+            self._profiling.active = False
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """Get the slow executions kept in memory, oldest first."""
+        with self._lock:
+            return list(self._entries)
+
+    def clear(self):
+        """Forget the slow executions kept in memory."""
+        with self._lock:
+            self._entries.clear()
+
+    def close(self):
+        """Stop the profiling thread once the pending profiles are done, and close the file sink."""
+        with self._lock:
+            profiler, self._profiler = self._profiler, None
+        if profiler is not None:
+            self._pending.put(_STOP)
+            profiler.join()
+        if self._sink is not None:
+            self._sink.close()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,193 @@
+"""Per-shape query statistics, in the spirit of PostgreSQL's ``pg_stat_statements``.
+
+Subscribe a ``QueryStats`` registry to the instrumentation hooks to aggregate the executed queries by
+fingerprint::
+
+    from cymple.hooks import hooks
+    from cymple.stats import QueryStats
+
+    stats = hooks.subscribe(QueryStats())
+    ...
+    print(stats.table(limit=10))
+"""
+import json
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Dict, List
+
+from .fingerprint import fingerprint, fingerprint_id
+from .hooks import Observer
+
+SORT_KEYS = ('calls', 'total_time', 'mean_time', 'p50_time', 'p95_time', 'p99_time', 'max_time', 'rows', 'errors')
+
+
+class ShapeStats:
+    """The statistics accumulated for a single query shape."""
+
+    def __init__(self, shape: str, samples: int):
+        """Initialize zeroed statistics.
+
+        :param shape: The fingerprint of the queries
+        :type shape: str
+        :param samples: The number of most recent latencies kept to estimate the percentiles, None for all
+        :type samples: int
+        """
+        self.shape = shape
+        self.id = fingerprint_id(shape)
+        self.calls = 0
+        self.errors = 0
+        self.rows = 0
+        self.total_time = 0.0
+        self.min_time = math.inf
+        self.max_time = 0.0
+        self.latencies = deque(maxlen=samples)
+        self.last_sample = None
+
+    def record(self, query: str, parameters: Dict[str, Any], latency: float, rows: int, error: Exception = None):
+        """Account for one execution of a query of this shape."""
+        self.calls += 1
+        self.errors += error is not None
+        self.rows += rows
+        self.total_time += latency
+        self.min_time = min(self.min_time, latency)
+        self.max_time = max(self.max_time, latency)
+        self.latencies.append(latency)
+        self.last_sample = {'query': query, 'parameters': parameters, 'latency': latency, 'rows': rows,
+                            'error': None if error is None else repr(error), 'time': time.time()}
+
+    def percentile(self, percent: float) -> float:
+        """Estimate a latency percentile (nearest rank) from the most recent latencies."""
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[max(math.ceil(percent / 100 * len(ordered)) - 1, 0)]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the statistics as a JSON serializable dict."""
+        return {
+            'id': self.id,
+            'shape': self.shape,
+            'calls': self.calls,
+            'errors': self.errors,
+            'rows': self.rows,
+            'total_time': self.total_time,
+            'mean_time': self.total_time / self.calls if self.calls else 0.0,
+            'min_time': self.min_time if self.calls else 0.0,
+            'max_time': self.max_time,
+            'p50_time': self.percentile(50),
+            'p95_time': self.percentile(95),
+            'p99_time': self.percentile(99),
+            'last_sample': self.last_sample,
+        }
+
+
+class QueryStats(Observer):
+    """A bounded, thread-safe registry of the statistics of the executed queries, keyed by fingerprint.
+
+    When the registry is full, the shape executed the least recently is evicted to make room for a new one.
+    """
+
+    def __init__(self, max_shapes: int = 1000, samples: int = 1000):
+        """Initialize an empty registry.
+
+        :param max_shapes: The maximal number of shapes tracked, defaults to 1000
+        :type max_shapes: int
+        :param samples: The number of most recent latencies kept per shape for the percentiles, None to keep
+            them all, defaults to 1000
+        :type samples: int
+        """
+        self.max_shapes = max_shapes
+        self.samples = samples
+        self.evictions = 0
+        self._shapes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, query, latency: float, rows: int = 0, parameters: Dict[str, Any] = None,
+               error: Exception = None):
+        """Account for one execution of a query.
+
+        :param query: The executed query (a built query or a string)
+        :param latency: The duration of the execution, in seconds
+        :type latency: float
+        :param rows: The number of rows returned, defaults to 0
+        :type rows: int
+        :param parameters: The query parameters, defaults to None
+        :type parameters: Dict[str, Any]
+        :param error: The exception raised by a failed execution, defaults to None
+        :type error: Exception
+        """
+        query = str(query)
+        shape = fingerprint(query)
+        with self._lock:
+            stats = self._shapes.get(shape)
+            if stats is None:
+                if len(self._shapes) >= self.max_shapes:
+                    self._shapes.popitem(last=False)
+                    self.evictions += 1
+                stats = self._shapes[shape] = ShapeStats(shape, self.samples)
+            else:
+                self._shapes.move_to_end(shape)
+            stats.record(query, parameters or {}, latency, rows, error)
+
+    def on_execution_finished(self, query: str, parameters: Dict[str, Any], rows: int, latency: float,
+                              compiling_time: float, execution_time: float):
+        self.record(query, latency, rows, parameters)
+
+    def on_execution_failed(self, query: str, parameters: Dict[str, Any], error: Exception, latency: float):
+        self.record(query, latency, 0, parameters, error)
+
+    def get(self, query) -> Dict[str, Any]:
+        """Get the statistics of the shape of a query, or None if no such query was recorded."""
+        with self._lock:
+            stats = self._shapes.get(fingerprint(query))
+            return None if stats is None else stats.to_dict()
+
+    def top(self, limit: int = None, sort: str = 'total_time') -> List[Dict[str, Any]]:
+        """Get the statistics of the hottest shapes.
+
+        :param limit: The maximal number of shapes returned, defaults to None (all of them)
+        :type limit: int
+        :param sort: The statistic to sort on, in descending order, one of ``SORT_KEYS``, defaults to "total_time"
+        :type sort: str
+
+        :return: The statistics of every shape, as dicts
+        :rtype: List[Dict[str, Any]]
+        """
+        if sort not in SORT_KEYS:
+            raise ValueError(f'Unknown sort key "{sort}", expected one of {", ".join(SORT_KEYS)}')
+        with self._lock:
+            shapes = [stats.to_dict() for stats in self._shapes.values()]
+        shapes.sort(key=lambda stats: stats[sort], reverse=True)
+        return shapes[:limit]
+
+    def to_json(self, limit: int = None, sort: str = 'total_time', **kwargs) -> str:
+        """Dump the statistics of the hottest shapes as JSON, extra arguments being passed to ``json.dumps``."""
+        return json.dumps(self.top(limit, sort), default=repr, **kwargs)
+
+    def table(self, limit: int = 20, sort: str = 'total_time', width: int = 80) -> str:
+        """Format the statistics of the hottest shapes as a text table, latencies in milliseconds.
+
+        :param width: The maximal width of the shape column, longer shapes being truncated, defaults to 80
+        :type width: int
+        """
+        header = ('id', 'calls', 'errors', 'rows', 'total ms', 'mean ms', 'p99 ms', 'shape')
+        lines = [header]
+        for stats in self.top(limit, sort):
+            shape = stats['shape'] if len(stats['shape']) <= width else stats['shape'][:width - 3] + '...'
+            lines.append((stats['id'], str(stats['calls']), str(stats['errors']), str(stats['rows']),
+                          f'{stats["total_time"] * 1000:.3f}', f'{stats["mean_time"] * 1000:.3f}',
+                          f'{stats["p99_time"] * 1000:.3f}', shape))
+        widths = [max(len(line[column]) for line in lines) for column in range(len(header) - 1)]
+        return '\n'.join('  '.join([cell.rjust(size) for cell, size in zip(line, widths)] + [line[-1]])
+                         for line in lines)
+
+    def reset(self):
+        """Forget every recorded shape."""
+        with self._lock:
+            self._shapes.clear()
+            self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._shapes)
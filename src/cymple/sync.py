@@ -0,0 +1,175 @@
+"""Diff-based synchronization of a node table with the rows it should hold: only what changed is written.
+
+Re-merging every row of a nightly sync rewrites every property of every node, even when almost nothing
+changed. ``sync`` instead reads the current rows in key-ordered pages (keyset pagination), merges them with
+the desired rows sorted by key, and compares the two sides with a content hash per row::
+
+    report = sync(connection, Person, rows, key='id', delete_missing=True)
+    # {'created': 12, 'updated': 40, 'deleted': 3, 'unchanged': 99945, 'properties_set': 52, ...}
+
+Only the nodes which differ are written, through ``BulkWriter`` UNWIND statements: a CREATE per set of
+non-null properties of the new rows, a SET per set of changed properties (so that unchanged properties are
+not rewritten), and a DETACH DELETE for the rows which disappeared. Kuzu has no REMOVE clause, a property
+which became null is set to NULL; nulls are written as literals, never as values of the unwound rows (Kuzu
+cannot type a column of nulls). With ``dry_run=True`` the diff is counted and nothing is written.
+"""
+import hashlib
+import json
+from collections import namedtuple
+from typing import Any, Dict, Iterable, Iterator, List
+
+from .builder import QueryBuilder
+from .bulk import ROWS_PARAMETER, BulkWriter
+from .hydration import hydrate_value
+from .pagination import keyset_pages
+
+Change = namedtuple('Change', ['kind', 'key', 'properties'])
+CREATE = 'create'
+UPDATE = 'update'
+DELETE = 'delete'
+_NODE = 'n'
+_ROW = 'row'
+
+
+def row_hash(row: Dict[str, Any], properties: List[str]) -> str:
+    """Hash the values of the properties of a row, missing properties being nulls."""
+    values = json.dumps([row.get(name) for name in properties], default=str, separators=(',', ':'))
+    return hashlib.blake2b(values.encode(), digest_size=16).hexdigest()
+
+
+def _normalized(row: Dict[str, Any], properties: List[str], types: Dict[str, Any]) -> Dict[str, Any]:
+    # Desired values are converted to the types of the fields (e.g. 1 to 1.0 for a float), as Kuzu returns them
+    return {name: hydrate_value(row.get(name), types.get(name)) for name in properties}
+
+
+def diff_rows(desired: Iterable[Dict[str, Any]], current: Iterable[Dict[str, Any]], key: str, properties: List[str],
+              types: Dict[str, Any] = None, delete_missing: bool = False) -> Iterator[Change]:
+    """Compare desired rows with the current ones, both sorted by key, and yield the changes to make.
+
+    :param desired: The rows the table should hold, sorted by key
+    :type desired: Iterable[Dict[str, Any]]
+    :param current: The rows the table holds, sorted by key
+    :type current: Iterable[Dict[str, Any]]
+    :param key: The key property, unique in both sides
+    :type key: str
+    :param properties: The properties to compare, other than the key
+    :type properties: List[str]
+    :param types: The Python types of the properties desired values are converted to, defaults to None
+    :type types: Dict[str, Any]
+    :param delete_missing: Yield a deletion for the current rows missing from the desired ones, defaults to False
+    :type delete_missing: bool
+
+    :return: A generator of changes: the new rows (all their properties), the updated rows (the changed
+        properties only) and the deleted rows (no property)
+    :rtype: Iterator[Change]
+    """
+    types = types or {}
+    desired = iter(desired)
+    current = iter(current)
+    wanted = next(desired, None)
+    existing = next(current, None)
+    previous = None
+    while wanted is not None or existing is not None:
+        if wanted is not None:
+            if previous is not None and not previous < wanted[key]:
+                raise ValueError(f'The desired rows must have unique keys sorted in ascending order, '
+                                 f'got {wanted[key]!r} after {previous!r}')
+        if existing is None or (wanted is not None and wanted[key] < existing[key]):
+            yield Change(CREATE, wanted[key], _normalized(wanted, properties, types))
+            previous, wanted = wanted[key], next(desired, None)
+        elif wanted is None or existing[key] < wanted[key]:
+            if delete_missing:
+                yield Change(DELETE, existing[key], {})
+            existing = next(current, None)
+        else:
+            values = _normalized(wanted, properties, types)
+            if row_hash(values, properties) != row_hash(existing, properties):
+                yield Change(UPDATE, wanted[key], {name: value for name, value in values.items()
+                                                   if value != existing.get(name)})
+            previous, wanted = wanted[key], next(desired, None)
+            existing = next(current, None)
+
+
+def _statement(kind: str, table: str, key: str, properties: Iterable[str] = (), nulls: Iterable[str] = ()) -> str:
+    unwind = QueryBuilder().cypher(f'UNWIND ${ROWS_PARAMETER} AS {_ROW}')
+    if kind == CREATE:
+        values = {name: f'{_ROW}.{name}' for name in [key, *properties]}
+        return str(unwind.create().node(table, _NODE, values, escape=False))
+    node = unwind.match().node(table, _NODE, {key: f'{_ROW}.{key}'}, escape=False)
+    if kind == DELETE:
+        return str(node.detach_delete(_NODE))
+    values = {f'{_NODE}.{name}': f'{_ROW}.{name}' for name in properties}
+    values.update({f'{_NODE}.{name}': 'NULL' for name in nulls})
+    return str(node.set(values, escape_values=False))
+
+
+def sync(executor, model, rows: Iterable[Dict[str, Any]], key: str, properties: List[str] = None,
+         delete_missing: bool = False, dry_run: bool = False, page_size: int = 10000,
+         writer_options: Dict[str, Any] = None) -> Dict[str, Any]:
+    """Make a node table hold the given rows, writing only the created, changed and deleted nodes.
+
+    :param executor: An object exposing ``execute(query, parameters)``, e.g. a ``kuzu.Connection``, a
+        ``ConnectionPool`` or a ``WriteQueue``
+    :param model: The ``TableModel`` of the table, or the name of the table (the properties being given)
+    :param rows: The desired rows, keyed by property name (a missing property is a null)
+    :type rows: Iterable[Dict[str, Any]]
+    :param key: The primary key property
+    :type key: str
+    :param properties: The properties to synchronize, defaults to None (every field of the model)
+    :type properties: List[str]
+    :param delete_missing: Delete the nodes missing from the rows, defaults to False
+    :type delete_missing: bool
+    :param dry_run: Only compute the diff, without writing anything, defaults to False
+    :type dry_run: bool
+    :param page_size: The number of current rows fetched per page, defaults to 10000
+    :type page_size: int
+    :param writer_options: Keyword arguments of the ``BulkWriter`` of every statement, defaults to None
+    :type writer_options: Dict[str, Any]
+
+    :return: The number of created, updated, deleted and unchanged rows, of properties set and set to null
+        (a REMOVE), of statements (executed, or to execute for a dry run) and the metrics of their writers
+    :rtype: Dict[str, Any]
+    """
+    if isinstance(model, str):
+        if properties is None:
+            raise ValueError(f'The properties to synchronize must be given along with the table name "{model}"')
+        table, types = model, {}
+    else:
+        table, types = repr(model), dict(getattr(model, '__annotations__', {}))
+    properties = [name for name in (properties or types) if name != key]
+
+    rows = list(rows)
+    missing = [row for row in rows if row.get(key) is None]
+    if missing:
+        raise ValueError(f'Every row needs a value of the key "{key}", got {missing[0]!r}')
+    rows.sort(key=lambda row: row[key])
+
+    columns = [key, *properties]
+    read = QueryBuilder().match().node(table, _NODE) \
+        .return_literal(', '.join(f'{_NODE}.{name} AS {name}' for name in columns))
+    current = (row for page in keyset_pages(executor, read, f'{_NODE}.{key}', page_size) for row in page)
+
+    report = {'created': 0, 'updated': 0, 'deleted': 0, 'unchanged': 0, 'properties_set': 0,
+              'properties_removed': 0, 'statements': 0, 'dry_run': dry_run, 'writers': {}}
+    writes: Dict[tuple, List[Dict[str, Any]]] = {}
+    for change in diff_rows(rows, current, key, properties, types, delete_missing):
+        values = {name: value for name, value in change.properties.items() if value is not None}
+        nulls = tuple(name for name, value in change.properties.items() if value is None)
+        if change.kind == CREATE:
+            report['created'] += 1
+            nulls = ()
+        elif change.kind == UPDATE:
+            report['updated'] += 1
+            report['properties_set'] += len(change.properties)
+            report['properties_removed'] += len(nulls)
+        else:
+            report['deleted'] += 1
+        writes.setdefault((change.kind, tuple(values), nulls), []).append({key: change.key, **values})
+    report['unchanged'] = len(rows) - report['created'] - report['updated']
+    report['statements'] = len(writes)
+
+    if not dry_run:
+        for (kind, changed, nulls), batch in writes.items():
+            statement = _statement(kind, table, key, changed, nulls)
+            report['writers'][statement] = BulkWriter(executor, statement, **(writer_options or {})).write(batch)
+    return report
@@ -1,11 +1,15 @@
 import re
+from typing import List
+
+from .analysis import split_clauses
+from .typedefs import Properties
 
 class ExpressionMixin:
     def __formatted__(self, other):
         if isinstance(other, ExpressionMixin):
             return other
         elif isinstance(other, str) and self._type == str:  # noqa: E721
-            return f"'{other}'"
+            return Literal(other)
         return other
     
     def __add__(self, other): return Expr(self, '+', self.__formatted__(other), self._type)
@@ -24,6 +28,41 @@ class ExpressionMixin:
     def __ne__(self, other): return Expr(self, '<>', self.__formatted__(other),self._type)
     def __and__(self, other): return Expr(self, 'AND', self.__formatted__(other),self._type)
     def __or__(self, other): return Expr(self, 'OR', self.__formatted__(other),self._type)
+    def __invert__(self): return Unary('NOT', self, bool)
+
+    def is_in(self, values): return Expr(self, 'IN', _literal(values), bool)
+    def is_null(self): return Unary('IS NULL', self, bool, postfix=True)
+    def is_not_null(self): return Unary('IS NOT NULL', self, bool, postfix=True)
+    def starts_with(self, prefix): return Expr(self, 'STARTS WITH', _literal(prefix), bool)
+    def ends_with(self, suffix): return Expr(self, 'ENDS WITH', _literal(suffix), bool)
+    def contains(self, substring): return Expr(self, 'CONTAINS', _literal(substring), bool)
+    def matches(self, pattern): return Expr(self, '=~', _literal(pattern), bool)
+    def list_contains(self, value): return Function('list_contains', (self, value), bool)
+
+    def count(self, distinct: bool = False): return Aggregate('count', self, int, distinct)
+    def sum(self): return Aggregate('sum', self, self._type)
+    def avg(self): return Aggregate('avg', self, float)
+    def min(self): return Aggregate('min', self, self._type)
+    def max(self): return Aggregate('max', self, self._type)
+    def collect(self, distinct: bool = False):
+        return Aggregate('collect', self, List[self._type] if self._type is not None else list, distinct)
+
+    def evaluate(self, columns, backend: str = 'auto', parameters: dict = None):
+        """Evaluate the expression over columns keyed by field name (see ``cymple.evaluation``), compiling it once."""
+        from .evaluation import compile_expression  # pylint: disable=C0415
+        compiled = self.__dict__.setdefault('_compiled', {})
+        if backend not in compiled:
+            compiled[backend] = compile_expression(self, backend)
+        return compiled[backend](columns, parameters)
+
+    def filter(self, rows: list, backend: str = 'auto', parameters: dict = None) -> list:
+        """Keep the rows (e.g. cached query results, keyed by "n.age"-like columns) the expression holds for."""
+        from .evaluation import rows_to_columns  # pylint: disable=C0415
+        if not rows:
+            return []
+        mask = self.evaluate(rows_to_columns(rows), backend, parameters)
+        return [row for row, keep in zip(rows, mask) if keep is not None and bool(keep)]
+
 
 class Expr(ExpressionMixin):
     def __init__(self, left, op, right, type):
@@ -35,7 +74,161 @@ class Expr(ExpressionMixin):
     def __repr__(self):
         return f"({self.left} {self.op} {self.right})"
 
-    
+
+class Unary(ExpressionMixin):
+    """A prefix (NOT) or postfix (IS NULL, IS NOT NULL) operator applied to an expression."""
+
+    def __init__(self, op, operand, type_, postfix=False):
+        self.op = op
+        self.operand = operand
+        self.postfix = postfix
+        self._type = type_
+
+    def __repr__(self):
+        return f"({self.operand} {self.op})" if self.postfix else f"({self.op} {self.operand})"
+
+
+class Literal:
+    """A Python value rendered as a Cypher literal: strings are quoted and escaped, None is NULL, lists are
+    rendered item by item."""
+
+    def __init__(self, value):
+        self.value = value
+
+    def __str__(self):
+        if isinstance(self.value, str):
+            return f"'{Properties._escape(self.value)}'"
+        if self.value is None:
+            return 'NULL'
+        if isinstance(self.value, (list, tuple)):
+            return f"[{', '.join(str(_literal(item)) for item in self.value)}]"
+        return str(self.value)
+
+    def __repr__(self):
+        return str(self)
+
+
+def _literal(value):
+    return value if isinstance(value, (ExpressionMixin, Literal)) else Literal(value)
+
+
+class Parameter(ExpressionMixin):
+    """A query parameter, rendered as ``$name`` and given with the parameters of the query."""
+
+    def __init__(self, name: str, type_: type = None):
+        self.name = name
+        self._type = type_
+
+    def __str__(self):
+        return f"${self.name}"
+
+    def __repr__(self):
+        return str(self)
+
+
+def param(name: str, type_: type = None) -> Parameter:
+    """A ``$name`` query parameter, e.g. ``n.id.is_in(param('ids'))``, keeping the query text constant."""
+    return Parameter(name, type_)
+
+
+class Function(ExpressionMixin):
+    """A function call, its arguments being expressions, parameters or Python values (rendered as literals)."""
+
+    def __init__(self, name: str, arguments, type_: type = None):
+        self.name = name
+        self.arguments = tuple(_literal(argument) for argument in arguments)
+        self._type = type_
+
+    def __repr__(self):
+        return f"{self.name}({', '.join(str(argument) for argument in self.arguments)})"
+
+
+class Aggregate(ExpressionMixin):
+    """An aggregate function over the rows of a group, e.g. ``n.amount.sum()`` or ``n.id.count(distinct=True)``."""
+
+    def __init__(self, name: str, argument, type_: type, distinct: bool = False):
+        self.name = name
+        self.argument = argument
+        self.distinct = distinct
+        self._type = type_
+
+    def __repr__(self):
+        return f"{self.name}({'DISTINCT ' if self.distinct else ''}{self.argument})"
+
+
+def count_all() -> Aggregate:
+    """The ``count(*)`` aggregate, the number of rows of a group."""
+    return Aggregate('count', '*', int)
+
+
+def contains_aggregate(expression) -> bool:
+    """Whether an expression aggregates rows, i.e. has an aggregate function in its tree."""
+    if isinstance(expression, Aggregate):
+        return True
+    if isinstance(expression, Expr):
+        return contains_aggregate(expression.left) or contains_aggregate(expression.right)
+    if isinstance(expression, Unary):
+        return contains_aggregate(expression.operand)
+    if isinstance(expression, Function):
+        return any(contains_aggregate(argument) for argument in expression.arguments)
+    return False
+
+
+class _Functions:
+    """Function calls built by attribute access, e.g. ``F.lower(m.name)`` or ``F.date_part('year', m.born)``.
+    The type of the result is the one of the first expression argument, unless given as ``type_``."""
+
+    def __getattr__(self, name: str):
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        def call(*arguments, type_: type = None) -> Function:
+            if type_ is None:
+                type_ = next((argument._type for argument in arguments if isinstance(argument, ExpressionMixin)),
+                             None)
+            return Function(name, arguments, type_)
+        return call
+
+
+F = _Functions()
+
+
+class Subquery(ExpressionMixin):
+    """An EXISTS or COUNT subquery, rendered from a nested builder chain, e.g.
+    ``exists(QueryBuilder().match().node(ref_name='n').related_to('Has').node('Finding', 'f'))``."""
+
+    def __init__(self, keyword: str, query, type_):
+        keywords = [clause.keyword for clause in split_clauses(query)]
+        if not keywords or keywords[0] != 'MATCH':
+            raise ValueError(f'A {keyword} subquery must start with a MATCH clause')
+        if 'RETURN' in keywords:
+            raise ValueError(f'A {keyword} subquery cannot have a RETURN clause')
+        self.keyword = keyword
+        self.query = query
+        self._type = type_
+
+    def __invert__(self):
+        if self.keyword != 'EXISTS':
+            raise TypeError(f'A {self.keyword} subquery cannot be negated')
+        return Subquery('NOT EXISTS', self.query, bool)
+
+    def __str__(self):
+        return f"{self.keyword} {{ {str(self.query).strip()} }}"
+
+    def __repr__(self):
+        return str(self)
+
+
+def exists(query) -> Subquery:
+    """An ``EXISTS { MATCH ... }`` subquery, true when the nested pattern has a match (negate it with ``~``)."""
+    return Subquery('EXISTS', query, bool)
+
+
+def count(query) -> Subquery:
+    """A ``COUNT { MATCH ... }`` subquery, the number of matches of the nested pattern."""
+    return Subquery('COUNT', query, int)
+
+
 class Field(ExpressionMixin):
     def __init__(self, name: str, type_: type, alias=None):
         self._name = name
@@ -72,8 +265,9 @@ class TableModel(metaclass=TableModelMeta):
     __alias__: str = None
 
     def __repr__(self):
-        
-        return self.__alias__ if self.__alias__ is not None else re.sub(r'([a-z])([A-Z])', r'\1_\2', self.__class__.__name__).upper()
+        if self.__alias__ is not None:
+            return self.__alias__
+        return re.sub(r'([a-z])([A-Z])', r'\1_\2', self.__class__.__name__).upper()
 
     def __init__(self, alias: str = None):
         self.__alias__ = alias
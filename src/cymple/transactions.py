@@ -0,0 +1,210 @@
+"""Explicit transactions, and units of work committing queued writes together.
+
+Executed one by one, every write query is its own auto-committed transaction. A transaction groups them in
+a single commit, rolled back as a whole on failure::
+
+    with session.transaction() as transaction:
+        transaction.execute(QueryBuilder().match().node('Account', 'a', {'id': 1}).set({'a.balance': 10}))
+        transaction.execute(QueryBuilder().match().node('Account', 'a', {'id': 2}).set({'a.balance': 20}))
+
+A ``UnitOfWork`` goes further: it queues built write queries and, when flushed, turns the literals of each
+one into parameters (see ``fingerprint.parameterize``) so that consecutive writes of a same shape become a
+single ``UNWIND $rows AS _row ...`` statement, and commits every statement in one transaction. The order of the
+writes is kept, unless they are independent and ``reorder=True`` groups every write of a shape together. A
+flush failing on a write-write conflict is rolled back and retried.
+"""
+import re
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set
+
+from .analysis import is_ddl, query_labels, split_clauses
+from .bulk import ROWS_PARAMETER
+from .execution import ConnectionPool, Executor, run
+from .fingerprint import parameterize
+
+ROW_VARIABLE = '_row'
+_PARAMETER = re.compile(r'\$(\w+)')
+_CONFLICTS = ('conflict', 'cannot start a new write transaction')
+_UNBATCHABLE = {'CALL', 'RETURN', 'UNION', 'UNION ALL', 'WITH', 'SKIP', 'LIMIT'}
+
+
+def is_write_conflict(error: Exception) -> bool:
+    """Whether an error is a conflict with a concurrent write transaction, worth retrying."""
+    message = str(error).lower()
+    return any(conflict in message for conflict in _CONFLICTS)
+
+
+class Transaction(Executor):
+    """An explicit transaction, executing queries on a single connection until it is committed or rolled back."""
+
+    def __init__(self, connection):
+        """Initialize the transaction, already begun on the connection.
+
+        :param connection: The connection the transaction runs on, e.g. a ``kuzu.Connection``
+        """
+        self.connection = connection
+        self.queries = 0
+        self.written_labels: Optional[Set[str]] = set()
+
+    def execute(self, query, parameters: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+        """Execute a query within the transaction and return its rows."""
+        rows = run(self.connection, query, parameters)
+        self.queries += 1
+        written = query_labels(str(query)).written
+        # None stands for labels which cannot be determined
+        if written is None or self.written_labels is None:
+            self.written_labels = None
+        else:
+            self.written_labels |= written
+        return rows
+
+
+@contextmanager
+def _connection(executor):
+    if isinstance(executor, ConnectionPool):
+        with executor.connection() as connection:
+            yield connection
+    else:
+        yield executor
+
+
+@contextmanager
+def transaction(executor, on_commit: Callable[[Transaction], None] = None) -> Iterator[Transaction]:
+    """Run the queries of a with block in a single transaction, committed at the end of the block or rolled
+    back when it raises.
+
+    :param executor: A ``kuzu.Connection``, or a ``ConnectionPool`` (a connection being borrowed for the
+        duration of the transaction)
+    :param on_commit: A callable receiving the transaction once committed, defaults to None
+    :type on_commit: Callable[[Transaction], None]
+
+    :return: A context manager giving the ``Transaction``, an executor
+    """
+    with _connection(executor) as connection:
+        run(connection, 'BEGIN TRANSACTION')
+        current = Transaction(connection)
+        try:
+            yield current
+        except BaseException:
+            try:
+                run(connection, 'ROLLBACK')
+            except Exception:  # pylint: disable=W0703
+                pass
+            raise
+        run(connection, 'COMMIT')
+    if on_commit is not None:
+        on_commit(current)
+
+
+def _batchable(query: str) -> bool:
+    # Schema changes, procedure calls and queries returning rows are executed as they are. The UNWIND row goes out
+    # of scope after a WITH, and SKIP/LIMIT take no row property
+    keywords = {clause.keyword for clause in split_clauses(query)}
+    return not is_ddl(query) and not keywords & _UNBATCHABLE
+
+
+class UnitOfWork:
+    """Queue write queries and commit them together, consecutive writes of a same shape as UNWIND batches."""
+
+    def __init__(self, executor, retries: int = 3, backoff: float = 0.05,
+                 retry_on: Callable[[Exception], bool] = is_write_conflict, reorder: bool = False):
+        """Initialize an empty unit of work.
+
+        :param executor: A ``Session``, a ``ConnectionPool`` or a ``kuzu.Connection``
+        :param retries: The number of times a flush failing with a retried error is replayed, defaults to 3
+        :type retries: int
+        :param backoff: The delay before the first retry, in seconds, doubled for each following one,
+            defaults to 0.05
+        :type backoff: float
+        :param retry_on: Whether a flush failing with an error is retried, defaults to ``is_write_conflict``
+        :type retry_on: Callable[[Exception], bool]
+        :param reorder: Batch every write of a same shape together, even when other writes are queued in between
+            (the writes being independent), defaults to False (only consecutive writes are batched)
+        :type reorder: bool
+        """
+        self.executor = executor
+        self.retries = retries
+        self.backoff = backoff
+        self.retry_on = retry_on
+        self.reorder = reorder
+        self._queued = []
+
+    def add(self, query, parameters: Dict[str, Any] = None) -> 'UnitOfWork':
+        """Queue a write query, executed by the next flush."""
+        self._queued.append((str(query), dict(parameters or {})))
+        return self
+
+    def __len__(self):
+        return len(self._queued)
+
+    def clear(self):
+        """Discard the queued writes."""
+        self._queued = []
+
+    def statements(self) -> List[tuple]:
+        """Get the (query, parameters) statements a flush executes, in order."""
+        groups = []
+        by_template = {}
+        for query, parameters in self._queued:
+            template = None
+            if _batchable(query):
+                template, values = parameterize(query)
+                used = set(_PARAMETER.findall(template))
+                row = {**values, **{name: value for name, value in parameters.items() if name in used}}
+            group = by_template.get(template) if self.reorder else (groups[-1] if groups else None)
+            if template is not None and group is not None and group[0] == template:
+                group[2].append(row)
+                continue
+            group = (template, (query, parameters), [row] if template is not None else [])
+            groups.append(group)
+            if template is not None:
+                by_template[template] = group
+
+        statements = []
+        for template, original, rows in groups:
+            if len(rows) <= 1:
+                statements.append(original)
+            else:
+                body = _PARAMETER.sub(lambda match: f'{ROW_VARIABLE}.{match.group(1)}', template)
+                statements.append((f'UNWIND ${ROWS_PARAMETER} AS {ROW_VARIABLE} {body}', {ROWS_PARAMETER: rows}))
+        return statements
+
+    def _transaction(self):
+        if hasattr(self.executor, 'transaction'):
+            return self.executor.transaction()
+        return transaction(self.executor)
+
+    def flush(self) -> Dict[str, Any]:
+        """Execute the queued writes in a single transaction, retrying it on the errors to retry.
+
+        :return: The number of queued writes, of executed statements and of attempts
+        :rtype: Dict[str, Any]
+        """
+        statements = self.statements()
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                if statements:
+                    with self._transaction() as current:
+                        for query, parameters in statements:
+                            current.execute(query, parameters)
+                break
+            except Exception as error:  # pylint: disable=W0703
+                if attempt > self.retries or not self.retry_on(error):
+                    raise
+                time.sleep(self.backoff * 2 ** (attempt - 1))
+
+        report = {'writes': len(self._queued), 'statements': len(statements), 'attempts': attempt}
+        self.clear()
+        return report
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, error_type, *args):
+        if error_type is None:
+            self.flush()
+        else:
+            self.clear()
@@ -1,8 +1,11 @@
 """Cymple's API type definitions."""
+import time
 from collections import namedtuple
 from typing import Any, List
 from dataclasses import dataclass
 
+from .hooks import hooks
+
 Mapping = namedtuple('Mapping', ['ref_name', 'returned_name'], defaults=(None, None))
 
 
@@ -28,8 +31,13 @@ class Properties(dict):
 
     def to_str(self, comparison_operator: str = ':', boolean_operator: str = ', ', escape: bool = True) -> str:
         """Convert this Properties dicionarty to a serialied string suitable for a cypher query"""
+        # Observers may subscribe meanwhile, hooks are checked once
+        observed = bool(hooks)
+        start = time.perf_counter() if observed else None
         pairs = [f'{key} {comparison_operator} {Properties._format_value(value, escape)}' for key, value in self.items()]
         res = boolean_operator.join(pairs)
+        if observed:
+            hooks.emit('properties_formatted', size=len(self), duration=time.perf_counter() - start)
         return res
 
     def __str__(self) -> str:
@@ -0,0 +1,214 @@
+"""Recording of the executed queries, and replay of a recorded workload for load testing.
+
+Subscribe a ``WorkloadRecorder`` to the instrumentation hooks to append every executed query to a log,
+one compact JSON object per line (gzip compressed when the path ends with ".gz")::
+
+    {"t": 1700000000.123, "f": "9f86d081884c7d65", "q": "MATCH ...", "p": {"id": 1}, "l": 0.0042}
+
+The log is replayed with ``replay`` or ``python -m cymple replay``, e.g. against a copy of the production
+database. Note that a replay re-executes the recorded writes too, and that parameters which are not JSON
+serializable are recorded as strings.
+
+Transaction control statements (BEGIN TRANSACTION, COMMIT, ROLLBACK) are not recorded: the queries are replayed
+concurrently on pooled connections, each one in its own transaction.
+"""
+import gzip
+import json
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator
+
+from .analysis import is_transaction_control
+from .execution import run
+from .fingerprint import fingerprint_id
+from .hooks import Observer
+from .stats import QueryStats, ShapeStats
+
+Record = namedtuple('Record', ['time', 'fingerprint', 'query', 'parameters', 'latency', 'error'])
+
+
+def _open(path: str, mode: str):
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+class WorkloadRecorder(Observer):
+    """Append every executed query to an append-only workload log."""
+
+    def __init__(self, path: str, flush_every: int = 100):
+        """Open the log for appending.
+
+        :param path: The path of the log, gzip compressed when ending with ".gz"
+        :type path: str
+        :param flush_every: The number of records after which the log is flushed, defaults to 100
+        :type flush_every: int
+        """
+        self.path = path
+        self.flush_every = flush_every
+        self.records = 0
+        self._file = _open(path, 'a')
+        self._lock = threading.Lock()
+
+    def record(self, query: str, parameters: Dict[str, Any], latency: float, error: Exception = None):
+        """Append the execution of a query to the log, transaction control statements being skipped."""
+        if is_transaction_control(query):
+            return
+        record = {'t': round(time.time(), 6), 'f': fingerprint_id(query), 'q': query, 'p': parameters or {},
+                  'l': round(latency, 6)}
+        if error is not None:
+            record['e'] = repr(error)
+        line = json.dumps(record, separators=(',', ':'), default=str)
+        with self._lock:
+            self._file.write(line + '\n')
+            self.records += 1
+            if self.records % self.flush_every == 0:
+                self._file.flush()
+
+    def on_execution_finished(self, query: str, parameters: Dict[str, Any], rows: int, latency: float,
+                              compiling_time: float, execution_time: float):
+        self.record(query, parameters, latency)
+
+    def on_execution_failed(self, query: str, parameters: Dict[str, Any], error: Exception, latency: float):
+        self.record(query, parameters, latency, error)
+
+    def close(self):
+        """Flush and close the log."""
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def read_workload(path: str) -> Iterator[Record]:
+    """Read the records of a workload log, in order.
+
+    :param path: The path of the log, gzip compressed when ending with ".gz"
+    :type path: str
+
+    :return: A generator of records
+    """
+    with _open(path, 'r') as log:
+        for line in log:
+            if line.strip():
+                record = json.loads(line)
+                yield Record(record['t'], record['f'], record['q'], record['p'], record['l'], record.get('e'))
+
+
+class ReplayReport:
+    """The throughput, latencies and errors measured while replaying a workload."""
+
+    def __init__(self, stats: QueryStats, overall: ShapeStats, duration: float):
+        """Initialize the report.
+
+        :param stats: The statistics of the replayed queries, by fingerprint
+        :type stats: QueryStats
+        :param overall: The statistics of every replayed query
+        :type overall: ShapeStats
+        :param duration: The wall-clock duration of the replay, in seconds
+        :type duration: float
+        """
+        self.stats = stats
+        self.overall = overall
+        self.duration = duration
+
+    @property
+    def throughput(self) -> float:
+        """The number of queries completed per second."""
+        return self.overall.calls / self.duration if self.duration else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the report as a JSON serializable dict."""
+        overall = self.overall.to_dict()
+        return {
+            'queries': overall['calls'],
+            'errors': overall['errors'],
+            'duration': self.duration,
+            'throughput': self.throughput,
+            'latency': {key: overall[f'{key}_time'] for key in ('mean', 'p50', 'p95', 'p99', 'max')},
+            'fingerprints': [{key: shape[key] for key in shape if key != 'last_sample'}
+                             for shape in self.stats.top(sort='calls')],
+        }
+
+    def table(self, width: int = 80) -> str:
+        """Format the report as text, latencies in milliseconds."""
+        report = self.to_dict()
+        latency = ', '.join(f'{key} {value * 1000:.3f}' for key, value in report['latency'].items())
+        lines = [f'{report["queries"]} queries, {report["errors"]} errors in {self.duration:.3f}s '
+                 f'({self.throughput:.1f} queries/s)', f'latency (ms): {latency}', '']
+        rows = [('id', 'calls', 'errors', 'p50 ms', 'p95 ms', 'p99 ms', 'shape')]
+        for shape in report['fingerprints']:
+            text = shape['shape'] if len(shape['shape']) <= width else shape['shape'][:width - 3] + '...'
+            rows.append((shape['id'], str(shape['calls']), str(shape['errors']), f'{shape["p50_time"] * 1000:.3f}',
+                         f'{shape["p95_time"] * 1000:.3f}', f'{shape["p99_time"] * 1000:.3f}', text))
+        widths = [max(len(row[column]) for row in rows) for column in range(len(rows[0]) - 1)]
+        lines.extend('  '.join([cell.rjust(size) for cell, size in zip(row, widths)] + [row[-1]]) for row in rows)
+        return '\n'.join(lines)
+
+
+def replay(records: Iterable[Record], executor, concurrency: int = 4, speedup: float = 1.0) -> ReplayReport:
+    """Re-issue a recorded workload, preserving the original pacing scaled by a speed-up factor.
+
+    :param records: The records to replay, in order, e.g. ``read_workload(path)``
+    :type records: Iterable[Record]
+    :param executor: A thread-safe executor, e.g. a ``ConnectionPool`` of at least ``concurrency`` connections
+    :param concurrency: The maximal number of queries in flight, defaults to 4
+    :type concurrency: int
+    :param speedup: The factor the original inter-arrival times are divided by, 0 to replay as fast as
+        possible, defaults to 1.0
+    :type speedup: float
+
+    :return: The report of the replay
+    :rtype: ReplayReport
+    """
+    stats = QueryStats(max_shapes=2 ** 31, samples=None)
+    overall = ShapeStats('', None)
+    lock = threading.Lock()
+
+    def execute(record: Record):
+        start = time.perf_counter()
+        error = None
+        rows = []
+        try:
+            rows = run(executor, record.query, record.parameters)
+        except Exception as failure:  # pylint: disable=W0703
+            error = failure
+        latency = time.perf_counter() - start
+        stats.record(record.query, latency, len(rows), record.parameters, error)
+        with lock:
+            overall.record(record.query, record.parameters, latency, len(rows), error)
+
+    start = time.perf_counter()
+    first = None
+    with ThreadPoolExecutor(concurrency, thread_name_prefix='cymple-replay') as pool:
+        for record in records:
+            if is_transaction_control(record.query):
+                continue
+            first = record.time if first is None else first
+            if speedup:
+                delay = start + (record.time - first) / speedup - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            pool.submit(execute, record)
+
+    return ReplayReport(stats, overall, time.perf_counter() - start)
+
+
+def main(arguments) -> int:
+    """Run the ``python -m cymple replay`` command, returning its exit status.
+
+    :param arguments: The parsed command line arguments (workload, database, concurrency, speedup, json)
+    """
+    import kuzu  # pylint: disable=C0415
+    from .execution import ConnectionPool  # pylint: disable=C0415
+
+    pool = ConnectionPool(kuzu.Database(arguments.database), size=arguments.concurrency)
+    report = replay(read_workload(arguments.workload), pool, arguments.concurrency, arguments.speedup)
+    print(json.dumps(report.to_dict(), indent=2) if arguments.json else report.table())
+    return 0
@@ -0,0 +1,144 @@
+"""A single-writer queue, serializing writes on one connection.
+
+Kuzu runs many read transactions concurrently but a single write transaction at a time. Funnelling
+writes through one connection avoids write-write conflicts, and committing consecutive queued writes
+in one transaction amortizes the commit cost.
+"""
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, Dict, List
+
+from .analysis import is_ddl
+from .execution import Executor, run
+
+_STOP = object()
+
+
+class WriteQueue(Executor):
+    """Execute write queries in order on a dedicated connection, from a background thread."""
+
+    def __init__(self, connection, max_batch: int = 64):
+        """Initialize the queue and start its writer thread.
+
+        :param connection: The connection dedicated to writes, e.g. a ``kuzu.Connection``
+        :param max_batch: The maximal number of queued writes committed in a single transaction, defaults to 64
+        :type max_batch: int
+        """
+        self.connection = connection
+        self.max_batch = max_batch
+        self.transactions = 0
+        self.writes = 0
+        self.failed = 0
+        self._queue = queue.Queue()
+        self._closed = False
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._work, name='cymple-writer', daemon=True)
+        self._thread.start()
+
+    def submit(self, query, parameters: Dict[str, Any] = None) -> Future:
+        """Queue a write query.
+
+        :return: A future resolved with the rows of the query once its transaction is committed (a future
+            cancelled before its write starts is skipped)
+        :rtype: Future
+        """
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError('Cannot submit a write to a closed WriteQueue')
+            self._queue.put((str(query), parameters or {}, future))
+        return future
+
+    def execute(self, query, parameters: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+        """Queue a write query and wait for its rows."""
+        return self.submit(query, parameters).result()
+
+    def close(self):
+        """Stop the writer thread, once the already queued writes are committed."""
+        with self._lock:
+            if not self._closed:
+                self._closed = True
+                self._queue.put(_STOP)
+        self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _next_batch(self, first) -> tuple:
+        batch = [first]
+        pending = None
+        # Schema changes are committed on their own, everything else is batched with its neighbours
+        while len(batch) < self.max_batch and not is_ddl(batch[0][0]):
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP or is_ddl(item[0]):
+                pending = item
+                break
+            batch.append(item)
+        return batch, pending
+
+    def _work(self):
+        pending = None
+        while True:
+            item = pending if pending is not None else self._queue.get()
+            if item is _STOP:
+                return
+            batch, pending = self._next_batch(item)
+            # Writes whose future was cancelled while queued are skipped, the others can no longer be cancelled
+            batch = [item for item in batch if item[2].set_running_or_notify_cancel()]
+            try:
+                self._commit(batch)
+            except Exception as error:  # pylint: disable=W0703
+                # The writer thread must survive anything, or every following write would wait forever
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(error)
+
+    def _run_alone(self, query: str, parameters: Dict[str, Any], future: Future):
+        try:
+            rows = run(self.connection, query, parameters)
+        except Exception as error:  # pylint: disable=W0703
+            self.failed += 1
+            future.set_exception(error)
+            return
+        self.transactions += 1
+        self.writes += 1
+        future.set_result(rows)
+
+    def _commit(self, batch: List[tuple]):
+        if not batch:
+            return
+        if len(batch) == 1:
+            self._run_alone(*batch[0])
+            return
+
+        try:
+            run(self.connection, 'BEGIN TRANSACTION')
+            results = [run(self.connection, query, parameters) for query, parameters, _ in batch]
+            run(self.connection, 'COMMIT')
+        except Exception:  # pylint: disable=W0703
+            try:
+                run(self.connection, 'ROLLBACK')
+            except Exception:  # pylint: disable=W0703
+                pass
+            # Replay the writes one by one, so that a single failing write only fails its own caller
+            for item in batch:
+                self._run_alone(*item)
+            return
+
+        self.transactions += 1
+        self.writes += len(batch)
+        for (_, _, future), rows in zip(batch, results):
+            future.set_result(rows)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """The number of committed writes and transactions, and of failed writes."""
+        return {'writes': self.writes, 'transactions': self.transactions, 'failed': self.failed,
+                'queued': self._queue.qsize()}
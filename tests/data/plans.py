@@ -0,0 +1,116 @@
+"""Plans rendered by Kuzu for the query plan tests."""
+
+# PROFILE MATCH (a:P), (x:P) WHERE a.id=1 RETURN a.name, x.name
+PROFILE_PLAN = """\
+┌────────────────────────────────────┐
+│┌──────────────────────────────────┐│
+││          Physical Plan           ││
+│└──────────────────────────────────┘│
+└────────────────────────────────────┘
+┌────────────────────────────────────┐
+│             PROFILE[6]             │
+│   ------------------------------   │
+│   ------------------------------   │
+│         NumOutputTuples: 0         │
+│   ------------------------------   │
+│      ExecutionTime: 0.000000       │
+└─────────────────┬──────────────────┘
+┌─────────────────┴──────────────────┐
+│        RESULT_COLLECTOR[5]         │
+│   ------------------------------   │
+│        Expressions: a.name         │
+│               x.name               │
+│   ------------------------------   │
+│         NumOutputTuples: 2         │
+│   ------------------------------   │
+│      ExecutionTime: 0.514000       │
+└─────────────────┬──────────────────┘
+┌─────────────────┴──────────────────┐
+│           PROJECTION[4]            │
+│   ------------------------------   │
+│        Expressions: a.name         │
+│               x.name               │
+│   ------------------------------   │
+│         NumOutputTuples: 2         │
+│   ------------------------------   │
+│      ExecutionTime: 0.002000       │
+└─────────────────┬──────────────────┘
+┌─────────────────┴──────────────────┐
+│          CROSS_PRODUCT[3]          │
+│   ------------------------------   │
+│   ------------------------------   │
+│         NumOutputTuples: 1         │───────────────────┐
+│   ------------------------------   │                   │
+│      ExecutionTime: 0.009000       │                   │
+└─────────────────┬──────────────────┘                   │
+┌─────────────────┴──────────────────┐ ┌─────────────────┴──────────────────┐
+│   PRIMARY_KEY_SCAN_NODE_TABLE[2]   │ │        RESULT_COLLECTOR[1]         │
+│   ------------------------------   │ │   ------------------------------   │
+│               Key: 1               │ │         Expressions: x._ID         │
+│              Alias: a              │ │               x.name               │
+│         Expressions: a.name        │ │   ------------------------------   │
+│                a.id                │ │         NumOutputTuples: 2         │
+│   ------------------------------   │ │   ------------------------------   │
+│         NumOutputTuples: 1         │ │      ExecutionTime: 0.267000       │
+│   ------------------------------   │ │                                    │
+│      ExecutionTime: 0.054000       │ │                                    │
+└────────────────────────────────────┘ └─────────────────┬──────────────────┘
+                                       ┌─────────────────┴──────────────────┐
+                                       │         SCAN_NODE_TABLE[0]         │
+                                       │   ------------------------------   │
+                                       │             Tables: P              │
+                                       │              Alias: x              │
+                                       │         Properties: x.name         │
+                                       │   ------------------------------   │
+                                       │         NumOutputTuples: 2         │
+                                       │   ------------------------------   │
+                                       │      ExecutionTime: 0.050000       │
+                                       └────────────────────────────────────┘
+"""
+
+# EXPLAIN MATCH (a:P) WHERE a.name = "a" RETURN a.name
+EXPLAIN_PLAN = """\
+┌─────────────────────────────┐
+│┌───────────────────────────┐│
+││       Physical Plan       ││
+│└───────────────────────────┘│
+└─────────────────────────────┘
+┌─────────────────────────────┐
+│     RESULT_COLLECTOR[3]     │
+│   -----------------------   │
+│     Expressions: a.name     │
+│   -----------------------   │
+│     NumOutputTuples: 0      │
+│   -----------------------   │
+│   ExecutionTime: 0.000000   │
+└──────────────┬──────────────┘
+┌──────────────┴──────────────┐
+│        PROJECTION[2]        │
+│   -----------------------   │
+│     Expressions: a.name     │
+│   -----------------------   │
+│     NumOutputTuples: 0      │
+│   -----------------------   │
+│   ExecutionTime: 0.000000   │
+└──────────────┬──────────────┘
+┌──────────────┴──────────────┐
+│          FILTER[1]          │
+│   -----------------------   │
+│       EQUALS(a.name)        │
+│   -----------------------   │
+│     NumOutputTuples: 0      │
+│   -----------------------   │
+│   ExecutionTime: 0.000000   │
+└──────────────┬──────────────┘
+┌──────────────┴──────────────┐
+│     SCAN_NODE_TABLE[0]      │
+│   -----------------------   │
+│          Tables: P          │
+│          Alias: a           │
+│     Properties: a.name      │
+│   -----------------------   │
+│     NumOutputTuples: 0      │
+│   -----------------------   │
+│   ExecutionTime: 0.000000   │
+└─────────────────────────────┘
+"""
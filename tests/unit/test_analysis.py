@@ -0,0 +1,121 @@
+import pytest
+from cymple import QueryBuilder, Session
+from cymple.analysis import (Clause, add_predicate, append_predicate, count_query, exists_query, first_query,
+                             is_read_only, normalize_whitespace, projection_items, query_labels, replace_tail,
+                             split_clauses)
+from cymple.execution import run
+
+
+def test_split_clauses():
+    query = ('MATCH (n: A {name: "RETURN x"})-[*1..2]->(m) WHERE n.name STARTS WITH "a" '
+             'WITH n, m ORDER BY n.x LIMIT 3 RETURN n.set')
+    assert split_clauses(query) == [
+        Clause('MATCH', '(n: A {name: "RETURN x"})-[*1..2]->(m)'),
+        Clause('WHERE', 'n.name STARTS WITH "a"'),
+        Clause('WITH', 'n, m'),
+        Clause('ORDER BY', 'n.x'),
+        Clause('LIMIT', '3'),
+        Clause('RETURN', 'n.set'),
+    ]
+
+
+def test_projection_items():
+    assert projection_items('DISTINCT n.id AS id, count(n, m) AS cnt, n.name') == \
+        [('n.id', 'id'), ('count(n, m)', 'cnt'), ('n.name', 'n.name')]
+
+
+def test_add_predicate():
+    assert add_predicate('MATCH (n) RETURN n', 'n.x > 1') == 'MATCH (n) WHERE n.x > 1 RETURN n'
+    assert add_predicate('MATCH (n) WHERE n.y OR n.z RETURN n', 'n.x > 1') == \
+        'MATCH (n) WHERE (n.y OR n.z) AND (n.x > 1) RETURN n'
+    with pytest.raises(ValueError):
+        add_predicate('MATCH (n) RETURN n UNION MATCH (n) RETURN n', 'n.x > 1')
+
+
+def test_append_predicate():
+    assert append_predicate('MATCH (n) WHERE n.y', 'n.x > 1') == 'MATCH (n) WHERE (n.y) AND (n.x > 1)'
+    assert append_predicate('MATCH (n) WITH n', 'n.x > 1') == 'MATCH (n) WITH n WHERE n.x > 1'
+    with pytest.raises(ValueError):
+        append_predicate('MATCH (n) DELETE n', 'n.x > 1')
+
+
+def test_replace_tail():
+    assert replace_tail('MATCH (n) RETURN n SKIP 10 LIMIT 5', limit=1, replace_window=True) == \
+        'MATCH (n) RETURN n LIMIT 1'
+    assert replace_tail('MATCH (n) RETURN n ORDER BY n.id', order_by='n.x') == 'MATCH (n) RETURN n ORDER BY n.x'
+    with pytest.raises(ValueError):
+        replace_tail('MATCH (n) RETURN n LIMIT 5', limit=1)
+
+
+@pytest.mark.parametrize('query, count, exists, first', [
+    ('MATCH (n: P) WHERE n.x > 1 RETURN n.id AS id ORDER BY id',
+     'MATCH (n: P) WHERE n.x > 1 RETURN count(*) AS count',
+     'MATCH (n: P) WHERE n.x > 1 RETURN true AS found LIMIT 1',
+     'MATCH (n: P) WHERE n.x > 1 RETURN n.id AS id ORDER BY id LIMIT 1'),
+    ('MATCH (n: P) WITH n, n.x * 2 AS y WHERE y > 1 RETURN DISTINCT n.name, y SKIP 5 LIMIT 10',
+     'MATCH (n: P) WITH n, n.x * 2 AS y WHERE y > 1 WITH DISTINCT n.name AS _c0, y SKIP 5 LIMIT 10 '
+     'RETURN count(*) AS count',
+     'MATCH (n: P) WITH n, n.x * 2 AS y WHERE y > 1 WITH DISTINCT n.name AS _c0, y SKIP 5 LIMIT 10 '
+     'RETURN true AS found LIMIT 1',
+     'MATCH (n: P) WITH n, n.x * 2 AS y WHERE y > 1 RETURN DISTINCT n.name, y SKIP 5 LIMIT 1'),
+    ('MATCH (n: P) RETURN n.name, count(*) AS total ORDER BY total',
+     'MATCH (n: P) WITH n.name AS _c0, count(*) AS total RETURN count(*) AS count',
+     'MATCH (n: P) WITH n.name AS _c0, count(*) AS total RETURN true AS found LIMIT 1',
+     'MATCH (n: P) RETURN n.name, count(*) AS total ORDER BY total LIMIT 1'),
+    ('MATCH (n: P) WHERE n.name = "count(x)"',
+     'MATCH (n: P) WHERE n.name = "count(x)" RETURN count(*) AS count',
+     'MATCH (n: P) WHERE n.name = "count(x)" RETURN true AS found LIMIT 1',
+     None),
+])
+def test_terminal_rewrites(query, count, exists, first):
+    assert count_query(query) == count
+    assert exists_query(query) == exists
+    if first is None:
+        with pytest.raises(ValueError):
+            first_query(query)
+    else:
+        assert first_query(query) == first
+
+
+class RowsConnection:
+    def __init__(self, rows):
+        self.rows = rows
+        self.statements = []
+
+    def execute(self, query, parameters):
+        self.statements.append(query)
+        return self.rows
+
+
+def test_terminal_methods():
+    query = QueryBuilder().match().node('P', 'n').where('n.x', '>', 1).return_literal('n')
+    connection = RowsConnection([{'count': 3}])
+    assert run(connection, query.count()) == 3
+    assert connection.statements == ['MATCH (n: P) WHERE n.x > 1 RETURN count(*) AS count']
+    assert Session(RowsConnection([{'found': True}])).execute(query.exists()) is True
+    assert run(RowsConnection([]), query.exists()) is False
+    assert run(RowsConnection([{'n': {'x': 2}}]), query.first()) == {'n': {'x': 2}}
+    assert run(RowsConnection([]), query.first()) is None
+    assert run(connection, query) == [{'count': 3}]
+
+
+@pytest.mark.parametrize('query, read_only, read, written', [
+    ('MATCH (p: Person)-[k: Knows]->(q: Person) RETURN p', True, {'Person', 'Knows'}, set()),
+    ('MATCH (p: Person) SET p.name = "x"', False, {'Person'}, {'Person'}),
+    ('MATCH (n) RETURN n', True, None, set()),
+    ('MATCH (a: A)-->(b: B) RETURN a', True, None, set()),
+    ('MERGE (a: A {x : 1}) ON CREATE SET a.y = 2', False, {'A'}, {'A'}),
+    ('MATCH (a: A) WITH a MATCH (a)-[:R]->(b: B) DELETE b', False, {'A', 'R', 'B'}, {'B'}),
+    ('MATCH (a: A) DETACH DELETE a', False, {'A'}, None),
+    ('MATCH (a: A) WHERE a.name = "MATCH (x:Z)" RETURN count(a)', True, {'A'}, set()),
+    ('CREATE NODE TABLE X(id INT64, PRIMARY KEY(id))', False, set(), None),
+    ('ALTER TABLE T ADD c INT64', False, set(), None),
+])
+def test_query_labels(query, read_only, read, written):
+    assert is_read_only(query) == read_only
+    assert query_labels(query) == (read, written)
+
+
+def test_normalize_whitespace():
+    assert normalize_whitespace(' MATCH (n:A)\n  WHERE n.x = "a   b"  RETURN n ') == \
+        'MATCH (n:A) WHERE n.x = "a   b" RETURN n'
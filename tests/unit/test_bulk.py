@@ -0,0 +1,159 @@
+import pytest
+from cymple import QueryBuilder
+from cymple.bulk import BulkWriter, batched_queries, execute_in_batches, payload_size
+
+query = QueryBuilder().cypher('UNWIND $rows AS row').create().node('Person', 'p', {'id': 'row.id'}, escape=False)
+
+
+class TimedConnection:
+    """Simulates a batch latency proportional to its number of rows, without sleeping."""
+
+    def __init__(self, writer_clock, seconds_per_row):
+        self.clock = writer_clock
+        self.seconds_per_row = seconds_per_row
+        self.batches = []
+
+    def execute(self, query, parameters):
+        self.batches.append(len(parameters['rows']))
+        self.clock.now += self.seconds_per_row * len(parameters['rows'])
+        return []
+
+
+class Clock:
+    now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr('cymple.bulk.time.perf_counter', clock)
+    return clock
+
+
+def test_additive_increase_under_target(clock):
+    connection = TimedConnection(clock, 0.0001)
+    writer = BulkWriter(connection, query, initial_batch=100, target_latency=1.0)
+    metrics = writer.write({'id': index} for index in range(1000))
+    assert connection.batches == [100, 110, 120, 130, 140, 150, 160, 90]
+    assert metrics['rows'] == 1000
+    assert metrics['batches'] == 8
+    assert metrics['batch_size'] == 170
+    assert metrics['throughput'] == pytest.approx(10000)
+
+
+def test_multiplicative_decrease_over_target(clock):
+    connection = TimedConnection(clock, 0.01)
+    writer = BulkWriter(connection, query, initial_batch=400, min_batch=30, target_latency=1.0, increase=10)
+    writer.write({'id': index} for index in range(1000))
+    assert connection.batches == [400, 200, 100, 110, 55, 65, 70]
+    assert writer.batch_size == 75
+
+
+def test_payload_cap(clock):
+    connection = TimedConnection(clock, 0)
+    rows = [{'id': index, 'name': 'x' * 90} for index in range(10)]
+    writer = BulkWriter(connection, query, initial_batch=100, max_payload=3 * payload_size(rows[0]))
+    metrics = writer.write(rows)
+    assert connection.batches == [3, 3, 3, 1]
+    assert metrics['capped_batches'] == 3
+    assert metrics['payload'] == sum(payload_size(row) for row in rows)
+
+
+def test_parameters():
+    class Connection:
+        def execute(self, query, parameters):
+            self.query, self.parameters = query, parameters
+            return []
+
+    connection = Connection()
+    BulkWriter(connection, query, parameter='items', parameters={'source': 'import'}).write([{'id': 1}])
+    assert connection.query == 'UNWIND $rows AS row CREATE (p: Person {id : row.id})'
+    assert connection.parameters == {'source': 'import', 'items': [{'id': 1}]}
+    with pytest.raises(ValueError):
+        BulkWriter(connection, query, decrease=1.5)
+
+
+cleanup = QueryBuilder().match().node('Person', 'n').where('n.age', '>', 90).detach_delete('n')
+update = QueryBuilder().match().node('Person', 'n').where('n.age', '>', 90).set({'n.flag': 1})
+
+
+def test_batched_queries():
+    assert batched_queries(cleanup) == (
+        'MATCH (n: Person) WHERE n.age > 90 WITH * LIMIT $_cymple_size DETACH DELETE n RETURN count(*) AS rows',) * 2
+    tail = ('LIMIT $_cymple_size MATCH (n: Person) WHERE (n.age > 90) AND (n.id = _batch_key) SET n.flag = 1 '
+            'WITH _batch_key, count(*) AS _batch_rows RETURN count(*) AS keys, sum(_batch_rows) AS rows, '
+            'max(_batch_key) AS last')
+    assert batched_queries(update, 'n.id') == (
+        'MATCH (n: Person) WHERE n.age > 90 WITH DISTINCT n.id AS _batch_key ORDER BY _batch_key ' + tail,
+        'MATCH (n: Person) WHERE (n.age > 90) AND (n.id > $_cymple_last) WITH DISTINCT n.id AS _batch_key '
+        'ORDER BY _batch_key ' + tail)
+    with pytest.raises(ValueError):
+        batched_queries(update)
+    with pytest.raises(ValueError):
+        batched_queries('MATCH (n) SET n.x = 1 RETURN n', 'n.id')
+    with pytest.raises(ValueError):
+        batched_queries('MATCH (n) RETURN n', 'n.id')
+
+
+class BatchConnection:
+    """Simulates batches over the ids 1..total, failing once at a given batch."""
+
+    def __init__(self, total, fail_at=None):
+        self.total = total
+        self.fail_at = fail_at
+        self.calls = []
+
+    def execute(self, query, parameters):
+        self.calls.append(dict(parameters))
+        if len(self.calls) == self.fail_at:
+            self.fail_at = None
+            raise KeyboardInterrupt()
+        first = parameters.get('_cymple_last', 0) + 1
+        last = min(first + parameters['_cymple_size'] - 1, self.total)
+        keys = max(last - first + 1, 0)
+        # Every value of the key matches two rows
+        return [{'keys': keys, 'rows': 2 * keys, 'last': last if keys else None}]
+
+
+def test_execute_in_batches():
+    connection = BatchConnection(total=25)
+    progress = []
+    report = update.execute_in_batches(connection, batch_size=10, key='n.id', parameters={'age': 90},
+                                       on_progress=progress.append)
+    assert connection.calls == [{'age': 90, '_cymple_size': 10},
+                                {'age': 90, '_cymple_size': 10, '_cymple_last': 10},
+                                {'age': 90, '_cymple_size': 10, '_cymple_last': 20}]
+    assert [(step['rows'], step['batches'], step['last'], step['done']) for step in progress] == [
+        (20, 1, 10, False), (40, 2, 20, False), (50, 3, 25, True)]
+    assert report['rows'] == 50
+    assert report['done']
+    assert report['throughput'] > 0
+
+    with pytest.raises(ValueError):
+        execute_in_batches(connection, update, key='n.id', parameters={'_cymple_size': 1})
+    with pytest.raises(ValueError):
+        execute_in_batches(connection, update, batch_size=0, key='n.id')
+
+
+def test_exact_multiple_needs_an_empty_batch():
+    connection = BatchConnection(total=20)
+    report = execute_in_batches(connection, update, batch_size=10, key='n.id')
+    assert len(connection.calls) == 3
+    assert (report['rows'], report['batches'], report['last']) == (40, 2, 20)
+
+
+def test_resume_from_checkpoint(tmp_path):
+    checkpoint = str(tmp_path / 'cleanup.json')
+    connection = BatchConnection(total=25, fail_at=2)
+    with pytest.raises(KeyboardInterrupt):
+        execute_in_batches(connection, update, batch_size=10, key='n.id', checkpoint=checkpoint)
+
+    report = execute_in_batches(connection, update, batch_size=10, key='n.id', checkpoint=checkpoint)
+    assert [call.get('_cymple_last') for call in connection.calls] == [None, 10, 10, 20]
+    assert (report['rows'], report['batches'], report['done']) == (50, 3, True)
+
+    execute_in_batches(connection, update, batch_size=10, key='n.id', checkpoint=checkpoint)
+    assert len(connection.calls) == 4
@@ -0,0 +1,111 @@
+from cymple import QueryBuilder, Session
+from cymple.cache import MISSING, ResultCache
+
+
+class FakeConnection:
+    def __init__(self):
+        self.queries = []
+
+    def execute(self, query, parameters):
+        self.queries.append(query)
+        return [{'query': query}]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+persons = QueryBuilder().match().node('Person', 'p').return_literal('p')
+movies = QueryBuilder().match().node('Movie', 'm').return_literal('m')
+
+
+def test_lru_eviction():
+    cache = ResultCache(max_entries=2)
+    cache.put('a', {}, [1])
+    cache.put('b', {}, [2])
+    assert cache.get('a') == [1]
+    cache.put('c', {}, [3])
+    assert cache.get('b') is MISSING
+    assert cache.get('a') == [1] and cache.get('c') == [3]
+    assert cache.stats == {'entries': 2, 'hits': 3, 'misses': 1, 'evictions': 1, 'expirations': 0, 'invalidations': 0,
+                           'stale': 0}
+
+
+def test_ttl_expiration():
+    clock = FakeClock()
+    cache = ResultCache(ttl=10, clock=clock)
+    cache.put('a', {'x': [1, 2]}, [1])
+    clock.now = 5
+    assert cache.get('a', {'x': [1, 2]}) == [1]
+    assert cache.get('a', {'x': [1, 3]}) is MISSING
+    clock.now = 11
+    assert cache.get('a', {'x': [1, 2]}) is MISSING
+    assert cache.expirations == 1
+
+
+def test_key_normalization():
+    assert ResultCache.key('MATCH  (n)\nRETURN n', {'b': 1, 'a': 2}) == \
+        ResultCache.key('MATCH (n) RETURN n', {'a': 2, 'b': 1})
+
+
+def test_session_caches_reads():
+    connection = FakeConnection()
+    session = Session(connection, cache=ResultCache())
+    assert session.execute(persons) == session.execute(persons)
+    assert len(connection.queries) == 1
+    assert session.cache.hits == 1
+
+
+def test_session_write_invalidates_touched_labels():
+    connection = FakeConnection()
+    session = Session(connection, cache=ResultCache())
+    session.execute(persons)
+    session.execute(movies)
+    session.execute('MATCH (n) RETURN n')
+
+    session.execute(QueryBuilder().match().node('Person', 'p').set({'p.name': 'Bob'}))
+    assert session.cache.invalidations == 2
+
+    session.execute(movies)
+    session.execute(persons)
+    assert connection.queries.count(str(movies)) == 1
+    assert connection.queries.count(str(persons)) == 2
+
+
+def test_results_read_before_an_invalidation_are_not_cached():
+    cache = ResultCache()
+    generation = cache.generation({'Person'})
+    unknown = cache.generation(None)
+    cache.invalidate({'Movie'})
+    cache.put('MATCH (p: Person) RETURN p', {}, [], {'Person'}, generation)
+    assert len(cache) == 1
+    cache.put('MATCH (n) RETURN n', {}, [], None, unknown)
+    assert len(cache) == 1
+
+    generation = cache.generation({'Person'})
+    cache.invalidate({'Person'})
+    cache.put('MATCH (p: Person) RETURN p', {'id': 1}, [], {'Person'}, generation)
+    assert len(cache) == 0
+    assert cache.stats['stale'] == 2
+
+
+def test_session_does_not_cache_a_read_racing_a_write():
+    class RacingConnection(FakeConnection):
+        def execute(self, query, parameters):
+            rows = super().execute(query, parameters)
+            if query == str(persons) and len(self.queries) == 1:
+                # A write commits and invalidates while the read is running
+                session.execute(QueryBuilder().match().node('Person', 'p').set({'p.name': 'Bob'}))
+            return rows
+
+    connection = RacingConnection()
+    session = Session(connection, cache=ResultCache())
+    session.execute(persons)
+    session.execute(persons)
+    assert connection.queries.count(str(persons)) == 2
+    session.execute(persons)
+    assert connection.queries.count(str(persons)) == 2
@@ -38,6 +38,11 @@ rendered = {
     'RELATION (ALL SHORTEST min and max)': qb.reset().match().node().related(ref_name='rel', min_hops=1, max_hops=2, shortest='all').node(),
     'RELATION (SHORTEST no min nor max)': qb.reset().match().node().related(ref_name='rel', shortest=True).node(),
     'RELATION (multiple edge types, shortest, min and max)': qb.reset().match().node().related(ref_name='rel', labels=['Relation', 'OtherRelation'], min_hops=1, max_hops=2, shortest=True).node(),
+    'RELATION (recursive filter)': qb.reset().match().node().related_to(ref_name='e', labels='Knows', min_hops=1, max_hops=5, rel_filter='r.weight > 0.5', node_filter='n.active').node(),
+    'RELATION (recursive projection)': qb.reset().match().node().related(ref_name='e', min_hops=1, max_hops=3, rel_projection=['since'], node_projection=['name', 'age']).node(),
+    'RELATION (recursive filter and projection)': qb.reset().match().node().related_from(ref_name='e', min_hops=2, max_hops=2, node_filter='x.active', node_projection=['name'], filter_variables=('_', 'x')).node(),
+    'RELATION (weighted shortest)': qb.reset().match().node().related_to(ref_name='e', labels='Road', weight='length').node(),
+    'RELATION (all weighted shortest, min and max)': qb.reset().match().node().related_to(ref_name='e', labels='Road', min_hops=1, max_hops=4, shortest='all', weight='length').node(),
     'RETURN (literal)': qb.reset().match().node(ref_name='n').return_literal('n'),
     'RETURN (mapping)': qb.reset().match().node(ref_name='n').return_mapping(('n.name', 'name')),
     'RETURN (mapping, list)': qb.reset().match().node(ref_name='n').return_mapping([('n.name', 'name'), ('n.age', 'age')]),
@@ -53,6 +58,13 @@ rendered = {
     'WITH (start)': qb.reset().with_('a').match().node(ref_name='a').with_('a,b'),
     'YIELD': qb.reset().call().procedure("db.labels()").yield_(("labels", "labels")).where("labels", "CONTAINS", "User").return_literal("count(labels) AS numlabels"),
     'YIELD (list)': qb.reset().call().procedure("db.labels()").yield_([('length(labels)', 'len'), ('count(labels)', 'cnt')]),
+    'VECTOR INDEX (create)': qb.reset().call().create_vector_index('Book', 'book_emb', 'emb', {'metric': 'cosine', 'efc': 200}),
+    'VECTOR INDEX (query)': qb.reset().call().query_vector_index('Book', 'book_emb', k=5).yield_([('node', 'b'), ('distance', 'd')]).return_literal('b.title, d'),
+    'VECTOR INDEX (query, filtered)': qb.reset().call().query_vector_index('Book', 'book_emb', '$vector', '$k', {'efs': 100}).where('distance', '<', 0.5).return_literal('node.title'),
+    'VECTOR INDEX (drop)': qb.reset().call().drop_vector_index('Book', 'book_emb'),
+    'FTS INDEX (create)': qb.reset().call().create_fts_index('Book', 'book_fts', ['title', 'abstract'], {'stemmer': 'porter'}),
+    'FTS INDEX (query)': qb.reset().call().query_fts_index('Book', 'book_fts', options={'top': 10}).yield_([('node', 'b'), ('score', 's')]).return_literal('b.title, s'),
+    'FTS INDEX (drop)': qb.reset().call().drop_fts_index('Book', 'book_fts'),
     'LIMIT': qb.reset().match().node(ref_name='n').return_literal('n').limit(1),
     'LIMIT (expression)': qb.reset().match().node(ref_name='n').return_literal('n').limit("1 + toInteger(3 * rand())"),
     'LIMIT (with)': qb.reset().match().node(ref_name='n').with_('n').limit(1),
@@ -116,6 +128,11 @@ expected = {
     'RELATION (ALL SHORTEST min and max)': 'MATCH ()-[rel*ALL SHORTEST 1..2]-()',
     'RELATION (SHORTEST no min nor max)': 'MATCH ()-[rel]-()',
     'RELATION (multiple edge types, shortest, min and max)': 'MATCH ()-[rel:Relation|:OtherRelation*SHORTEST 1..2]-()',
+    'RELATION (recursive filter)': 'MATCH ()-[e: Knows*1..5 (r, n | WHERE (r.weight > 0.5) AND (n.active))]->()',
+    'RELATION (recursive projection)': 'MATCH ()-[e*1..3 (r, n | {r.since}, {n.name, n.age})]-()',
+    'RELATION (recursive filter and projection)': 'MATCH ()<-[e*2 (_, x | WHERE x.active | {}, {x.name})]-()',
+    'RELATION (weighted shortest)': 'MATCH ()-[e: Road*WSHORTEST(length)]->()',
+    'RELATION (all weighted shortest, min and max)': 'MATCH ()-[e: Road*ALL WSHORTEST(length) 1..4]->()',
     'RETURN (literal)': 'MATCH (n) RETURN n',
     'RETURN (mapping)': 'MATCH (n) RETURN n.name AS name',
     'RETURN (mapping, list)': 'MATCH (n) RETURN n.name AS name, n.age AS age',
@@ -131,6 +148,13 @@ expected = {
     'WITH (start)': 'WITH a MATCH (a) WITH a,b',
     'YIELD': 'CALL db.labels() YIELD labels AS labels WHERE labels CONTAINS "User" RETURN count(labels) AS numlabels',
     'YIELD (list)': 'CALL db.labels() YIELD length(labels) AS len, count(labels) AS cnt',
+    'VECTOR INDEX (create)': 'CALL CREATE_VECTOR_INDEX("Book", "book_emb", "emb", metric := "cosine", efc := 200)',
+    'VECTOR INDEX (query)': 'CALL QUERY_VECTOR_INDEX("Book", "book_emb", $query_vector, 5) YIELD node AS b, distance AS d RETURN b.title, d',
+    'VECTOR INDEX (query, filtered)': 'CALL QUERY_VECTOR_INDEX("Book", "book_emb", $vector, $k, efs := 100) WHERE distance < 0.5 RETURN node.title',
+    'VECTOR INDEX (drop)': 'CALL DROP_VECTOR_INDEX("Book", "book_emb")',
+    'FTS INDEX (create)': 'CALL CREATE_FTS_INDEX("Book", "book_fts", ["title", "abstract"], stemmer := "porter")',
+    'FTS INDEX (query)': 'CALL QUERY_FTS_INDEX("Book", "book_fts", $query, top := 10) YIELD node AS b, score AS s RETURN b.title, s',
+    'FTS INDEX (drop)': 'CALL DROP_FTS_INDEX("Book", "book_fts")',
     'LIMIT': 'MATCH (n) RETURN n LIMIT 1',
     'LIMIT (expression)': 'MATCH (n) RETURN n LIMIT 1 + toInteger(3 * rand())',
     'LIMIT (with)': 'MATCH (n) WITH n LIMIT 1',
@@ -167,3 +191,18 @@ expected = {
 @pytest.mark.parametrize('clause', expected)
 def test_case(clause: str):
     assert str(rendered[clause]) == expected[clause]
+
+
+def test_vector_index_query_vector_is_a_parameter():
+    with pytest.raises(TypeError):
+        qb.reset().call().query_vector_index('Book', 'book_emb', [0.1, 0.2, 0.3])
+
+
+def test_recursive_filter_needs_a_variable_length_relation():
+    with pytest.raises(ValueError):
+        qb.reset().match().node().related(rel_filter='r.weight > 0.5')
+
+
+def test_fts_index_query_is_a_parameter():
+    with pytest.raises(TypeError):
+        qb.reset().call().query_fts_index('Book', 'book_fts', ['dragons'])
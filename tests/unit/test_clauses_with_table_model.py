@@ -1,7 +1,7 @@
 from datetime import datetime
 import pytest
 from cymple import QueryBuilder
-from cymple.table_model import TableModel
+from cymple.table_model import TableModel, count, count_all, exists
 
 qb = QueryBuilder()
 
@@ -30,7 +30,15 @@ rendered = {
     'WHERE (multiple)': qb.reset().match().node(ref_name=n).where_multiple({f'{n.attribute_1}': 'value', f'{n.attribute_2}': 20}),
     'WHERE (literal)': qb.reset().match().node(ref_name=n, properties={Node.attribute_1: 10, Node.attribute_2: 10}).where_literal((n.attribute_2 == "10") & (n.attribute_2 >= 3) & (n.attribute_3 != r.attribute_3)),
     'WHERE (mix of instance and class references)': qb.reset().match().node(Node, n).where_literal((n.attribute_2 == "10") & (n.attribute_2 >= 3)).return_literal(f"sum({n.attribute_1 + n.attribute_2})"),
-    'Related to': qb.reset().match().node(Node, n).related_to(Rel, r, {Rel.attribute_1: "10"}).node(Node, n)
+    'Related to': qb.reset().match().node(Node, n).related_to(Rel, r, {Rel.attribute_1: "10"}).node(Node, n),
+    'Related to (recursive filter)': qb.reset().match().node(Node, 'a').related_to(Rel, 'e', min_hops=1, max_hops=3, rel_filter=r.attribute_4 > 0.5, node_filter=(n.attribute_2 == 'x') & (n.attribute_1 < 3), node_projection=[Node.attribute_2]).node(Node, 'b'),
+    'Related to (weighted shortest)': qb.reset().match().node(Node, 'a').related_to(Rel, 'e', weight=Rel.attribute_4, min_hops=1, max_hops=5).node(Node, 'b'),
+    'EXISTS (where literal)': qb.reset().match().node(Node, n).where_literal(exists(QueryBuilder().match().node(ref_name=n).related_to(Rel).node(Node, 'm', {Node.attribute_2: 'x'}))).return_literal(n),
+    'EXISTS (negated, in expression)': qb.reset().match().node(Node, n).where_literal(~exists(QueryBuilder().match().node(ref_name=n).related_to(Rel).node(Node, 'm')) & (n.attribute_1 > 3)).return_literal(n),
+    'COUNT (where)': qb.reset().match().node(Node, n).where(count(QueryBuilder().match().node(ref_name=n).related_to(Rel, r).node(Node, 'm').where_literal(r.attribute_4 > 0.5)), '>', 2).return_literal(n),
+    'COUNT (return mapping)': qb.reset().match().node(Node, n).return_mapping([(n.attribute_1, 'id'), (count(QueryBuilder().match().node(ref_name=n).related_to(Rel).node(Node, 'm')), 'related')]),
+    'RETURN (aggregate)': qb.reset().match().node(Node, n).related_to(Rel, r).node(Node, 'm').return_aggregate(group_by=[n.attribute_2], metrics={'total': r.attribute_4.sum(), 'rels': count_all(), 'ids': n.attribute_1.collect(distinct=True)}).order_by('total', False).limit(3),
+    'RETURN (aggregate, global)': qb.reset().match().node(Node, n).return_aggregate(metrics={'spread': n.attribute_1.max() - n.attribute_1.min(), 'mean': n.attribute_4.avg(), 'names': n.attribute_2.count(distinct=True)})
 }
 
 expected = {
@@ -43,7 +51,15 @@ expected = {
     'WHERE (multiple)': 'MATCH (n) WHERE n.attribute_1 = "value" AND n.attribute_2 = 20',
     'WHERE (literal)': 'MATCH (n {attribute_1 : 10, attribute_2 : 10}) WHERE (((n.attribute_2 = \'10\') AND (3 <= n.attribute_2)) AND (n.attribute_3 <> r.attribute_3))',
     'WHERE (mix of instance and class references)': "MATCH (n:NODE) WHERE ((n.attribute_2 = '10') AND (3 <= n.attribute_2)) RETURN sum((n.attribute_1 + n.attribute_2))",
-    'Related to': 'MATCH (n:NODE)-[r: REL {attribute_1 : "10"}]->(n:NODE)'
+    'Related to': 'MATCH (n:NODE)-[r: REL {attribute_1 : "10"}]->(n:NODE)',
+    'Related to (recursive filter)': "MATCH (a:NODE)-[e: REL*1..3 (r, n | WHERE (r.attribute_4 > 0.5) AND ((n.attribute_2 = 'x') AND (n.attribute_1 < 3)) | {}, {n.attribute_2})]->(b:NODE)",
+    'Related to (weighted shortest)': 'MATCH (a:NODE)-[e: REL*WSHORTEST(attribute_4) 1..5]->(b:NODE)',
+    'EXISTS (where literal)': 'MATCH (n:NODE) WHERE EXISTS { MATCH (n)-[: REL]->(m:NODE {attribute_2 : "x"}) } RETURN n',
+    'EXISTS (negated, in expression)': 'MATCH (n:NODE) WHERE (NOT EXISTS { MATCH (n)-[: REL]->(m:NODE) } AND (n.attribute_1 > 3)) RETURN n',
+    'COUNT (where)': 'MATCH (n:NODE) WHERE COUNT { MATCH (n)-[r: REL]->(m:NODE) WHERE (r.attribute_4 > 0.5) } > 2 RETURN n',
+    'COUNT (return mapping)': 'MATCH (n:NODE) RETURN n.attribute_1 AS id, COUNT { MATCH (n)-[: REL]->(m:NODE) } AS related',
+    'RETURN (aggregate)': 'MATCH (n:NODE)-[r: REL]->(m:NODE) RETURN n.attribute_2, sum(r.attribute_4) AS total, count(*) AS rels, collect(DISTINCT n.attribute_1) AS ids ORDER BY total DESC LIMIT 3',
+    'RETURN (aggregate, global)': 'MATCH (n:NODE) RETURN (max(n.attribute_1) - min(n.attribute_1)) AS spread, avg(n.attribute_4) AS mean, count(DISTINCT n.attribute_2) AS names'
 }
 
 
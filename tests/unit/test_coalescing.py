@@ -0,0 +1,90 @@
+import asyncio
+import threading
+import time
+from cymple import QueryBuilder, Session
+from cymple.coalescing import SingleFlight
+
+query = QueryBuilder().match().node('Person', 'p').return_literal('p')
+
+
+class BlockingConnection:
+    """Blocks each execution until the expected number of callers has been coalesced."""
+
+    def __init__(self, session, waiters):
+        self.session = session
+        self.waiters = waiters
+        self.executions = 0
+
+    def execute(self, query, parameters):
+        self.executions += 1
+        deadline = time.monotonic() + 5
+        while self.session.single_flight.coalesced < self.waiters and time.monotonic() < deadline:
+            time.sleep(0.001)
+        return [{'n': self.executions}]
+
+
+def test_threaded_coalescing():
+    session = Session(None, coalesce=True)
+    session.executor = connection = BlockingConnection(session, waiters=7)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(session.execute(query))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert connection.executions == 1
+    assert results == [[{'n': 1}]] * 8
+    assert session.single_flight.stats == {'executions': 1, 'coalesced': 7}
+
+
+def test_async_coalescing():
+    session = Session(None, coalesce=True)
+    session.executor = connection = BlockingConnection(session, waiters=4)
+
+    async def main():
+        return await asyncio.gather(*(session.execute_async(query) for _ in range(5)))
+
+    assert asyncio.run(main()) == [[{'n': 1}]] * 5
+    assert connection.executions == 1
+
+
+def test_writes_are_not_coalesced():
+    session = Session(None, coalesce=True)
+    session.executor = connection = BlockingConnection(session, waiters=0)
+    session.execute(QueryBuilder().match().node('Person', 'p').set({'p.name': 'Bob'}))
+    session.execute(QueryBuilder().match().node('Person', 'p').set({'p.name': 'Bob'}))
+    assert connection.executions == 2
+    assert session.single_flight.stats == {'executions': 0, 'coalesced': 0}
+
+
+def test_errors_are_shared():
+    flight = SingleFlight()
+    barrier = threading.Barrier(4)
+    executions = []
+    errors = []
+
+    def fail():
+        executions.append(1)
+        deadline = time.monotonic() + 5
+        while flight.coalesced < 3 and time.monotonic() < deadline:
+            time.sleep(0.001)
+        raise RuntimeError('boom')
+
+    def call():
+        barrier.wait()
+        try:
+            flight.do('key', fail)
+        except RuntimeError as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=call) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(executions) == 1
+    assert len(errors) == 4 and all(error is errors[0] for error in errors)
+    assert flight.stats == {'executions': 1, 'coalesced': 3}
+    assert flight.do('key', lambda: 1) == 1
@@ -0,0 +1,116 @@
+import pytest
+from cymple.evaluation import compile_expression, rows_to_columns
+from cymple.table_model import Expr, F, TableModel, exists, param
+from cymple import QueryBuilder
+
+
+class Person(TableModel):
+    age: int
+    name: str
+    score: float
+    tags: list
+
+
+n = Person('n')
+columns = {'n.age': [10, 20, 30, None], 'name': ['Ann', 'Bob', 'Cid', 'Dan'], 'score': [1.0, 2.5, 4.0, 0.5]}
+
+
+@pytest.mark.parametrize('expression, expected', [
+    ((n.age >= 18) & (n.name != 'Bob'), [False, False, True, None]),
+    ((n.age < 18) | (n.score > 3), [True, False, True, None]),
+    ((n.age > 15) & (n.score > 3), [False, False, True, False]),
+    (n.age * 2 + 1, [21, 41, 61, None]),
+    ((n.age - 1) / 2, [4, 9, 14, None]),
+    (n.score / 2, [0.5, 1.25, 2.0, 0.25]),
+    (n.name + '!', ['Ann!', 'Bob!', 'Cid!', 'Dan!']),
+    (Expr('n.age', '=', 20, int), [False, True, False, None]),
+])
+def test_python_evaluation(expression, expected):
+    assert expression.evaluate(columns, backend='python') == expected
+
+
+rows = [{'n.name': 'Ann', 'n.tags': ['a'], 'n.age': 1}, {'n.name': None, 'n.tags': ['b', 'c'], 'n.age': 2}]
+
+
+@pytest.mark.parametrize('expression, expected', [
+    (n.age.is_in([2, 3]), [False, True]),
+    (n.age.is_in(param('ages')), [True, False]),
+    (n.name.is_in(['Bob', None]), [None, None]),
+    (~n.name.is_in(['Ann']), [False, None]),
+    (n.name.is_null(), [False, True]),
+    (n.name.is_not_null(), [True, False]),
+    (n.name.starts_with('A'), [True, None]),
+    (n.name.ends_with('nn'), [True, None]),
+    (n.name.contains('n'), [True, None]),
+    (n.name.matches('A.'), [False, None]),
+    (n.tags.list_contains('c'), [False, True]),
+    (F.upper(F.coalesce(n.name, 'x')), ['ANN', 'X']),
+    (F.size(n.tags) + n.age, [2, 4]),
+    (n.age > param('min'), [False, True]),
+])
+def test_predicate_evaluation(expression, expected):
+    assert expression.evaluate(rows_to_columns(rows), backend='python', parameters={'ages': [1], 'min': 1}) == expected
+
+
+def test_filter_rows():
+    rows = [{'n.age': 20, 'n.name': 'Ann'}, {'n.age': 40, 'n.name': 'Bob'}, {'n.age': None, 'n.name': 'Cid'}]
+    assert ((n.age >= 18) & (n.name != 'Bob')).filter(rows, backend='python') == [rows[0]]
+    assert (n.age > 1).filter([]) == []
+    assert rows_to_columns(rows) == {'n.age': [20, 40, None], 'n.name': ['Ann', 'Bob', 'Cid']}
+
+
+def test_compiled_once():
+    expression = n.age > 18
+    expression.evaluate(columns, backend='python')
+    compiled = expression._compiled['python']
+    expression.evaluate({'age': [1]}, backend='python')
+    assert expression._compiled['python'] is compiled
+
+
+def test_evaluation_errors():
+    with pytest.raises(KeyError):
+        (n.age > 1).evaluate({'other': [1]}, backend='python')
+    with pytest.raises(ValueError):
+        (n.age > n.score).evaluate({'age': [1, 2], 'score': [1]}, backend='python')
+    with pytest.raises(ValueError):
+        compile_expression(n.age > 1, backend='arrow')
+    with pytest.raises(KeyError):
+        (n.age > param('min')).evaluate(columns, backend='python')
+    with pytest.raises(ValueError):
+        (F.date_part('year', n.age) > 1).evaluate(columns, backend='python')
+    with pytest.raises(TypeError):
+        (exists(QueryBuilder().match().node(ref_name='n')) & (n.age > 1)).evaluate(columns, backend='python')
+
+
+def test_numpy_evaluation():
+    numpy = pytest.importorskip('numpy')
+    ages = numpy.array([10, 20, 30])
+    result = ((n.age >= 18) & (n.name != 'Bob')).evaluate({'age': ages, 'name': ['Ann', 'Bob', 'Cid']})
+    assert isinstance(result, numpy.ndarray)
+    assert result.tolist() == [False, False, True]
+    assert ((n.age - 1) / 2).evaluate({'age': ages}).tolist() == [4, 9, 14]
+    assert (n.name + '!').evaluate({'name': ['a']}).tolist() == ['a!']
+    mask = n.name.starts_with('A') & n.tags.list_contains('a') & n.age.is_in(param('ages'))
+    assert mask.evaluate(rows_to_columns(rows[:1]), parameters={'ages': [1]}).tolist() == [True]
+    assert F.lower(n.name).evaluate({'name': numpy.array(['A', 'B'])}).tolist() == ['a', 'b']
+
+
+def test_numpy_evaluation_with_nulls():
+    pytest.importorskip('numpy')
+    rows = [{'n.age': 20, 'n.score': 1.0, 'n.name': 'Ann'}, {'n.age': None, 'n.score': None, 'n.name': None},
+            {'n.age': 10, 'n.score': 3.0, 'n.name': 'Bob'}]
+    assert (n.age >= 18).filter(rows, backend='numpy') == [rows[0]]
+    assert ((n.score > 2) | (n.age < 15)).filter(rows, backend='numpy') == [rows[2]]
+    columns = rows_to_columns(rows)
+    for expression, expected in (
+            ((n.score > 2) | (n.age < 15), [False, None, True]),
+            ((n.age > 15) & (n.score > 2), [False, None, False]),
+            (~(n.age > 15), [False, None, True]),
+            (n.age + 1, [21, None, 11]),
+            (n.name + '!', ['Ann!', None, 'Bob!']),
+            (n.age.is_in([20]), [True, None, False]),
+            (n.name.is_in(['Ann', None]), [True, None, None]),
+            (n.name.matches('A.+'), [True, None, False])):
+        assert list(expression.evaluate(columns, backend='numpy')) == expected
+        assert expression.evaluate(columns, backend='python') == expected
+    assert list(n.age.is_in([20, None]).evaluate({'age': [20, 10]}, backend='numpy')) == [True, None]
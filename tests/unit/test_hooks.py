@@ -0,0 +1,117 @@
+import logging
+import pytest
+from cymple import QueryBuilder
+from cymple.execution import ConnectionPool, run
+from cymple.hooks import LoggingObserver, MetricsCollector, Observer, hooks
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = list(rows)
+
+    def get_column_names(self):
+        return ['n']
+
+    def has_next(self):
+        return bool(self.rows)
+
+    def get_next(self):
+        return [self.rows.pop(0)]
+
+    def get_compiling_time(self):
+        return 2.0
+
+    def get_execution_time(self):
+        return 3.0
+
+
+class FakeConnection:
+    def execute(self, query, parameters):
+        if 'FAIL' in query:
+            raise RuntimeError('boom')
+        return FakeResult([1, 2, 3])
+
+
+@pytest.fixture
+def collector():
+    collector = hooks.subscribe(MetricsCollector())
+    yield collector
+    hooks.unsubscribe(collector)
+
+
+def test_no_observers():
+    assert not hooks
+    assert str(QueryBuilder().match().node('A', 'a', {'x': 1})) == 'MATCH (a: A {x : 1})'
+
+
+def test_build_and_render_events(collector):
+    query = QueryBuilder().match().node('A', 'a', {'x': 1}).return_literal('a')
+    str(query)
+    metrics = collector.snapshot()
+    assert metrics['clauses'] == {'QueryBuilder': 1, 'Match': 1, 'Node': 1, 'Return': 1}
+    assert metrics['properties_formatted'] == 1
+    assert metrics['queries_rendered'] == 1
+    assert metrics['rendered_bytes'] == len('MATCH (a: A {x : 1}) RETURN a')
+    assert metrics['render_time'] >= 0
+
+
+def test_execution_events(collector):
+    pool = ConnectionPool(size=1, connection_factory=FakeConnection)
+    assert run(pool, 'MATCH (n) RETURN n') == [{'n': 1}, {'n': 2}, {'n': 3}]
+    with pytest.raises(RuntimeError):
+        run(pool, 'FAIL')
+
+    metrics = collector.snapshot()
+    assert metrics['executions'] == 1
+    assert metrics['errors'] == 1
+    assert metrics['rows'] == 3
+    assert metrics['compiling_time'] == pytest.approx(0.002)
+    assert metrics['execution_time'] == pytest.approx(0.003)
+
+
+def test_partial_observer_and_logging(caplog):
+    class Started(Observer):
+        queries = []
+
+        def on_execution_started(self, query, parameters):
+            self.queries.append(query)
+
+    started = hooks.subscribe(Started())
+    logger = hooks.subscribe(LoggingObserver(level=logging.INFO))
+    try:
+        with caplog.at_level(logging.INFO, logger='cymple'):
+            run(FakeConnection(), 'MATCH (n) RETURN n')
+    finally:
+        hooks.unsubscribe(started)
+        hooks.unsubscribe(logger)
+
+    assert Started.queries == ['MATCH (n) RETURN n']
+    assert 'Executing: MATCH (n) RETURN n' in caplog.text
+    assert '3 rows' in caplog.text
+
+
+def test_failing_observer_is_isolated(caplog):
+    class Failing(Observer):
+        def on_execution_finished(self, **payload):
+            raise RuntimeError('observer bug')
+
+    failing = hooks.subscribe(Failing())
+    try:
+        with caplog.at_level(logging.ERROR, logger='cymple.hooks'):
+            assert run(FakeConnection(), 'MATCH (n) RETURN n') == [{'n': 1}, {'n': 2}, {'n': 3}]
+    finally:
+        hooks.unsubscribe(failing)
+    assert 'failed to handle the execution_finished event' in caplog.text
+
+
+def test_rendered_once_per_query(collector):
+    query = QueryBuilder().match().node('A', 'a').return_literal('a')
+    str(query)
+    str(query)
+    assert collector.snapshot()['queries_rendered'] == 1
+
+
+def test_executor_is_abstract():
+    from cymple.execution import Executor
+    with pytest.raises(TypeError):
+        Executor()
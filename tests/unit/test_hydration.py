@@ -0,0 +1,74 @@
+from decimal import Decimal
+from typing import List
+
+import pytest
+from cymple import QueryBuilder
+from cymple.execution import run
+from cymple.hydration import column_types, hydrate, hydrate_value
+from cymple.table_model import TableModel, count_all
+
+
+class Order(TableModel):
+    id: int
+    city: str
+    amount: int
+    weight: float
+
+
+n = Order('n')
+query = QueryBuilder().match().node(Order, n).return_aggregate(
+    group_by=[n.city], metrics={'total': n.amount.sum(), 'orders': count_all(), 'mean': n.weight.avg(),
+                                'ids': n.id.collect()})
+
+
+class RowsConnection:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def execute(self, query, parameters=None):
+        return self.rows
+
+
+def test_column_types_follow_the_query():
+    types = {'n.city': str, 'total': int, 'orders': int, 'mean': float, 'ids': List[int]}
+    assert column_types(query) == types
+    assert column_types(query.order_by('total').skip(1).limit(2)) == types
+    assert column_types(query.first()) == types
+    assert column_types(query.cypher('LIMIT 3')) == types
+    tail = QueryBuilder().with_('n').return_aggregate(group_by=[n.city], metrics={'orders': count_all()})
+    assert column_types(QueryBuilder().match().node(Order, n) + tail) == {'n.city': str, 'orders': int}
+    assert column_types(QueryBuilder().match().node(Order, n).return_literal('n.city')) is None
+
+
+@pytest.mark.parametrize('value, type_, expected', [
+    (Decimal('8'), int, 8),
+    (3, float, 3.0),
+    (None, int, None),
+    ('x', None, 'x'),
+    ([Decimal('1'), None], List[int], [1, None]),
+    ([1], list, [1]),
+])
+def test_hydrate_value(value, type_, expected):
+    hydrated = hydrate_value(value, type_)
+    assert hydrated == expected and type(hydrated) is type(expected)
+
+
+def test_hydrated_results():
+    rows = [{'n.city': 'Paris', 'total': Decimal('12'), 'orders': 2, 'mean': 1, 'ids': [Decimal('1'), 2]}]
+    assert run(RowsConnection(rows), query) == \
+        [{'n.city': 'Paris', 'total': 12, 'orders': 2, 'mean': 1.0, 'ids': [1, 2]}]
+    assert run(RowsConnection(rows), query.first())['total'] == 12
+    assert run(RowsConnection([]), query.first()) is None
+    with pytest.raises(TypeError):
+        hydrate([{'total': 'many'}], {'total': int})
+
+
+@pytest.mark.parametrize('group_by, metrics', [
+    ([n.city], {}),
+    ([n.amount.sum()], {'orders': count_all()}),
+    ([n.city], {'amount': n.amount + 1}),
+    ([n.city], {'total': 'sum(n.amount)'}),
+])
+def test_invalid_aggregations(group_by, metrics):
+    with pytest.raises(ValueError):
+        QueryBuilder().match().node(Order, n).return_aggregate(group_by=group_by, metrics=metrics)
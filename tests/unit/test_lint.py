@@ -0,0 +1,104 @@
+import pytest
+from cymple import QueryBuilder
+from cymple.__main__ import main
+from cymple.lint import LintCollector, lint, lint_modules
+from cymple.hooks import hooks
+
+qb = QueryBuilder()
+
+findings = {
+    'clean': (
+        qb.match().node('Person', 'p').related_to('Knows', min_hops=1, max_hops=3).node('Person', 'f')
+        .return_literal('p.name, f.name'), []),
+    'unbounded_path': (
+        qb.match().node('Person', 'p').related_to('Knows', min_hops=1, max_hops=-1).node('Person', 'f')
+        .return_literal('f.name'), ['unbounded-path']),
+    'unbounded_shortest_path': (
+        'MATCH (a)-[r* SHORTEST]->(b) RETURN length(r)', ['unbounded-path']),
+    'unbounded_filtered_path': (
+        qb.match().node('Person', 'p').related_to('Knows', min_hops=1, max_hops=-1, rel_filter='r.since > 2000')
+        .node('Person', 'f').return_literal('f.name'), ['unbounded-path']),
+    'unbounded_projected_path': (
+        qb.match().node('Person', 'p').related_to('Knows', min_hops=2, max_hops=-1, node_projection=['name'])
+        .node('Person', 'f').return_literal('f.name'), ['unbounded-path']),
+    'bounded_filtered_path': (
+        qb.match().node('Person', 'p').related_to('Knows', min_hops=1, max_hops=3, rel_filter='r.since > 2000')
+        .node('Person', 'f').return_literal('f.name'), []),
+    'unbounded_weighted_shortest_path': (
+        'MATCH (a)-[r* WSHORTEST(w)]->(b) RETURN length(r)', ['unbounded-path']),
+    'bounded_weighted_shortest_path': (
+        'MATCH (a)-[r* WSHORTEST(w) 1..3]->(b) RETURN length(r)', []),
+    'fixed_length_path': (
+        'MATCH (a)-[r*3]->(b) RETURN b.id', []),
+    'cartesian_product': (
+        qb.match().node('Person', 'p').and_().node('Company', 'c').return_literal('p.name, c.name'),
+        ['cartesian-product']),
+    'joined_patterns': (
+        qb.match().node('Person', 'p').and_().node('Company', 'c').where_literal('p.company = c.id')
+        .return_literal('p.name, c.name'), []),
+    'filtered_patterns': (
+        qb.match().node('Person', 'p').and_().node('Company', 'c').where_literal('p.age = 1 AND c.id = 2')
+        .return_literal('p.name, c.name'), ['cartesian-product']),
+    'connected_patterns': (
+        'MATCH (a)-[:R]->(b), (b)-[:R]->(c) RETURN a.id', []),
+    'matches_on_unwound_values': (
+        'UNWIND $rows AS row MATCH (p:Person {id: row.id}) RETURN p.name', []),
+    'disconnected_second_match': (
+        'MATCH (a:A) MATCH (b:B) RETURN a.id, b.id', ['cartesian-product']),
+    'whole_entity': (
+        qb.match().node('Person', 'n').return_literal('n'), ['return-whole-entity']),
+    'deep_skip': (
+        qb.match().node('Person', 'n').return_literal('n.id').skip(5000).limit(10), ['deep-skip']),
+    'shallow_skip': (
+        qb.match().node('Person', 'n').return_literal('n.id').skip(20).limit(10), []),
+    'inline_list': (
+        qb.match().node('Person', 'n').where_literal(f'n.id IN {list(range(500))}').return_literal('n.id'),
+        ['inline-list']),
+}
+
+
+@pytest.mark.parametrize('query,rules', findings.values(), ids=findings.keys())
+def test_lint(query, rules):
+    assert [finding.rule for finding in lint(query)] == rules
+
+
+def test_severities_and_thresholds():
+    query = qb.match().node('Person', 'n').return_literal('n').skip('$offset')
+    assert [(finding.rule, finding.severity) for finding in lint(query)] == [('return-whole-entity', 'info'),
+                                                                             ('deep-skip', 'info')]
+    assert lint('MATCH (n) WHERE n.id IN [1, 2, 3] RETURN n.id', max_list_items=2)[0].rule == 'inline-list'
+
+
+def test_collector():
+    collector = hooks.subscribe(LintCollector(min_severity='warning'))
+    try:
+        str(findings['cartesian_product'][0])
+        str(findings['whole_entity'][0])
+    finally:
+        hooks.unsubscribe(collector)
+    assert list(collector.reported()) == ['MATCH (p: Person), (c: Company) RETURN p.name, c.name']
+    assert collector.max_severity() == 'warning'
+
+
+def test_lint_modules_and_command(tmp_path, capsys):
+    module = tmp_path / 'queries.py'
+    module.write_text(
+        'from cymple import QueryBuilder\n'
+        'unbounded = QueryBuilder().match().node("A", "a").related(min_hops=1, max_hops=-1).node("B", "b")'
+        '.return_literal("b.id")\n'
+        'def build():\n'
+        '    return QueryBuilder().match().node("A", "a").return_literal("a")\n'
+        'str(build())\n')
+    reported = lint_modules([str(module)])
+    assert [[finding.rule for finding in found] for found in reported.values()] == [['return-whole-entity'],
+                                                                                    ['unbounded-path']]
+
+    assert main(['lint', str(module)]) == 1
+    output = capsys.readouterr().out
+    assert 'ERROR [unbounded-path]' in output
+    assert '2 finding(s) in 2 query(ies)' in output
+
+    module.write_text('from cymple import QueryBuilder\n'
+                      'query = QueryBuilder().match().node("A", "a").return_literal("a")\n')
+    assert main(['lint', str(module)]) == 0
+    assert main(['lint', str(module), '--fail-on', 'info']) == 1
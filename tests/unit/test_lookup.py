@@ -0,0 +1,77 @@
+import threading
+import time
+
+import pytest
+from cymple import QueryBuilder
+from cymple.lookup import batch_lookup, chunks, lookup_query
+from cymple.table_model import TableModel, param
+
+
+class Person(TableModel):
+    id: int
+
+
+class KeysConnection:
+    """Return a row per looked up key (odd keys only), answering larger chunks faster."""
+
+    size = 3
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = []
+
+    def execute(self, query, parameters=None):
+        with self.lock:
+            self.calls.append((query, list(parameters['keys'])))
+        time.sleep(0.01 / len(parameters['keys']))
+        return [{'id': key, 'name': f'p{key}'} for key in reversed(parameters['keys']) if key % 2]
+
+
+query = QueryBuilder().match().node('Person', 'n').where('n.age', '>', 3).return_literal('n.id AS id, n.name AS name')
+
+
+def test_lookup_query():
+    assert lookup_query(query, 'n.id') == \
+        'MATCH (n: Person) WHERE (n.age > 3) AND (n.id IN $keys) RETURN n.id AS id, n.name AS name'
+    n = Person('n')
+    template = QueryBuilder().match().node(Person, n).where_literal(n.id.is_in(param('ids'))).return_literal(n.id)
+    assert lookup_query(template, parameter='ids') == str(template)
+    with pytest.raises(ValueError):
+        lookup_query(template)
+
+
+def test_chunks():
+    assert list(chunks([1, 2, 2, 3, 1, 4, 5], 2)) == [[1, 2], [3, 4], [5]]
+    assert list(chunks([], 2)) == []
+    with pytest.raises(ValueError):
+        list(chunks([1], 0))
+
+
+def test_batch_lookup():
+    connection = KeysConnection()
+    keys = [9, 1, 4, 7, 7, 3, 10, 5, 11, 13, 15, 17, 19, 21]
+    rows = list(batch_lookup(connection, query, 'n.id', keys, chunk_size=2, restore_order=True))
+    assert [row['id'] for row in rows] == [9, 1, 7, 3, 5, 11, 13, 15, 17, 19, 21]
+    assert len(connection.calls) == 7
+    assert all(called == lookup_query(query, 'n.id') for called, _ in connection.calls)
+
+    rows = list(batch_lookup(connection, query, 'n.id', keys, chunk_size=2))
+    assert sorted(row['id'] for row in rows) == [1, 3, 5, 7, 9, 11, 13, 15, 17, 19, 21]
+
+
+def test_streamed_lookup_stops_early():
+    connection = KeysConnection()
+    rows = batch_lookup(connection, query, 'n.id', range(1, 10000, 2), chunk_size=10, restore_order=True)
+    assert [next(rows)['id'] for _ in range(3)] == [1, 3, 5]
+    rows.close()
+    assert len(connection.calls) <= 2 * KeysConnection.size + 1
+
+
+@pytest.mark.parametrize('key, parameters, restore_order', [
+    ('n.age', None, True),
+    (None, None, False),
+    ('n.id', {'keys': [1]}, False),
+])
+def test_invalid_lookups(key, parameters, restore_order):
+    with pytest.raises(ValueError):
+        list(batch_lookup(KeysConnection(), query, key, [1], parameters=parameters, restore_order=restore_order))
@@ -0,0 +1,102 @@
+import time
+
+import pytest
+from cymple import QueryBuilder
+from cymple.materialized import MaterializedView
+
+
+class TypedResult:
+    def __init__(self, columns, types):
+        self.columns = columns
+        self.types = types
+
+    def get_column_names(self):
+        return self.columns
+
+    def get_column_data_types(self):
+        return self.types
+
+
+class CopyConnection:
+    def __init__(self, columns=('name', 'total'), types=('STRING', 'INT64'), fail_copy=False):
+        self.columns = list(columns)
+        self.types = list(types)
+        self.fail_copy = fail_copy
+        self.statements = []
+
+    def execute(self, query, parameters=None):
+        self.statements.append(query)
+        if query.endswith('LIMIT 0'):
+            return TypedResult(self.columns, self.types)
+        if query.startswith('COPY'):
+            if self.fail_copy:
+                raise RuntimeError('Copy exception')
+            return [{'result': '2 tuples have been copied to the Summary table.'}]
+        return []
+
+
+query = QueryBuilder().match().node('P', 'n').where_literal('n.id >= $min') \
+    .return_literal('n.name AS name, count(*) AS total').order_by('total')
+
+
+def test_create_and_refresh():
+    connection = CopyConnection()
+    view = query.materialize(connection, 'Summary', key='name', parameters={'min': 1})
+    assert connection.statements == [
+        'MATCH (n: P) WHERE n.id >= $min RETURN n.name AS name, count(*) AS total LIMIT 0',
+        'CREATE NODE TABLE IF NOT EXISTS Summary(name STRING, total INT64, PRIMARY KEY(name))',
+        'BEGIN TRANSACTION',
+        'MATCH (row: Summary) DELETE row',
+        'COPY Summary(name, total) FROM (MATCH (n: P) WHERE n.id >= $min RETURN n.name AS name, count(*) AS total '
+        'ORDER BY total ASC)',
+        'COMMIT',
+    ]
+    assert view.rows == 2
+    assert view.refreshes == 1
+    assert view.age < 1
+    assert not view.is_stale(60)
+    assert view.is_stale(-1)
+
+
+def test_serial_key_and_explicit_types():
+    view = MaterializedView(CopyConnection(), 'Summary', query, column_types={'name': 'STRING', 'total': 'INT64'})
+    assert view.create_statement() == \
+        'CREATE NODE TABLE IF NOT EXISTS Summary(row_id SERIAL, name STRING, total INT64, PRIMARY KEY(row_id))'
+    assert view.is_stale(60)
+
+
+@pytest.mark.parametrize('columns, types, key', [
+    (['n.name'], ['STRING'], None),
+    (['n'], ['NODE'], None),
+    (['name'], ['STRING'], 'id'),
+])
+def test_invalid_projections(columns, types, key):
+    with pytest.raises(ValueError):
+        MaterializedView(CopyConnection(columns, types), 'Summary', query, key=key).create_statement()
+
+
+def test_only_read_queries():
+    with pytest.raises(ValueError):
+        MaterializedView(CopyConnection(), 'Summary', 'MATCH (n) SET n.x = 1 RETURN n.x AS x')
+
+
+def test_failed_refresh_is_rolled_back():
+    connection = CopyConnection(fail_copy=True)
+    view = MaterializedView(connection, 'Summary', query, key='name')
+    with pytest.raises(RuntimeError):
+        view.refresh()
+    assert connection.statements[-1] == 'ROLLBACK'
+    assert view.refreshed_at is None
+
+
+def test_scheduled_refreshes():
+    errors = []
+    view = MaterializedView(CopyConnection(fail_copy=True), 'Summary', query, key='name')
+    with view.schedule(0.01, on_error=errors.append):
+        time.sleep(0.1)
+    assert errors and isinstance(view.last_error, RuntimeError)
+
+    view = MaterializedView(CopyConnection(), 'Summary', query, key='name').schedule(0.01)
+    time.sleep(0.1)
+    view.stop()
+    assert view.refreshes > 0
@@ -0,0 +1,86 @@
+import pytest
+from cymple import QueryBuilder
+from cymple.pagination import keyset_predicate, keyset_queries
+
+
+class FakeExecutor:
+    """Serves pages out of an in-memory, already sorted, list of rows."""
+
+    def __init__(self, rows, columns):
+        self.rows = rows
+        self.columns = columns
+        self.calls = []
+
+    def execute(self, query, parameters):
+        self.calls.append((query, parameters))
+        rows = self.rows
+        if 'last' in parameters:
+            rows = [row for row in rows if row[self.columns[0]] > parameters['last']]
+        elif 'last_0' in parameters:
+            last = tuple(parameters[f'last_{i}'] for i in range(len(self.columns)))
+            rows = [row for row in rows if tuple(row[column] for column in self.columns) > last]
+        return rows[:parameters['size']]
+
+
+def test_keyset_queries():
+    query = QueryBuilder().match().node('Person', 'n').return_mapping([('n.id', 'id'), ('n.name', 'name')])
+    first, following = keyset_queries(query, 'n.id')
+    assert first == 'MATCH (n: Person) RETURN n.id AS id, n.name AS name ORDER BY n.id ASC LIMIT $size'
+    assert following == ('MATCH (n: Person) WHERE n.id > $last RETURN n.id AS id, n.name AS name '
+                         'ORDER BY n.id ASC LIMIT $size')
+
+
+def test_keyset_queries_existing_where_and_skip():
+    query = QueryBuilder().match().node('Person', 'n').where('n.age', '>', 18).return_literal('n.id')
+    _, following = keyset_queries(query, 'n.id', descending=True)
+    assert following == ('MATCH (n: Person) WHERE (n.age > 18) AND (n.id < $last) RETURN n.id '
+                         'ORDER BY n.id DESC LIMIT $size')
+    with pytest.raises(ValueError):
+        keyset_queries(query.skip(100).limit(10), 'n.id')
+
+
+def test_keyset_predicate_composite():
+    assert keyset_predicate(['a', 'b', 'c']) == \
+        '(a > $last_0) OR (a = $last_0 AND b > $last_1) OR (a = $last_0 AND b = $last_1 AND c > $last_2)'
+
+
+def test_paginate():
+    executor = FakeExecutor([{'id': i} for i in range(7)], ['id'])
+    query = QueryBuilder().match().node('Person', 'n').return_mapping(('n.id', 'id'))
+    pages = list(query.paginate(executor, 'n.id', 3))
+    assert pages == [[{'id': 0}, {'id': 1}, {'id': 2}], [{'id': 3}, {'id': 4}, {'id': 5}], [{'id': 6}]]
+    assert [parameters for _, parameters in executor.calls] == \
+        [{'size': 4}, {'last': 2, 'size': 4}, {'last': 5, 'size': 4}]
+
+
+def test_paginate_composite_key():
+    rows = [{'a': a, 'b': b} for a in range(2) for b in range(3)]
+    executor = FakeExecutor(rows, ['a', 'b'])
+    query = QueryBuilder().match().node('Pair', 'p').return_mapping([('p.a', 'a'), ('p.b', 'b')])
+    pages = list(query.paginate(executor, ['p.a', 'p.b'], 2))
+    assert [row for page in pages for row in page] == rows
+    assert executor.calls[1][1] == {'last_0': 0, 'last_1': 1, 'size': 3}
+
+
+def test_paginate_key_not_returned():
+    query = QueryBuilder().match().node('Person', 'n').return_literal('n.name')
+    with pytest.raises(ValueError):
+        next(query.paginate(FakeExecutor([], ['id']), 'n.id', 10))
+
+
+def test_paginate_non_unique_key():
+    executor = FakeExecutor([{'score': 1}, {'score': 2}, {'score': 2}, {'score': 3}], ['score'])
+    query = QueryBuilder().match().node('Person', 'n').return_mapping(('n.score', 'score'))
+    with pytest.raises(ValueError):
+        list(query.paginate(executor, 'n.score', 3))
+
+
+def test_paginate_key_tying_across_pages():
+    executor = FakeExecutor([{'score': 1}, {'score': 2}, {'score': 3}, {'score': 3}, {'score': 4}], ['score'])
+    query = QueryBuilder().match().node('Person', 'n').return_mapping(('n.score', 'score'))
+    with pytest.raises(ValueError):
+        list(query.paginate(executor, 'n.score', 3))
+    pages = query.paginate(executor, 'n.score', 2)
+    assert next(pages) == [{'score': 1}, {'score': 2}]
+    with pytest.raises(ValueError):
+        next(pages)
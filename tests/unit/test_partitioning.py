@@ -0,0 +1,116 @@
+import re
+import pytest
+from cymple import QueryBuilder
+from cymple.execution import ConnectionPool
+from cymple.partitioning import partition_predicates
+
+ROWS = [{'id': i, 'score': (i * 7) % 10} for i in range(20)]
+
+
+class FakeConnection:
+    """Serves the rows of the partition selected by a rendered "f.id % N = bucket" or range predicate."""
+
+    queries = []
+    rows = ROWS
+
+    def execute(self, query, parameters):
+        FakeConnection.queries.append((query, parameters))
+        nulls = 'f.id IS NULL' in query
+        rows = [row for row in self.rows if row['id'] is not None or nulls]
+        bucket = re.search(r'% (\d+) = (\d+)', query)
+        if bucket:
+            partitions, bucket = int(bucket.group(1)), int(bucket.group(2))
+            rows = [row for row in rows if row['id'] is None or row['id'] % partitions == bucket]
+        if 'partition_low' in parameters:
+            rows = [row for row in rows if row['id'] is not None and row['id'] >= parameters['partition_low']]
+        if 'partition_high' in parameters:
+            rows = [row for row in rows if row['id'] is None or row['id'] < parameters['partition_high']]
+        if 'ORDER BY score DESC, id ASC' in query:
+            rows = sorted(rows, key=lambda row: (-row['score'], row['id']))
+        limit = re.search(r'LIMIT (\d+)$', query)
+        return rows[:int(limit.group(1))] if limit else rows
+
+
+@pytest.fixture
+def pool():
+    FakeConnection.queries = []
+    FakeConnection.rows = ROWS
+    return ConnectionPool(size=2, connection_factory=FakeConnection)
+
+
+def test_partition_predicates():
+    assert partition_predicates('f.id', 2) == [('f.id IS NULL OR hash(f.id) % 2 = 0', {}),
+                                               ('f.id IS NOT NULL AND hash(f.id) % 2 = 1', {})]
+    assert partition_predicates('f.id', 2, 'modulo') == [('f.id IS NULL OR ((f.id % 2) + 2) % 2 = 0', {}),
+                                                         ('f.id IS NOT NULL AND ((f.id % 2) + 2) % 2 = 1', {})]
+    assert partition_predicates('f.id', method='range', bounds=[10, 20]) == [
+        ('f.id IS NULL OR f.id < $partition_high', {'partition_high': 10}),
+        ('f.id >= $partition_low AND f.id < $partition_high', {'partition_low': 10, 'partition_high': 20}),
+        ('f.id >= $partition_low', {'partition_low': 20}),
+    ]
+    with pytest.raises(ValueError):
+        partition_predicates('f.id', method='range')
+
+
+def test_execute_partitioned(pool):
+    query = QueryBuilder().match().node('Finding', 'f').where('f.id', '>=', 0).return_mapping(('f.id', 'id'))
+    rows = query.execute_partitioned(pool, 'f.id', partitions=3, method='modulo')
+    assert sorted(row['id'] for row in rows) == list(range(20))
+    assert sorted(query for query, _ in FakeConnection.queries) == [
+        'MATCH (f: Finding) WHERE (f.id >= 0) AND (f.id IS NOT NULL AND ((f.id % 3) + 3) % 3 = 1) RETURN f.id AS id',
+        'MATCH (f: Finding) WHERE (f.id >= 0) AND (f.id IS NOT NULL AND ((f.id % 3) + 3) % 3 = 2) RETURN f.id AS id',
+        'MATCH (f: Finding) WHERE (f.id >= 0) AND (f.id IS NULL OR ((f.id % 3) + 3) % 3 = 0) RETURN f.id AS id']
+
+
+@pytest.mark.parametrize('method, bounds', [('modulo', None), ('hash', None), ('range', [-2, 3])])
+def test_execute_partitioned_null_and_negative_keys(pool, method, bounds):
+    FakeConnection.rows = [{'id': key} for key in [-7, -3, -1, 0, 1, 2, 5, None, None]]
+    query = QueryBuilder().match().node('Finding', 'f').return_mapping(('f.id', 'id'))
+    rows = query.execute_partitioned(pool, 'f.id', partitions=3, method=method, bounds=bounds)
+    assert sorted(rows, key=repr) == sorted(FakeConnection.rows, key=repr)
+
+
+def test_execute_partitioned_preserves_order(pool):
+    query = (QueryBuilder().match().node('Finding', 'f')
+             .return_mapping([('f.id', 'id'), ('f.score', 'score')])
+             .cypher('ORDER BY score DESC, id ASC SKIP 2 LIMIT 5'))
+    rows = query.execute_partitioned(pool, 'f.id', partitions=4, method='modulo')
+    assert rows == sorted(ROWS, key=lambda row: (-row['score'], row['id']))[2:7]
+    assert all(query.endswith('LIMIT 7') for query, _ in FakeConnection.queries)
+
+
+def test_execute_partitioned_ranges(pool):
+    query = QueryBuilder().match().node('Finding', 'f').return_mapping(('f.id', 'id')).order_by('id')
+    rows = query.execute_partitioned(pool, 'f.id', method='range', bounds=[5, 12])
+    assert [row['id'] for row in rows] == list(range(20))
+
+
+class AggregatingConnection:
+    """Serves partial aggregates, per partition selected by a rendered "f.id % 2 = bucket" predicate."""
+
+    queries = []
+    groups = {'0': [{'parity': 0, 'findings': 2, 'last': 8}, {'parity': 1, 'findings': 1, 'last': 5}],
+              '1': [{'parity': 1, 'findings': 3, 'last': 9}]}
+
+    def execute(self, query, parameters):
+        AggregatingConnection.queries.append(query)
+        return self.groups[re.search(r'% 2 = (\d+)', query).group(1)]
+
+
+def test_execute_partitioned_aggregates():
+    pool = ConnectionPool(size=2, connection_factory=AggregatingConnection)
+    query = 'MATCH (f: Finding) RETURN f.score % 2 AS parity, count(*) AS findings, max(f.id) AS last ' \
+            'ORDER BY findings DESC LIMIT 1'
+    rows = QueryBuilder().cypher(query).execute_partitioned(pool, 'f.id', partitions=2, method='modulo')
+    assert rows == [{'parity': 1, 'findings': 4, 'last': 9}]
+    assert all(query.endswith('AS last') for query in AggregatingConnection.queries)
+    with pytest.raises(ValueError):
+        QueryBuilder().cypher('MATCH (f: Finding) RETURN avg(f.score) AS mean').execute_partitioned(pool, 'f.id')
+
+
+def test_execute_partitioned_rejects_unordered_windows(pool):
+    query = QueryBuilder().match().node('Finding', 'f').return_mapping(('f.id', 'id')).order_by('id').limit(3)
+    with pytest.raises(ValueError):
+        query.execute_partitioned(pool, 'f.id', preserve_order=False)
+    assert len(QueryBuilder().match().node('Finding', 'f').return_mapping(('f.id', 'id')).limit(3)
+               .execute_partitioned(pool, 'f.id', partitions=2, method='modulo', preserve_order=False)) == 3
@@ -0,0 +1,68 @@
+import pytest
+from cymple import QueryBuilder, Session
+from cymple.execution import ConnectionPool, run
+from cymple.plan import Plan
+from ..data.plans import EXPLAIN_PLAN, PROFILE_PLAN
+
+
+class PlanConnection:
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, query, parameters):
+        self.statements.append(query)
+        return [{'explain result': PROFILE_PLAN if query.startswith('PROFILE') else EXPLAIN_PLAN}]
+
+
+query = QueryBuilder().match().node('P', 'a').where_literal('a.name = "a"').return_literal('a.name')
+
+
+def test_explain_and_profile_prefix_the_query():
+    assert str(query.explain()) == 'EXPLAIN MATCH (a: P) WHERE a.name = "a" RETURN a.name'
+    assert str(query.profile()) == 'PROFILE MATCH (a: P) WHERE a.name = "a" RETURN a.name'
+    assert getattr(query, 'result_shape', None) is None
+
+
+@pytest.mark.parametrize('executor', [PlanConnection, lambda: ConnectionPool(size=1, connection_factory=PlanConnection),
+                                      lambda: Session(PlanConnection())])
+def test_executed_plans(executor):
+    executor = executor()
+    plan = run(executor, query.explain())
+    assert isinstance(plan, Plan)
+    assert not plan.profiled
+    assert [node.name for node in plan.operators] == ['RESULT_COLLECTOR', 'PROJECTION', 'FILTER', 'SCAN_NODE_TABLE']
+    assert plan.root.cardinality is None
+    assert plan.total_time is None
+    assert run(executor, query.profile()).profiled
+    assert run(executor, str(query.profile())) == [{'explain result': PROFILE_PLAN}]
+
+
+def test_most_expensive_operator():
+    plan = Plan.parse(PROFILE_PLAN)
+    assert plan.most_expensive().id == 5
+    assert plan.most_expensive('cardinality').cardinality == 2
+    assert plan.total_time == pytest.approx(0.000896)
+    assert Plan.parse(EXPLAIN_PLAN, profiled=False).most_expensive() is None
+    with pytest.raises(ValueError):
+        plan.most_expensive('memory')
+
+
+def test_plan_diff():
+    explain = Plan.parse(EXPLAIN_PLAN, profiled=False)
+    assert not explain.diff(Plan.parse(EXPLAIN_PLAN))
+
+    without_filter = Plan.parse(EXPLAIN_PLAN, profiled=False)
+    projection = without_filter.find('PROJECTION')[0]
+    projection.children = projection.children[0].children
+    diff = explain.diff(without_filter)
+    assert diff
+    assert [node.name for node in diff.removed] == ['FILTER']
+    assert diff.added == []
+    assert '-    FILTER (Details: EQUALS(a.name))' in str(diff).splitlines()
+
+
+def test_format():
+    assert Plan.parse(PROFILE_PLAN).format().splitlines()[:3] == [
+        'RESULT_COLLECTOR (Expressions: a.name, x.name) [2 rows, 0.514ms]',
+        '  PROJECTION (Expressions: a.name, x.name) [2 rows, 0.002ms]',
+        '    CROSS_PRODUCT [1 rows, 0.009ms]']
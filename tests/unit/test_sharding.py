@@ -0,0 +1,95 @@
+import pytest
+from cymple import QueryBuilder
+from cymple.partitioning import combine, recombination
+from cymple.sharding import ShardRouter, stable_shard
+
+
+class FakeShard:
+    """Serves fixed rows, recording the queries it executes."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    def execute(self, query, parameters):
+        self.queries.append((query, parameters))
+        return self.rows
+
+
+@pytest.fixture
+def router():
+    return ShardRouter({
+        'a': FakeShard([{'city': 'Paris', 'total': 10, 'orders': 2, 'top': 7},
+                        {'city': 'Rome', 'total': 1, 'orders': 1, 'top': 1}]),
+        'b': FakeShard([{'city': 'Paris', 'total': 5, 'orders': 1, 'top': 5},
+                        {'city': 'Oslo', 'total': 4, 'orders': 3, 'top': 2}]),
+    }, shard_for={'acme': 'a', 'globex': 'b', 'initech': 'c'})
+
+
+def test_recombination():
+    assert recombination('n.name AS name') is None
+    assert recombination('DISTINCT n.name AS name') == [None]
+    combiners = recombination('n.city, count(*) AS c, SUM(n.x) AS s, min(n.x), max(n.x) AS m, lower(n.y) AS y')
+    assert [combiner is None for combiner in combiners] == [True, False, False, False, False, True]
+    for body in ('avg(n.x) AS a', 'count(DISTINCT n.x) AS c', 'collect(n.x) AS c', 'count(n.x) + sum(n.y) AS c',
+                 'sum(n.x) / 2 AS s'):
+        with pytest.raises(ValueError):
+            recombination(body)
+
+
+def test_combine():
+    combiners = recombination('n.tags AS tags, count(*), sum(n.x) AS s, min(n.x) AS low')
+    results = [[{'tags': ['a'], 'c': 2, 's': None, 'low': 3}], [{'tags': ['a'], 'c': 1, 's': 4, 'low': 1},
+                                                                {'tags': [], 'c': 0, 's': None, 'low': None}]]
+    assert combine(results, combiners) == [{'tags': ['a'], 'c': 3, 's': 4, 'low': 1},
+                                           {'tags': [], 'c': 0, 's': None, 'low': None}]
+
+
+def test_routing(router):
+    assert router.shard('acme') == 'a'
+    assert router.write('globex', 'CREATE (n:Person {id: $id})', {'id': 1}) == router.shards['b'].rows
+    assert router.shards['b'].queries == [('CREATE (n:Person {id: $id})', {'id': 1})]
+    with pytest.raises(KeyError):
+        router.shard('initech')
+    with pytest.raises(KeyError):
+        router.shard('unknown')
+    assert stable_shard('acme', ['a', 'b', 'c']) == stable_shard('acme', ['a', 'b', 'c'])
+    assert ShardRouter({'a': FakeShard([]), 'b': FakeShard([])}).shard(42) in ('a', 'b')
+    with pytest.raises(ValueError):
+        ShardRouter({})
+
+
+def test_scatter_gather(router):
+    query = QueryBuilder().match().node('Order', 'n').return_literal('n.city AS city, n.total AS total') \
+        .order_by('total', ascending=False).limit(3)
+    assert [row['total'] for row in router.execute(query)] == [10, 5, 4]
+    assert router.shards['a'].queries[0][0].endswith('ORDER BY total DESC LIMIT 3')
+    assert router.execute('MATCH (n) RETURN n.city AS city', shards=['b']) == router.shards['b'].rows
+    assert not router.shards['a'].queries[1:]
+    with pytest.raises(KeyError):
+        router.execute('MATCH (n) RETURN n', shards=['z'])
+    with pytest.raises(ValueError):
+        router.execute('MATCH (n) SET n.x = 1 RETURN n')
+
+
+def test_scatter_gather_aggregates(router):
+    query = 'MATCH (n:Order) RETURN n.city AS city, sum(n.total) AS total, count(*) AS orders, max(n.total) AS top ' \
+            'ORDER BY total DESC SKIP 1 LIMIT 1'
+    assert router.execute(query) == [{'city': 'Oslo', 'total': 4, 'orders': 3, 'top': 2}]
+    assert router.shards['a'].queries[0][0] == 'MATCH (n:Order) RETURN n.city AS city, sum(n.total) AS total, ' \
+                                               'count(*) AS orders, max(n.total) AS top'
+
+
+@pytest.mark.parametrize('query', [
+    'MATCH (n:Order) WITH n.city AS city, count(*) AS orders RETURN city, orders',
+    'MATCH (n:Order) WITH DISTINCT n.city AS city RETURN city',
+    'MATCH (n:Order) WITH n ORDER BY n.total LIMIT 3 RETURN n.city AS city',
+])
+def test_scatter_gather_rejects_per_shard_results(router, query):
+    with pytest.raises(ValueError):
+        router.execute(query)
+    assert not router.shards['a'].queries
+
+
+def test_scatter_gather_keeps_plain_with(router):
+    assert len(router.execute("MATCH (n:Order) WITH n, 'count(x)' AS label RETURN n.city AS city")) == 4
@@ -0,0 +1,122 @@
+import json
+import logging
+import threading
+import pytest
+from cymple.execution import run
+from cymple.hooks import hooks
+from cymple.plan import parse_plan
+from cymple.slowlog import SlowQueryLog
+from ..data.plans import EXPLAIN_PLAN, PROFILE_PLAN
+
+
+class FakeConnection:
+    def __init__(self, plan=PROFILE_PLAN):
+        self.plan = plan
+        self.statements = []
+
+    def execute(self, query, parameters):
+        self.statements.append(query)
+        if 'FAIL' in query:
+            raise RuntimeError('boom')
+        if query.startswith('PROFILE'):
+            return [{'explain result': self.plan}]
+        return [{'n': 1}]
+
+
+def test_parse_profile_plan():
+    root = parse_plan(PROFILE_PLAN)
+    assert [(node.name, node.id) for node in root.walk()] == [
+        ('RESULT_COLLECTOR', 5), ('PROJECTION', 4), ('CROSS_PRODUCT', 3), ('PRIMARY_KEY_SCAN_NODE_TABLE', 2),
+        ('RESULT_COLLECTOR', 1), ('SCAN_NODE_TABLE', 0)]
+    cross_product = root.children[0].children[0]
+    assert [child.id for child in cross_product.children] == [2, 1]
+    assert cross_product.children[1].children[0].properties == {
+        'Tables': 'P', 'Alias': 'x', 'Properties': 'x.name', 'NumOutputTuples': '2', 'ExecutionTime': '0.050000'}
+    assert root.properties['Expressions'] == 'a.name, x.name'
+    assert root.cardinality == 2
+    assert root.time == pytest.approx(0.000514)
+
+
+def test_parse_explain_plan():
+    root = parse_plan(EXPLAIN_PLAN)
+    assert [node.name for node in root.walk()] == ['RESULT_COLLECTOR', 'PROJECTION', 'FILTER', 'SCAN_NODE_TABLE']
+    assert root.children[0].children[0].properties['Details'] == 'EQUALS(a.name)'
+    assert json.loads(json.dumps(root.to_dict()))['children'][0]['name'] == 'PROJECTION'
+    with pytest.raises(ValueError):
+        parse_plan('no plan')
+
+
+@pytest.fixture
+def slowlog(tmp_path):
+    slowlog = hooks.subscribe(SlowQueryLog(threshold=0, capacity=2, profile_connection=FakeConnection(),
+                                           path=str(tmp_path / 'slow.jsonl')))
+    yield slowlog
+    hooks.unsubscribe(slowlog)
+    slowlog.close()
+
+
+def test_slow_reads_are_profiled(slowlog, tmp_path):
+    run(FakeConnection(), 'MATCH (n: N {x : 1}) RETURN n', {'p': 1})
+    slowlog.wait()
+
+    entry, = slowlog.entries()
+    assert entry['fingerprint'] == 'MATCH (n: N {x : ?}) RETURN n'
+    assert entry['parameters'] == {'p': 1}
+    assert entry['rows'] == 1
+    assert entry['plan'].name == 'RESULT_COLLECTOR'
+    assert slowlog.profile_connection.statements == ['PROFILE MATCH (n: N {x : 1}) RETURN n']
+
+    logged = json.loads((tmp_path / 'slow.jsonl').read_text().splitlines()[0])
+    assert logged['id'] == entry['id']
+    assert logged['plan']['children'][0]['name'] == 'PROJECTION'
+
+
+def test_writes_and_failures_are_not_profiled(slowlog):
+    run(FakeConnection(), 'CREATE (n: N {x : 1})')
+    with pytest.raises(RuntimeError):
+        run(FakeConnection(), 'MATCH (n: N) WHERE FAIL RETURN n')
+    run(FakeConnection(), 'MATCH (n: N) RETURN n')
+    slowlog.wait()
+
+    assert slowlog.profile_connection.statements == ['PROFILE MATCH (n: N) RETURN n']
+    assert len(slowlog) == 2
+    failed, read = slowlog.entries()
+    assert failed['error'] == "RuntimeError('boom')"
+    assert failed['plan'] is None
+    assert read['plan'] is not None
+
+
+def test_threshold_and_logger(caplog):
+    slowlog = hooks.subscribe(SlowQueryLog(threshold=60, logger=logging.getLogger('cymple.slow')))
+    try:
+        run(FakeConnection(), 'MATCH (n: N) RETURN n')
+        assert len(slowlog) == 0
+        slowlog.threshold = 0
+        with caplog.at_level(logging.WARNING, logger='cymple.slow'):
+            run(FakeConnection(), 'MATCH (n: N) RETURN n')
+    finally:
+        hooks.unsubscribe(slowlog)
+    assert len(slowlog) == 1
+    assert 'Slow query' in caplog.text
+
+
+class ThreadRecordingConnection(FakeConnection):
+    def execute(self, query, parameters):
+        self.thread = threading.current_thread()
+        return super().execute(query, parameters)
+
+
+def test_fingerprints_are_profiled_once_off_the_caller_thread():
+    connection = ThreadRecordingConnection()
+    slowlog = hooks.subscribe(SlowQueryLog(threshold=0, profile_connection=connection))
+    try:
+        for x in range(3):
+            run(FakeConnection(), f'MATCH (n: N {{x : {x}}}) RETURN n')
+        slowlog.wait()
+        run(FakeConnection(), 'MATCH (n: N {x : 4}) RETURN n')
+    finally:
+        hooks.unsubscribe(slowlog)
+        slowlog.close()
+    assert connection.statements == ['PROFILE MATCH (n: N {x : 0}) RETURN n']
+    assert connection.thread is not threading.current_thread()
+    assert slowlog.entries()[-1]['plan'] is slowlog.entries()[0]['plan'] is not None
@@ -0,0 +1,106 @@
+import json
+import pytest
+from cymple import QueryBuilder
+from cymple.execution import run
+from cymple.fingerprint import fingerprint, fingerprint_id, parameterize
+from cymple.hooks import hooks
+from cymple.stats import QueryStats
+
+fingerprints = {
+    'inline_properties': (
+        QueryBuilder().match().node('Person', 'p', {'name': 'Alice', 'age': 42}).return_literal('p'),
+        'MATCH (p: Person {name : ?, age : ?}) RETURN p'),
+    'parameters_kept': (
+        'MATCH (p:Person) WHERE p.age > $age AND p.score >= 1.5e3 RETURN p LIMIT 10',
+        'MATCH (p:Person) WHERE p.age > $age AND p.score >= ? RETURN p LIMIT ?'),
+    'literal_lists_collapsed': (
+        'MATCH (p:Person) WHERE p.id IN [1, 2, 3] AND p.flag = true RETURN p',
+        'MATCH (p:Person) WHERE p.id IN [?] AND p.flag = ? RETURN p'),
+    'escaped_quotes': (
+        "MATCH (p:Person) WHERE p.name = 'O\\'Hara' RETURN p",
+        'MATCH (p:Person) WHERE p.name = ? RETURN p'),
+    'structure_kept': (
+        'MATCH (a:Node1)-[r:Rel*1..3]->(b:`Node 2`) WHERE b.x2 IS NULL RETURN a.x1, b.true_1',
+        'MATCH (a:Node1)-[r:Rel*1..3]->(b:`Node 2`) WHERE b.x2 IS NULL RETURN a.x1, b.true_1'),
+}
+
+
+@pytest.mark.parametrize('query,expected', fingerprints.values(), ids=fingerprints.keys())
+def test_fingerprint(query, expected):
+    assert fingerprint(query) == expected
+
+
+def test_parameterize():
+    query = QueryBuilder().match().node('Person', 'p', {'name': 'O\'Hara "x"', 'age': 42}) \
+        .where('p.score', '>=', 1.5e3).set({'p.flag': True, 'p.note': 'a\nb'})
+    assert parameterize(query) == (
+        'MATCH (p: Person {name : $_p0, age : $_p1}) WHERE p.score >= $_p2 SET p.flag = $_p3, p.note = $_p4',
+        {'_p0': 'O\'Hara "x"', '_p1': 42, '_p2': 1500.0, '_p3': True, '_p4': 'a\nb'})
+    assert parameterize('MATCH (a)-[*1..3]->(b) WHERE b.id IN [1, $ids] RETURN b LIMIT 10', prefix='v') == \
+        ('MATCH (a)-[*1..3]->(b) WHERE b.id IN [$v0, $ids] RETURN b LIMIT $v1', {'v0': 1, 'v1': 10})
+
+
+def test_fingerprint_id_is_shared_by_a_shape():
+    first = QueryBuilder().match().node('Person', 'p', {'name': 'Alice'}).return_literal('p')
+    second = QueryBuilder().match().node('Person', 'p', {'name': 'Bob'}).return_literal('p')
+    assert fingerprint_id(first) == fingerprint_id(second)
+    assert len(fingerprint_id(first)) == 16
+    assert fingerprint_id(first) != fingerprint_id('MATCH (p: Company {name : "x"}) RETURN p')
+
+
+def test_aggregation_per_shape():
+    stats = QueryStats()
+    for latency in range(1, 101):
+        stats.record(f'MATCH (p: Person {{id : {latency}}}) RETURN p', latency / 1000, rows=1)
+    stats.record('MATCH (c: Company) RETURN c', 1.0, rows=5, error=RuntimeError('boom'))
+
+    person = stats.get('MATCH (p: Person {id : 0}) RETURN p')
+    assert person['calls'] == 100
+    assert person['rows'] == 100
+    assert person['total_time'] == pytest.approx(5.05)
+    assert person['mean_time'] == pytest.approx(0.0505)
+    assert person['p99_time'] == pytest.approx(0.099)
+    assert person['max_time'] == pytest.approx(0.1)
+    assert person['last_sample']['query'] == 'MATCH (p: Person {id : 100}) RETURN p'
+
+    assert [shape['calls'] for shape in stats.top(sort='calls')] == [100, 1]
+    assert [shape['errors'] for shape in stats.top()] == [0, 1]
+    assert stats.get('MATCH (x) RETURN x') is None
+    with pytest.raises(ValueError):
+        stats.top(sort='nope')
+
+
+def test_registry_is_bounded():
+    stats = QueryStats(max_shapes=2)
+    stats.record('MATCH (a: A) RETURN a', 0.1)
+    stats.record('MATCH (b: B) RETURN b', 0.1)
+    stats.record('MATCH (a: A) RETURN a', 0.1)
+    stats.record('MATCH (c: C) RETURN c', 0.1)
+    assert len(stats) == 2
+    assert stats.evictions == 1
+    assert stats.get('MATCH (b: B) RETURN b') is None
+
+
+def test_dumps_and_hooks():
+    class Connection:
+        def execute(self, query, parameters):
+            return [{'n': 1}, {'n': 2}]
+
+    stats = hooks.subscribe(QueryStats())
+    try:
+        run(Connection(), 'MATCH (n: N {x : 1}) RETURN n', {'p': 1})
+        run(Connection(), 'MATCH (n: N {x : 2}) RETURN n')
+    finally:
+        hooks.unsubscribe(stats)
+
+    dumped = json.loads(stats.to_json())
+    assert len(dumped) == 1
+    assert dumped[0]['shape'] == 'MATCH (n: N {x : ?}) RETURN n'
+    assert dumped[0]['calls'] == 2
+    assert dumped[0]['rows'] == 4
+
+    table = stats.table().splitlines()
+    assert table[0].split() == ['id', 'calls', 'errors', 'rows', 'total', 'ms', 'mean', 'ms', 'p99', 'ms', 'shape']
+    assert table[1].endswith('MATCH (n: N {x : ?}) RETURN n')
+    stats.reset()
+    assert len(stats) == 0
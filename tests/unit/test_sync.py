@@ -0,0 +1,80 @@
+import pytest
+from cymple.sync import CREATE, DELETE, UPDATE, Change, diff_rows, row_hash, sync
+from cymple.table_model import TableModel
+
+
+class Person(TableModel):
+    id: int
+    name: str
+    score: float
+
+
+class TableConnection:
+    """Serve the keyset pages of an in-memory table, and record the writes."""
+
+    def __init__(self, rows):
+        self.rows = sorted(rows, key=lambda row: row['id'])
+        self.reads = 0
+        self.writes = []
+
+    def execute(self, query, parameters=None):
+        if query.startswith('MATCH'):
+            self.reads += 1
+            rows = [row for row in self.rows if 'last' not in parameters or row['id'] > parameters['last']]
+            return [dict(row) for row in rows[:parameters['size']]]
+        self.writes.append((query, parameters['rows']))
+        return []
+
+
+current = [{'id': 1, 'name': 'a', 'score': 1.0}, {'id': 2, 'name': 'b', 'score': 2.0},
+           {'id': 3, 'name': 'c', 'score': None}, {'id': 4, 'name': 'd', 'score': 4.0}]
+desired = [{'id': 4, 'name': 'd', 'score': 4}, {'id': 2, 'name': 'b', 'score': None},
+           {'id': 1, 'name': 'A', 'score': 1.0}, {'id': 5, 'name': 'e'}]
+
+
+def test_diff_rows():
+    changes = list(diff_rows(sorted(desired, key=lambda row: row['id']), current, 'id', ['name', 'score'],
+                             {'score': float}, delete_missing=True))
+    assert changes == [
+        Change(UPDATE, 1, {'name': 'A'}),
+        Change(UPDATE, 2, {'score': None}),
+        Change(DELETE, 3, {}),
+        Change(CREATE, 5, {'name': 'e', 'score': None}),
+    ]
+    assert row_hash({'name': 'a'}, ['name', 'score']) == row_hash({'name': 'a', 'score': None}, ['name', 'score'])
+    with pytest.raises(ValueError):
+        list(diff_rows([{'id': 2}, {'id': 1}], [], 'id', []))
+
+
+def test_sync_writes_only_changes():
+    connection = TableConnection(current)
+    report = sync(connection, Person, desired, 'id', delete_missing=True, page_size=2)
+    assert connection.reads == 2
+    assert connection.writes == [
+        ('UNWIND $rows AS row MATCH (n: PERSON {id : row.id}) SET n.name = row.name', [{'id': 1, 'name': 'A'}]),
+        ('UNWIND $rows AS row MATCH (n: PERSON {id : row.id}) SET n.score = NULL', [{'id': 2}]),
+        ('UNWIND $rows AS row MATCH (n: PERSON {id : row.id}) DETACH DELETE n', [{'id': 3}]),
+        ('UNWIND $rows AS row CREATE (n: PERSON {id : row.id, name : row.name})', [{'id': 5, 'name': 'e'}]),
+    ]
+    assert {name: report[name] for name in ('created', 'updated', 'deleted', 'unchanged', 'properties_set',
+                                            'properties_removed', 'statements')} == \
+        {'created': 1, 'updated': 2, 'deleted': 1, 'unchanged': 1, 'properties_set': 2, 'properties_removed': 1,
+         'statements': 4}
+    assert len(report['writers']) == 4
+
+
+def test_dry_run_and_kept_rows():
+    connection = TableConnection(current)
+    report = sync(connection, 'Person', desired, 'id', properties=['name'], dry_run=True)
+    assert connection.writes == []
+    assert report['dry_run'] and report['writers'] == {}
+    assert (report['created'], report['updated'], report['deleted'], report['unchanged']) == (1, 1, 0, 2)
+
+
+@pytest.mark.parametrize('model, rows, properties', [
+    ('Person', desired, None),
+    (Person, [{'name': 'x'}], None),
+])
+def test_invalid_syncs(model, rows, properties):
+    with pytest.raises(ValueError):
+        sync(TableConnection(current), model, rows, 'id', properties=properties)
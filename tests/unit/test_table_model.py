@@ -1,6 +1,7 @@
 import pytest
 
-from cymple.table_model import TableModel, Field, Expr
+from cymple import QueryBuilder
+from cymple.table_model import TableModel, Field, Expr, F, count, exists, param
 
 
 # Dummy subclass for testing
@@ -108,3 +109,51 @@ def test_cross_model_expression():
     # More complex case:
     complex_expr = (l.quantity > n.total_input) & (l.quantity < 100)
     assert str(complex_expr) == "((l.quantity > n.total_input) AND (l.quantity < 100))"
+
+
+def test_subquery_expressions():
+    loc = Location("l")
+    nested = QueryBuilder().match().node(ref_name="l").related_to("NEAR").node("Location", "o")
+    assert str(exists(nested)) == "EXISTS { MATCH (l)-[: NEAR]->(o: Location) }"
+    assert str(~exists(nested)) == "NOT EXISTS { MATCH (l)-[: NEAR]->(o: Location) }"
+    assert str((count(nested) >= 2) | (loc.age > 30)) == \
+        "((2 <= COUNT { MATCH (l)-[: NEAR]->(o: Location) }) OR (l.age > 30))"
+
+
+@pytest.mark.parametrize('query', [
+    QueryBuilder().with_("l").match().node(ref_name="l"),
+    QueryBuilder().match().node(ref_name="l").return_literal("l"),
+])
+def test_subquery_validation(query):
+    with pytest.raises(ValueError):
+        exists(query)
+
+
+def test_count_subquery_cannot_be_negated():
+    with pytest.raises(TypeError):
+        ~count(QueryBuilder().match().node(ref_name="l"))
+
+
+def test_predicate_expressions():
+    loc = Location("l")
+    assert str(loc.age.is_in([1, 2])) == "(l.age IN [1, 2])"
+    assert str(loc.name.is_in(["a", "b'c", None])) == "(l.name IN ['a', 'b\\'c', NULL])"
+    assert str(loc.id.is_in(param("ids"))) == "(l.id IN $ids)"
+    assert str(~loc.id.is_in(param("ids"))) == "(NOT (l.id IN $ids))"
+    assert str(loc.name.is_null() | loc.id.is_not_null()) == "((l.name IS NULL) OR (l.id IS NOT NULL))"
+    assert str(loc.name.starts_with("Par")) == "(l.name STARTS WITH 'Par')"
+    assert str(loc.name.ends_with(param("suffix"))) == "(l.name ENDS WITH $suffix)"
+    assert str(loc.name.contains("is")) == "(l.name CONTAINS 'is')"
+    assert str(loc.name.matches("P.*s")) == "(l.name =~ 'P.*s')"
+    assert str(loc.id.list_contains("x")) == "list_contains(l.id, 'x')"
+    assert str(loc.name == "O'Hare") == "(l.name = 'O\\'Hare')"
+    assert str(loc.age > param("min")) == "(l.age > $min)"
+
+
+def test_function_expressions():
+    loc = Location("l")
+    assert str(F.lower(loc.name) == "paris") == "(lower(l.name) = 'paris')"
+    assert str(F.date_part("year", F.current_date()) - loc.age) == "(date_part('year', current_date()) - l.age)"
+    assert str(F.size(loc.name, type_=int) > 3) == "(size(l.name) > 3)"
+    assert F.upper(loc.name)._type is str
+    assert F.now()._type is None
@@ -0,0 +1,129 @@
+import pytest
+from cymple import QueryBuilder
+from cymple.cache import ResultCache
+from cymple.execution import ConnectionPool, run
+from cymple.session import Session
+from cymple.transactions import UnitOfWork, is_write_conflict, transaction
+
+
+class TransactionConnection:
+    """Record the statements, failing the statements containing a marker a given number of times."""
+
+    def __init__(self, marker=None, failures=0, error='Cannot start a new write transaction in the system.'):
+        self.statements = []
+        self.marker = marker
+        self.failures = failures
+        self.error = error
+
+    def execute(self, query, parameters=None):
+        self.statements.append((query, parameters))
+        if self.marker is not None and self.marker in query and self.failures:
+            self.failures -= 1
+            raise RuntimeError(self.error)
+        return [{'id': 1}] if query.startswith('MATCH') else []
+
+
+def test_transaction():
+    connection = TransactionConnection()
+    with transaction(connection) as current:
+        current.execute('CREATE (n: Person {id: 1})')
+        current.execute('MATCH (n: Person) RETURN n.id AS id')
+    assert [query for query, _ in connection.statements] == \
+        ['BEGIN TRANSACTION', 'CREATE (n: Person {id: 1})', 'MATCH (n: Person) RETURN n.id AS id', 'COMMIT']
+    assert current.queries == 2
+    assert current.written_labels == {'Person'}
+
+    connection = TransactionConnection()
+    with pytest.raises(KeyError):
+        with transaction(ConnectionPool(size=1, connection_factory=lambda: connection)) as current:
+            current.execute('CREATE (n: Person {id: 1})')
+            raise KeyError()
+    assert connection.statements[-1] == ('ROLLBACK', {})
+
+
+def test_session_transaction_invalidates_the_cache():
+    connection = TransactionConnection()
+    cache = ResultCache()
+    session = Session(connection, cache=cache)
+    session.execute('MATCH (n: Person) RETURN n.id AS id')
+    session.execute('MATCH (n: Company) RETURN n.id AS id')
+    with session.transaction() as current:
+        current.execute('MATCH (n: Person {id: 1}) SET n.age = 2')
+    assert len(cache) == 1
+
+
+def test_unit_of_work_batches():
+    unit = UnitOfWork(TransactionConnection())
+    for index in range(3):
+        unit.add(QueryBuilder().create().node('Person', 'p', {'id': index, 'name': f'p{index}'}))
+    unit.add(QueryBuilder().match().node('Person', 'p', {'id': 1}).set({'p.age': '$age'}, escape_values=False),
+             {'age': 7, 'unused': 0})
+    unit.add('CREATE NODE TABLE City(id INT64, PRIMARY KEY(id))')
+    unit.add(QueryBuilder().create().node('Person', 'p', {'id': 3, 'name': 'p3'}))
+    unit.add(QueryBuilder().create().node('Person', 'p', {'id': 4, 'name': 'p4'}))
+    assert unit.statements() == [
+        ('UNWIND $rows AS _row CREATE (p: Person {id : _row._p0, name : _row._p1})',
+         {'rows': [{'_p0': 0, '_p1': 'p0'}, {'_p0': 1, '_p1': 'p1'}, {'_p0': 2, '_p1': 'p2'}]}),
+        ('MATCH (p: Person {id : 1}) SET p.age = $age', {'age': 7, 'unused': 0}),
+        ('CREATE NODE TABLE City(id INT64, PRIMARY KEY(id))', {}),
+        ('UNWIND $rows AS _row CREATE (p: Person {id : _row._p0, name : _row._p1})',
+         {'rows': [{'_p0': 3, '_p1': 'p3'}, {'_p0': 4, '_p1': 'p4'}]}),
+    ]
+
+    unit.reorder = True
+    statements = unit.statements()
+    assert len(statements) == 3
+    assert len(statements[0][1]['rows']) == 5
+
+
+@pytest.mark.parametrize('query', [
+    'MATCH (p: Person {id: %d}) WITH p SET p.age = 1',
+    'MATCH (p: Person) WHERE p.age = %d WITH p ORDER BY p.id LIMIT 2 SET p.flag = true',
+    'MATCH (p: Person {id: %d}) LIMIT 1 SET p.age = 1',
+])
+def test_unit_of_work_keeps_with_and_limit_queries(query):
+    unit = UnitOfWork(TransactionConnection())
+    unit.add(query % 1).add(query % 2)
+    assert unit.statements() == [(query % 1, {}), (query % 2, {})]
+
+
+def test_unit_of_work_flush_and_retries():
+    connection = TransactionConnection(marker='UNWIND', failures=2)
+    with UnitOfWork(connection, backoff=0) as unit:
+        unit.add('MATCH (p: Person {id: 1}) SET p.age = 1').add('MATCH (p: Person {id: 2}) SET p.age = 2')
+    assert len(unit) == 0
+    assert [query for query, _ in connection.statements].count('ROLLBACK') == 2
+    assert connection.statements[-2] == \
+        ('UNWIND $rows AS _row MATCH (p: Person {id: _row._p0}) SET p.age = _row._p1',
+         {'rows': [{'_p0': 1, '_p1': 1}, {'_p0': 2, '_p1': 2}]})
+
+    unit = UnitOfWork(TransactionConnection(marker='SET', failures=5), retries=2, backoff=0)
+    unit.add('MATCH (p: Person {id: 1}) SET p.age = 1')
+    with pytest.raises(RuntimeError):
+        unit.flush()
+
+    unit = UnitOfWork(TransactionConnection(marker='SET', failures=1, error='Runtime exception: no such table'))
+    unit.add('MATCH (p: Person {id: 1}) SET p.age = 1')
+    with pytest.raises(RuntimeError):
+        unit.flush()
+    assert len(unit) == 1
+    assert unit.flush()['attempts'] == 1
+
+
+def test_discarded_on_error():
+    connection = TransactionConnection()
+    with pytest.raises(ValueError):
+        with UnitOfWork(connection) as unit:
+            unit.add('CREATE (p: Person {id: 1})')
+            raise ValueError()
+    assert connection.statements == [] and len(unit) == 0
+    assert run(connection, 'RETURN 1') == []
+
+
+@pytest.mark.parametrize('message, expected', [
+    ('Cannot start a new write transaction in the system. Only one write transaction at a time is allowed.', True),
+    ('Write-write conflict of updating the same row.', True),
+    ('Binder exception: Table Person does not exist.', False),
+])
+def test_is_write_conflict(message, expected):
+    assert is_write_conflict(RuntimeError(message)) is expected
@@ -0,0 +1,89 @@
+import json
+import pytest
+from cymple.execution import run
+from cymple.hooks import hooks
+from cymple.workload import Record, WorkloadRecorder, read_workload, replay
+
+
+class FakeConnection:
+    def execute(self, query, parameters):
+        if 'FAIL' in query:
+            raise RuntimeError('boom')
+        return [{'n': 1}]
+
+
+class RecordingConnection:
+    def __init__(self):
+        self.queries = []
+
+    def execute(self, query, parameters):
+        self.queries.append(query)
+        return []
+
+
+@pytest.mark.parametrize('name', ['workload.jsonl', 'workload.jsonl.gz'])
+def test_record_and_read(tmp_path, name):
+    path = str(tmp_path / name)
+    with hooks.subscribe(WorkloadRecorder(path)) as recorder:
+        try:
+            run(FakeConnection(), 'MATCH (n: N {x : 1}) RETURN n', {'p': 1})
+            with pytest.raises(RuntimeError):
+                run(FakeConnection(), 'MATCH (n) WHERE FAIL RETURN n')
+        finally:
+            hooks.unsubscribe(recorder)
+
+    first, second = read_workload(path)
+    assert first.query == 'MATCH (n: N {x : 1}) RETURN n'
+    assert first.parameters == {'p': 1}
+    assert first.error is None
+    assert len(first.fingerprint) == 16
+    assert second.error == "RuntimeError('boom')"
+    assert first.time <= second.time
+
+
+def test_log_lines_are_compact(tmp_path):
+    path = tmp_path / 'workload.jsonl'
+    with WorkloadRecorder(str(path)) as recorder:
+        recorder.record('MATCH (n) RETURN n', {}, 0.5)
+    assert set(json.loads(path.read_text())) == {'t', 'f', 'q', 'p', 'l'}
+    assert ' ' not in path.read_text().replace('MATCH (n) RETURN n', '')
+
+
+def test_transaction_control_is_not_recorded(tmp_path):
+    path = str(tmp_path / 'workload.jsonl')
+    with hooks.subscribe(WorkloadRecorder(path)) as recorder:
+        try:
+            for query in ('BEGIN TRANSACTION', 'CREATE (n: N {x : 1})', 'COMMIT', 'rollback'):
+                run(FakeConnection(), query)
+        finally:
+            hooks.unsubscribe(recorder)
+    assert [record.query for record in read_workload(path)] == ['CREATE (n: N {x : 1})']
+
+
+def test_replay_skips_transaction_control():
+    connection = RecordingConnection()
+    records = [Record(1000, None, query, {}, 0.1, None) for query in ('BEGIN TRANSACTION', 'CREATE (n: N)', 'COMMIT')]
+    assert replay(records, connection, speedup=0).overall.calls == 1
+    assert connection.queries == ['CREATE (n: N)']
+
+
+def _records(count, interval=0.0):
+    return [Record(1000 + index * interval, None, f'MATCH (n: N {{x : {index}}}) RETURN n' if index % 4 else
+                   'MATCH (n) WHERE FAIL RETURN n', {}, 0.1, None) for index in range(count)]
+
+
+def test_replay_report():
+    report = replay(_records(20), FakeConnection(), concurrency=3, speedup=0)
+    summary = report.to_dict()
+    assert summary['queries'] == 20
+    assert summary['errors'] == 5
+    assert summary['throughput'] > 0
+    assert [(shape['shape'], shape['calls'], shape['errors']) for shape in summary['fingerprints']] == [
+        ('MATCH (n: N {x : ?}) RETURN n', 15, 0), ('MATCH (n) WHERE FAIL RETURN n', 5, 5)]
+    assert set(summary['latency']) == {'mean', 'p50', 'p95', 'p99', 'max'}
+    assert report.table().startswith('20 queries, 5 errors in ')
+
+
+def test_replay_pacing():
+    assert replay(_records(3, interval=0.05), FakeConnection(), speedup=1).duration >= 0.1
+    assert replay(_records(3, interval=0.05), FakeConnection(), speedup=10).duration < 0.1
@@ -0,0 +1,95 @@
+import threading
+import pytest
+from cymple import QueryBuilder, Session
+from cymple.writer import WriteQueue
+
+BLOCKER = 'MATCH (b: Blocker) SET b.x = 1'
+
+
+class BlockingConnection:
+    """Blocks on the first write until released, so that the following writes pile up in the queue."""
+
+    def __init__(self, fail_on=None):
+        self.statements = []
+        self.fail_on = fail_on
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def execute(self, query, parameters):
+        self.statements.append(query)
+        if query == BLOCKER:
+            self.started.set()
+            self.release.wait(5)
+        if query == self.fail_on:
+            raise RuntimeError('write-write conflict')
+        return [{'query': query}]
+
+
+def _queue_behind_blocker(connection, queries, max_batch=64):
+    writer = WriteQueue(connection, max_batch)
+    blocker = writer.submit(BLOCKER)
+    connection.started.wait(5)
+    futures = [writer.submit(query) for query in queries]
+    connection.release.set()
+    blocker.result()
+    writer.close()
+    return writer, futures
+
+
+writes = [str(QueryBuilder().match().node('Person', 'p').set({'p.n': i})) for i in range(4)]
+
+
+def test_consecutive_writes_share_a_transaction():
+    connection = BlockingConnection()
+    writer, futures = _queue_behind_blocker(connection, writes[:3])
+    assert [future.result() for future in futures] == [[{'query': query}] for query in writes[:3]]
+    assert connection.statements == [BLOCKER, 'BEGIN TRANSACTION', *writes[:3], 'COMMIT']
+    assert writer.stats == {'writes': 4, 'transactions': 2, 'failed': 0, 'queued': 0}
+
+
+def test_max_batch_and_ddl_isolation():
+    connection = BlockingConnection()
+    ddl = 'CREATE NODE TABLE T(id INT64, PRIMARY KEY(id))'
+    _queue_behind_blocker(connection, [writes[0], writes[1], writes[2], ddl, writes[3]], max_batch=2)
+    assert connection.statements == [BLOCKER, 'BEGIN TRANSACTION', writes[0], writes[1], 'COMMIT',
+                                     writes[2], ddl, writes[3]]
+
+
+def test_failing_write_only_fails_its_caller():
+    connection = BlockingConnection(fail_on=writes[1])
+    writer, futures = _queue_behind_blocker(connection, writes[:3])
+    assert futures[0].result() == [{'query': writes[0]}]
+    with pytest.raises(RuntimeError):
+        futures[1].result()
+    assert futures[2].result() == [{'query': writes[2]}]
+    assert connection.statements[-4:] == ['ROLLBACK', *writes[:3]]
+    assert writer.stats == {'writes': 3, 'transactions': 3, 'failed': 1, 'queued': 0}
+
+
+def test_cancelled_writes_are_skipped():
+    connection = BlockingConnection()
+    writer = WriteQueue(connection)
+    blocker = writer.submit(BLOCKER)
+    connection.started.wait(5)
+    cancelled = writer.submit(writes[0])
+    kept = writer.submit(writes[1])
+    assert cancelled.cancel()
+    connection.release.set()
+    assert kept.result(5) == [{'query': writes[1]}]
+    assert blocker.result(5) and not blocker.cancel()
+    assert writer.execute(writes[2]) == [{'query': writes[2]}]
+    writer.close()
+    assert writes[0] not in connection.statements
+    with pytest.raises(RuntimeError):
+        writer.submit(writes[3])
+    writer.close()
+
+
+def test_session_routes_writes_to_the_writer():
+    readers, writes_connection = BlockingConnection(), BlockingConnection()
+    with WriteQueue(writes_connection) as writer:
+        session = Session(readers, writer=writer)
+        session.execute(QueryBuilder().match().node('Person', 'p').return_literal('p'))
+        session.execute(writes[0])
+    assert readers.statements == ['MATCH (p: Person) RETURN p']
+    assert writes_connection.statements == [writes[0]]